@@ -1,19 +1,33 @@
 from array import array
 import sys
-from PyQt6.QtCore import pyqtSignal, QObject, QTimer
-from PyQt6.QtWidgets import QApplication, QWidget, QLineEdit, QPushButton, QTextEdit, QGridLayout, QLabel, QTableWidget, QTableWidgetItem, QStyle, QStylePainter, QColorDialog, QCheckBox
+from PyQt6.QtCore import pyqtSignal, QObject, QTimer, Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtWidgets import QApplication, QWidget, QLineEdit, QPushButton, QTextEdit, QGridLayout, QLabel, QTableWidget, QTableWidgetItem, QTableView, QStyle, QStylePainter, QColorDialog, QCheckBox
 from PyQt6.QtGui import QColor 
 import pickle
+import socket
+import struct
+import mmap
 import time
 import math
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
 import sqlite3
-import pandas as pd
 import requests
 import json
 import os
+import re
+import threading
+import traceback
+import tarfile
+import hashlib
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-if sys.platform == 'linux':
-        from ola.ClientWrapper import ClientWrapper
+try:
+        import numpy as np
+except ImportError: #NumPy is optional, fades fall back to pure Python without it
+        np = None
 
 #Superclass for all widgets used by this application to facilitate error handling
 class PIghtingWidget (QWidget):
@@ -35,6 +49,271 @@ class PatchError(Exception):
                 super().__init__(message)
                 self.message = message
 
+#Number of slots in a DMX universe
+universeSize = 512
+
+#Holds a frame of 512 slots for each universe in use. Universes are created the first time they are written to
+class Frame:
+        def __init__(self, universes=None):
+                self.universes = universes if universes is not None else {}
+
+        def __getitem__(self, universe): #Returns the slots of a universe so they can be read and edited
+                if universe not in self.universes:
+                        self.universes[universe] = array('B', [0]*universeSize)
+                return self.universes[universe]
+
+        def __contains__(self, universe):
+                return universe in self.universes
+
+        def __repr__(self):
+                return f'Frame({self.universes})'
+
+        def get(self, universe): #Returns a universe without creating it, unused universes are all 0
+                if universe in self.universes:
+                        return self.universes[universe]
+                return array('B', [0]*universeSize)
+
+        def getUniverses(self):
+                return sorted(self.universes.keys())
+
+        def copy(self):
+                return Frame({universe: slots[:] for universe, slots in self.universes.items()})
+
+        #Called after slots are written (all slots of the universe if slots is None). Only merge layers track changes, see MergeLayer
+        def markChanged(self, universe, slots=None):
+                pass
+
+#One source of DMX values, i.e. playback, the colour picker, pan/tilt or manual edits. Layers are combined into the output by the MergeEngine.
+#Each slot has a stamp recording when the layer last wrote it, 0 meaning the layer has never set the slot and does not take part in merging it
+class MergeLayer(Frame):
+        def __init__(self, name, mergeEngine):
+                super().__init__()
+                self.name = name
+                self.mergeEngine = mergeEngine
+                self.stamps = {} #Universe -> array('Q') of write stamps
+
+        def markChanged(self, universe, slots=None):
+                stamp = self.mergeEngine.nextStamp()
+                if universe not in self.stamps:
+                        self.stamps[universe] = array('Q', [0]*universeSize)
+                stamps = self.stamps[universe]
+                if slots is None:
+                        stamps[:] = array('Q', [stamp]*universeSize)
+                elif np is not None:
+                        np.frombuffer(stamps, dtype=np.uint64)[slots] = stamp
+                else:
+                        for slot in slots:
+                                stamps[slot] = stamp
+                self.mergeEngine.markDirty(universe)
+
+        #Writes a frame into the layer. Only slots that differ, or that the layer has not set yet, are written and take precedence
+        def load(self, frame):
+                for universe in set(self.universes) | set(frame.getUniverses()):
+                        slots = self[universe]
+                        newSlots = frame.get(universe)
+                        stamps = self.stamps.get(universe)
+                        changed = [slotNo for slotNo in range(universeSize) if slots[slotNo] != newSlots[slotNo] or stamps is None or stamps[slotNo] == 0]
+                        if changed:
+                                slots[:] = newSlots
+                                self.markChanged(universe, changed)
+
+        def release(self): #Stops the layer contributing to the output
+                #Both are swapped under the merge lock, so a merge on the output thread never sees one without the other
+                with self.mergeEngine.lock:
+                        universes = self.universes
+                        self.universes = {}
+                        self.stamps = {}
+                for universe in universes:
+                        self.mergeEngine.markDirty(universe)
+
+#Combines the merge layers into the output frame. Intensity slots are merged highest takes precedence (HTP), every other attribute latest takes precedence (LTP).
+#Only universes that a layer changed since the last merge are recombined, and each universe is merged across all layers in one vectorised pass
+class MergeEngine:
+        #Attribute names containing any of these are intensity and merge HTP. Slots no fixture is patched to are treated as generic dimmers
+        intensityNames = ('dimmer', 'intensity', 'master')
+
+        def __init__(self, fixtureManager=None):
+                self.fixtureManager = fixtureManager
+                self.layers = {} #Name -> MergeLayer
+                self.stamp = 0
+                self.dirty = set()
+                self.lock = threading.Lock()
+                self.htpMasks = {} #Universe -> HTP mask, rebuilt when the patch changes
+                self.patchVersion = None
+
+        def getLayer(self, name):
+                with self.lock:
+                        if name not in self.layers:
+                                self.layers[name] = MergeLayer(name, self)
+                        return self.layers[name]
+
+        def nextStamp(self):
+                with self.lock:
+                        self.stamp += 1
+                        return self.stamp
+
+        def markDirty(self, universe):
+                with self.lock:
+                        self.dirty.add(universe)
+
+        #Recombines every universe changed since the last merge into outputFrame, and returns those universes
+        def merge(self, outputFrame):
+                if self.fixtureManager is not None and self.fixtureManager.patchVersion != self.patchVersion:
+                        #The patch changed, so HTP/LTP rules may have changed for any universe
+                        self.patchVersion = self.fixtureManager.patchVersion
+                        self.htpMasks = {}
+                        for universe in outputFrame.getUniverses():
+                                self.markDirty(universe)
+                with self.lock:
+                        dirty, self.dirty = self.dirty, set()
+                for universe in dirty:
+                        outputFrame[universe][:] = self.mergeUniverse(universe)
+                return dirty
+
+        #True for slots that merge HTP
+        def getHTPMask(self, universe):
+                if universe not in self.htpMasks:
+                        mask = [True]*universeSize
+                        if self.fixtureManager is not None:
+                                for fixture in self.fixtureManager.getUniverseFixtures(universe):
+                                        for offset, entry in enumerate(fixture.attributes):
+                                                slot = fixture.address - 1 + offset
+                                                if slot < universeSize:
+                                                        mask[slot] = isinstance(entry, str) and any(name in entry.lower() for name in self.intensityNames)
+                        self.htpMasks[universe] = np.array(mask, dtype=bool) if np is not None else mask
+                return self.htpMasks[universe]
+
+        def mergeUniverse(self, universe):
+                #The values and stamps of each layer are taken together under the lock, as a layer released on the UI thread replaces both
+                with self.lock:
+                        sources = [(layer.universes, layer.stamps) for layer in self.layers.values()]
+                layers = [(universes.get(universe, array('B', [0]*universeSize)), stamps[universe]) for universes, stamps in sources if universe in stamps]
+                if not layers:
+                        return array('B', [0]*universeSize)
+                htpMask = self.getHTPMask(universe)
+                if np is not None:
+                        values = np.stack([np.frombuffer(layerValues, dtype=np.uint8) for layerValues, layerStamps in layers])
+                        stamps = np.stack([np.frombuffer(layerStamps, dtype=np.uint64) for layerValues, layerStamps in layers])
+                        active = stamps > 0
+                        highest = np.where(active, values, 0).max(axis=0)
+                        latest = values[stamps.argmax(axis=0), np.arange(universeSize)]
+                        latest[~active.any(axis=0)] = 0
+                        return array('B', np.where(htpMask, highest, latest).astype(np.uint8).tobytes())
+                merged = array('B', [0]*universeSize)
+                for slotNo in range(universeSize):
+                        best = 0
+                        bestStamp = 0
+                        for layerValues, layerStamps in layers:
+                                stamp = layerStamps[slotNo]
+                                if stamp == 0:
+                                        continue
+                                value = layerValues[slotNo]
+                                if (htpMask[slotNo] and value > best) or (not htpMask[slotNo] and stamp > bestStamp):
+                                        best = value
+                                        bestStamp = stamp
+                        merged[slotNo] = best
+                return merged
+
+#Single universe frames were saved before multiple universes were supported, these are treated as universe 1
+def upgradeFrame(frame):
+        if isinstance(frame, Frame):
+                return frame
+        return Frame({1: array('B', frame)})
+
+#Raises IndexError for slot numbers outside a universe. Matrix storage would otherwise take them as slots of the next universe, or count back from the end
+def checkSlots(slots):
+        for slot in slots:
+                if not 0 <= slot < universeSize:
+                        raise IndexError(f'Slot {slot} is outside 0-{universeSize - 1}')
+
+#Optional cue storage keeping the frames of every cue as rows of one 2-D byte matrix, universeSize columns per universe.
+#Universes get their columns the first time any cue uses them, unused universes of a cue are all 0. Needs NumPy.
+#Rows of deleted cues are zeroed and reused. The matrix is reallocated as it grows, so views of it must not be kept across adding cues
+class CueMatrix:
+        def __init__(self, capacity=64):
+                if np is None:
+                        raise ValueError('Matrix cue storage needs NumPy')
+                self.matrix = np.zeros((capacity, 0), dtype=np.uint8)
+                self.universeColumns = {} #Universe -> first column of its slots
+                self.rowCount = 0 #Rows handed out so far, including freed ones
+                self.freeRows = []
+
+        def addUniverse(self, universe):
+                if universe not in self.universeColumns:
+                        matrix = np.zeros((self.matrix.shape[0], self.matrix.shape[1] + universeSize), dtype=np.uint8)
+                        matrix[:, :self.matrix.shape[1]] = self.matrix
+                        self.universeColumns[universe] = self.matrix.shape[1]
+                        self.matrix = matrix
+                return self.universeColumns[universe]
+
+        def columns(self, universe, slots=None): #Columns of the given slots of a universe (every slot by default). A new universe gets its columns, so only use it to write
+                first = self.addUniverse(universe)
+                if slots is None:
+                        return np.arange(first, first + universeSize)
+                return first + np.asarray(slots, dtype=np.intp)
+
+        #Stores a frame in a free row and returns the row
+        def allocate(self, frame):
+                if self.freeRows:
+                        row = self.freeRows.pop()
+                else:
+                        row = self.rowCount
+                        self.rowCount += 1
+                        if row == self.matrix.shape[0]:
+                                matrix = np.zeros((row + row // 2, self.matrix.shape[1]), dtype=np.uint8)
+                                matrix[:row] = self.matrix
+                                self.matrix = matrix
+                self.write(row, frame)
+                return row
+
+        def write(self, row, frame):
+                values = [(universe, frame.get(universe)) for universe in frame.getUniverses()] #Read first, frame may be a view of this row
+                self.matrix[row] = 0
+                for universe, slots in values:
+                        first = self.addUniverse(universe)
+                        self.matrix[row, first:first + universeSize] = np.frombuffer(slots, dtype=np.uint8)
+
+        def release(self, row):
+                self.matrix[row] = 0
+                self.freeRows.append(row)
+
+        def memoryUsed(self): #Bytes held by the matrix
+                return self.matrix.nbytes
+
+#A cue frame that is a view onto its row of a CueMatrix. frame[universe] returns a writable view of the row, only valid until the next cue is added,
+#get() returns a copy like Frame.get
+class MatrixFrame(Frame):
+        __slots__ = ('store', 'row')
+
+        def __init__(self, store, row):
+                self.store = store
+                self.row = row
+
+        @property
+        def universes(self):
+                return {universe: self[universe] for universe in self.getUniverses()}
+
+        def __getitem__(self, universe): #For writing, as a new universe gets its columns. Use get() to read
+                first = self.store.addUniverse(universe)
+                return self.store.matrix[self.row, first:first + universeSize]
+
+        def __contains__(self, universe):
+                return universe in self.store.universeColumns
+
+        def __repr__(self):
+                return f'MatrixFrame(row {self.row})'
+
+        def get(self, universe):
+                if universe not in self.store.universeColumns:
+                        return array('B', [0]*universeSize)
+                return array('B', self[universe].tobytes())
+
+        def getUniverses(self):
+                return sorted(self.store.universeColumns.keys())
+
+        def copy(self):
+                return Frame({universe: self.get(universe) for universe in self.getUniverses()})
+
 #Contains all relevant information of a state of the network
 class Cue:
         def __init__(self, cueID, frame, fadeUp, fadeDown):
@@ -42,14 +321,105 @@ class Cue:
                 self.frame = frame
                 self.fadeUp = fadeUp
                 self.fadeDown = fadeDown
+                self.version = 0 #Increased when the frame is edited in place
+
+        def __setstate__(self, state): #Upgrades cues loaded from older show files
+                self.__dict__.update(state)
+                self.__dict__.setdefault('version', 0)
+                self.frame = upgradeFrame(self.frame)
+
+        def copy(self): #A copy that does not share its frame, used for snapshots
+                return Cue(self.ID, self.frame.copy(), self.fadeUp, self.fadeDown)
+
+#The slots of frame that differ from base, as (keys, values). Each key is universe << 16 | slot, in increasing order.
+#Two flat arrays per cue keep tracked cues small, a dict of arrays per universe would cost more than the few slots a cue changes
+def frameDelta(frame, base):
+        keys = array('I')
+        newValues = array('B')
+        for universe in sorted(set(frame.getUniverses()) | set(base.getUniverses())):
+                values, baseValues = frame.get(universe), base.get(universe)
+                if values == baseValues:
+                        continue
+                if np is not None:
+                        values = np.frombuffer(values, dtype=np.uint8)
+                        changed = np.flatnonzero(values != np.frombuffer(baseValues, dtype=np.uint8))
+                        keys.frombytes(((universe << 16) | changed).astype(np.uint32).tobytes())
+                        newValues.frombytes(values[changed].tobytes())
+                else:
+                        for slotNo in range(universeSize):
+                                if values[slotNo] != baseValues[slotNo]:
+                                        keys.append((universe << 16) | slotNo)
+                                        newValues.append(values[slotNo])
+        return keys, newValues
+
+#Writes the values of a delta into frame. Deltas are a few slots, so a loop beats NumPy here
+def applyDelta(frame, delta):
+        keys, values = delta
+        universe, slots = None, None
+        for key, value in zip(keys, values):
+                if key >> 16 != universe:
+                        universe = key >> 16
+                        slots = frame[universe]
+                slots[key & 0xFFFF] = value
+        return frame
+
+#A cue of a tracking cue list. Only the slots the cue changes from the state before it are stored, as a delta (see frameDelta).
+#The frame is rebuilt by the cue manager from the nearest checkpoint each time it is read, so it must not be edited in place. Record the cue again instead
+class TrackedCue(Cue):
+        def __init__(self, cueID, delta, fadeUp, fadeDown, cueManager=None):
+                self.ID = cueID
+                self.delta = delta
+                self.fadeUp = fadeUp
+                self.fadeDown = fadeDown
+                self.version = 0
+                self.cueManager = cueManager
+
+        @property
+        def frame(self):
+                return self.cueManager.trackedState(self.ID)
+
+        def copy(self):
+                return TrackedCue(self.ID, (self.delta[0][:], self.delta[1][:]), self.fadeUp, self.fadeDown)
+
+#Full frame copies of tracked cues, built by applying their deltas in cue order
+def untrackCues(cueList):
+        untracked = {}
+        state = Frame()
+        for cueID in sorted(cueList.keys()):
+                cue = cueList[cueID]
+                if isinstance(cue, TrackedCue):
+                        applyDelta(state, cue.delta)
+                else:
+                        state = cue.frame.copy()
+                untracked[cueID] = Cue(cueID, state.copy(), cue.fadeUp, cue.fadeDown)
+        return untracked
 
 #Used to store Cues and call various functions on cues
 class  CueManager:
-        def __init__(self):
+        def __init__(self, matrix=False, tracking=False, checkpointInterval=32):
+                if matrix and tracking:
+                        raise ValueError('Tracking cue lists cannot use matrix storage')
                 self.cueList = {}
+                self.store = CueMatrix() if matrix else None #Cue frames are kept as rows of one matrix if set, see CueMatrix
+                #In tracking mode each cue only stores the slots it changes, see TrackedCue. A full frame is kept every checkpointInterval cues,
+                #so any cue is rebuilt by applying at most checkpointInterval deltas to the checkpoint before it
+                self.tracking = tracking
+                self.checkpointInterval = checkpointInterval
+                self.checkpoints = {} #Cue ID -> full frame of that cue
+                self.cueOrder = [] #Cue IDs kept in sorted order
                 self.playbackPointer = 0
+                #Transitions between cue pairs, built the first time a pair is faded and rebuilt if either cue changes
+                self.transitions = {}
                 #Fade times match standard initial value of 3 of ETC systems
                 self._defaultFade=3
+                self.listeners = [] #Called with an event name and its arguments whenever the cue list changes, see ShowJournal
+
+        def addListener(self, listener):
+                self.listeners.append(listener)
+
+        def notify(self, event, *args):
+                for listener in self.listeners:
+                        listener(event, *args)
 
         @property
         def defaultFade(self):
@@ -61,13 +431,20 @@ class  CueManager:
                 if cueID is None and len(self.cueList) == 0:
                         newCueID = 1
                 elif cueID is None and len(self.cueList) > 0:
-                        newCueID = max(self.cueList.keys()) + 1
-                elif cueID < 0:
-                       raise ValueError("Cue ID cannot be 0")
+                        newCueID = math.floor(self.cueOrder[-1]) + 1 #Next whole cue after the last one
                 else:
-                        newCueID = cueID
-                #Use an Array size 512 of all 0 if none provided
-                newDMXFrame = DMXFrame if DMXFrame is not None else array('B', [0]*512)
+                        newCueID = normaliseCueID(cueID)
+                        if newCueID <= 0:
+                               raise ValueError("Cue ID must be larger than 0")
+                #Use an empty frame (all universes 0) if none provided
+                newDMXFrame = upgradeFrame(DMXFrame) if DMXFrame is not None else Frame()
+                if self.store is not None: #A recorded cue keeps its row
+                        if newCueID in self.cueList:
+                                row = self.cueList[newCueID].frame.row
+                                self.store.write(row, newDMXFrame)
+                        else:
+                                row = self.store.allocate(newDMXFrame)
+                        newDMXFrame = MatrixFrame(self.store, row)
                 #Default values and more error handling
                 if fadeUp is None:
                        newUp = self.defaultFade
@@ -81,57 +458,314 @@ class  CueManager:
                        raise ValueError("Fade down time must be larger than 0")
                 else:
                         newDown = fadeDown
-                #Create cue object
-                newCue = Cue(newCueID, newDMXFrame, newUp, newDown)
-                #Add to cue list
-                self.cueList[newCue.ID] = newCue
+                if self.tracking:
+                        newCue = self.recordTracked(newCueID, newDMXFrame, newUp, newDown)
+                else:
+                        #Create cue object
+                        newCue = Cue(newCueID, newDMXFrame, newUp, newDown)
+                        #Add to cue list, and to the sorted cue order if it is a new cue
+                        if newCue.ID not in self.cueList:
+                                insort(self.cueOrder, newCue.ID)
+                        self.cueList[newCue.ID] = newCue
                 #Sets playback pointer to the new ID for playback functionality
                 self.playbackPointer = newCueID
+                self.notify('cue', newCue)
 
         #Used to find the next cue in sequence in the cue list
+        #The cue order is kept sorted, so the position of the playback pointer is found by binary search
         def getNextCue(self):
-               #Cue IDS is a dictionary, and must be sorted to determine sequence
-               cueIDS = list(self.cueList.keys())
-               cueIDS.sort()
-               if len(cueIDS) == 0: #Checks there are cues
+               if len(self.cueOrder) == 0: #Checks there are cues
                       self.playbackPointer = 0
                       raise (IndexError("No cues exist")) 
                if self.playbackPointer == 0: #Checks if initial cue
-                      self.playbackPointer=min(cueIDS)
-                      return self.cueList[min(cueIDS)]
-               playbackPosition = cueIDS.index(self.playbackPointer) # The relative position of the playbackPointer
-               if playbackPosition == len(cueIDS) - 1: #Checks if final cue
-                        self.playbackPointer=max(cueIDS)
+                      self.playbackPointer = self.cueOrder[0]
+                      return self.cueList[self.playbackPointer]
+               playbackPosition = bisect_right(self.cueOrder, self.playbackPointer) # The position of the first cue after the playbackPointer
+               if playbackPosition == len(self.cueOrder): #Checks if final cue
+                        self.playbackPointer = self.cueOrder[-1]
                         raise IndexError('Final cue in cuelist- please use Go To Cue to return to an earlier cue')
                else: #Otherwise fetches the next cue
-                        self.playbackPointer = cueIDS[playbackPosition + 1]              
+                        self.playbackPointer = self.cueOrder[playbackPosition]
                return self.cueList[self.playbackPointer]
 
+        #Same as getNextCue, but steps backwards through the cue list
+        def getPreviousCue(self):
+                if len(self.cueOrder) == 0:
+                        self.playbackPointer = 0
+                        raise IndexError("No cues exist")
+                playbackPosition = bisect_left(self.cueOrder, self.playbackPointer) - 1 # The position of the last cue before the playbackPointer
+                if playbackPosition < 0:
+                        raise IndexError('First cue in cuelist')
+                self.playbackPointer = self.cueOrder[playbackPosition]
+                return self.cueList[self.playbackPointer]
+
         def getCurrentCue(self):
-                cueIDS = list(self.cueList.keys())
-                cueIDS.sort()
+                if len(self.cueOrder) == 0:
+                        raise IndexError("No cues exist")
                 if self.playbackPointer == 0:
-                        return self.cueList[min(cueIDS)]
+                        return self.cueList[self.cueOrder[0]]
                 else:
                         return self.cueList[self.playbackPointer]
-        
+
+        def getCue(self, cueID):
+                cueID = normaliseCueID(cueID)
+                if cueID not in self.cueList:
+                        raise KeyError(f'Cue {cueID} does not exist')
+                return self.cueList[cueID]
+
+        #Returns the cues from startID to endID inclusive, in order
+        def getCueRange(self, startID, endID):
+                first = bisect_left(self.cueOrder, normaliseCueID(startID))
+                last = bisect_right(self.cueOrder, normaliseCueID(endID))
+                return [self.cueList[cueID] for cueID in self.cueOrder[first:last]]
+
+        #Cue IDs in order
+        def getCueIDs(self):
+                return list(self.cueOrder)
+
         #Used to jump in the cue list
         def setPlaybackCue(self, cueID):
-               self.playbackPointer = cueID
+               self.playbackPointer = normaliseCueID(cueID)
 
         def getPlaybackPointer(self):
                 return self.playbackPointer
 
         def getCueList(self):
                return self.cueList
+
+        #Replaces all cues, used when loading a show
+        def setCueList(self, cueList):
+                self.checkpoints = {}
+                if self.store is None and len(cueList) > 0 and all(isinstance(cue, TrackedCue) for cue in cueList.values()):
+                        self.tracking = True #Shows saved from a tracking cue list load as one
+                if self.tracking:
+                        cueList = self.trackCues(cueList)
+                elif any(isinstance(cue, TrackedCue) for cue in cueList.values()):
+                        cueList = untrackCues(cueList)
+                if self.store is not None:
+                        self.store = CueMatrix(max(len(cueList), 64))
+                        for cue in cueList.values():
+                                cue.frame = MatrixFrame(self.store, self.store.allocate(cue.frame))
+                self.cueList = cueList
+                self.cueOrder = sorted(cueList.keys())
+                self.transitions = {}
+                self.notify('reset')
+
+        def deleteCue(self, cueID):
+                cueID = normaliseCueID(cueID)
+                if cueID not in self.cueList:
+                        raise KeyError(f'Cue {cueID} does not exist')
+                if self.tracking:
+                        position = bisect_left(self.cueOrder, cueID)
+                        #Slots the cue changed go back to the state before it, in every cue they tracked into
+                        before = self.trackedState(self.cueOrder[position - 1]) if position > 0 else Frame()
+                        changes = {key: before.get(key >> 16)[key & 0xFFFF] for key in self.cueList[cueID].delta[0]}
+                        self.checkpoints.pop(cueID, None)
+                cue = self.cueList.pop(cueID)
+                if self.store is not None:
+                        self.store.release(cue.frame.row)
+                del self.cueOrder[bisect_left(self.cueOrder, cueID)]
+                if self.tracking:
+                        self.ripple(position - 1, changes)
+                        self.balanceCheckpoints(max(position - 1, 0))
+                for pair in [pair for pair in self.transitions if cueID in pair]:
+                        del self.transitions[pair]
+                self.notify('deleteCue', cueID)
+
+        #Called when the frame of a stored cue is edited in place, so transitions using it are rebuilt
+        def cueEdited(self, cueID):
+                self.cueList[cueID].version += 1
+                self.notify('cue', self.cueList[cueID])
+
+        #Bulk edits of the cues from startID to endID inclusive. With matrix storage each is one NumPy operation on the rows of the cues,
+        #otherwise the frames are edited one by one. Edited cues are marked with cueEdited and returned
+        def adjustSlots(self, startID, endID, universe, slots, amount): #Raises (or lowers, for a negative amount) slots, limited to 0-255
+                checkSlots(slots)
+                cues = self.getCueRange(startID, endID)
+                if self.store is not None and cues:
+                        index = np.ix_([cue.frame.row for cue in cues], self.store.columns(universe, slots))
+                        self.store.matrix[index] = np.clip(self.store.matrix[index].astype(np.int16) + amount, 0, 255)
+                else:
+                        frames = [cue.frame for cue in cues]
+                        for frame in frames:
+                                values = frame[universe]
+                                for slot in slots:
+                                        values[slot] = min(max(values[slot] + amount, 0), 255)
+                        self.recordEdited(cues, frames)
+                return self.bulkEdited(cues)
+
+        def copySlots(self, sourceID, startID, endID, universe, slots): #Copies the values of slots in one cue, i.e. a fixture's state, into every cue of the range
+                checkSlots(slots)
+                source = self.getCue(sourceID)
+                cues = [cue for cue in self.getCueRange(startID, endID) if cue is not source]
+                if self.store is not None and cues:
+                        columns = self.store.columns(universe, slots)
+                        self.store.matrix[np.ix_([cue.frame.row for cue in cues], columns)] = self.store.matrix[source.frame.row, columns]
+                else:
+                        sourceValues = source.frame.get(universe)
+                        frames = [cue.frame for cue in cues]
+                        for frame in frames:
+                                values = frame[universe]
+                                for slot in slots:
+                                        values[slot] = sourceValues[slot]
+                        self.recordEdited(cues, frames)
+                return self.bulkEdited(cues)
+
+        #Returns the IDs of the cues in the range whose slots differ from those of the reference cue, every slot of every universe by default
+        def compareSlots(self, referenceID, startID, endID, universe=None, slots=None):
+                if slots is not None:
+                        checkSlots(slots)
+                reference = self.getCue(referenceID)
+                cues = self.getCueRange(startID, endID)
+                if self.store is not None and cues:
+                        if universe is not None and universe not in self.store.universeColumns: #No cue uses the universe, so all are 0 and none differ
+                                return []
+                        columns = self.store.columns(universe, slots) if universe is not None else slice(None)
+                        rows = self.store.matrix[[cue.frame.row for cue in cues]][:, columns]
+                        differs = (rows != self.store.matrix[reference.frame.row, columns]).any(axis=1)
+                        return [cue.ID for cue, different in zip(cues, differs) if different]
+                universes = [universe] if universe is not None else sorted(set(reference.frame.getUniverses()).union(*(cue.frame.getUniverses() for cue in cues)))
+                differing = []
+                for cue in cues:
+                        for universeNum in universes:
+                                values, referenceValues = cue.frame.get(universeNum), reference.frame.get(universeNum)
+                                if (values != referenceValues if slots is None else any(values[slot] != referenceValues[slot] for slot in slots)):
+                                        differing.append(cue.ID)
+                                        break
+                return differing
+
+        #Tracked frames are rebuilt on every read, so bulk edits are recorded. Every frame is read before any is recorded,
+        #as recording a cue tracks the edit into the cues after it and reading those again would apply the edit twice
+        def recordEdited(self, cues, frames):
+                if self.tracking:
+                        for cue, frame in zip(cues, frames):
+                                self.recordTracked(cue.ID, frame, cue.fadeUp, cue.fadeDown)
+
+        def bulkEdited(self, cues):
+                for cue in cues:
+                        self.cueEdited(cue.ID)
+                return [cue.ID for cue in cues]
+
+        #---------Tracking---------
+        #Switches between tracking and storing every cue's full frame, converting the stored cues
+        def setTracking(self, tracking):
+                if tracking and self.store is not None:
+                        raise ValueError('Tracking cue lists cannot use matrix storage')
+                if tracking != self.tracking:
+                        cueList = untrackCues(self.cueList) if self.tracking else self.cueList
+                        self.tracking = tracking
+                        self.setCueList(cueList)
+
+        #The full frame of a tracked cue, built from the checkpoint at or before it and the deltas of the cues after the checkpoint
+        def trackedState(self, cueID):
+                position = bisect_left(self.cueOrder, cueID)
+                first = position
+                while first >= 0 and self.cueOrder[first] not in self.checkpoints:
+                        first -= 1
+                state = self.checkpoints[self.cueOrder[first]].copy() if first >= 0 else Frame()
+                for otherID in self.cueOrder[first + 1:position + 1]:
+                        applyDelta(state, self.cueList[otherID].delta)
+                return state
+
+        #Records a full frame as a tracked cue, storing only what it changes from the cue before it.
+        #Later cues keep tracking, so slots whose value changed carry on into them until a cue changes the slot itself
+        def recordTracked(self, cueID, frame, fadeUp, fadeDown):
+                position = bisect_left(self.cueOrder, cueID)
+                before = self.trackedState(self.cueOrder[position - 1]) if position > 0 else Frame()
+                if cueID in self.cueList:
+                        previous = self.trackedState(cueID) #What later cues tracked from before this recording
+                else:
+                        previous = before
+                        self.cueOrder.insert(position, cueID)
+                newCue = TrackedCue(cueID, frameDelta(frame, before), fadeUp, fadeDown, self)
+                if cueID in self.cueList:
+                        newCue.version = self.cueList[cueID].version + 1
+                self.cueList[cueID] = newCue
+                if cueID in self.checkpoints:
+                        self.checkpoints[cueID] = frame.copy()
+                changes = dict(zip(*frameDelta(frame, previous)))
+                self.ripple(position, changes)
+                self.balanceCheckpoints(position)
+                return newCue
+
+        #Carries changed slot values ({key: value}, keys as in frameDelta) forward from the cue at position. A slot stops at the first later cue that sets it itself,
+        #so only the cues the change tracks into are visited. Checkpoints on the way are updated and transitions using the cues are rebuilt
+        def ripple(self, position, changes):
+                for cueID in self.cueOrder[position + 1:]:
+                        if not changes:
+                                break
+                        cue = self.cueList[cueID]
+                        for key in cue.delta[0]:
+                                changes.pop(key, None)
+                        if not changes:
+                                break
+                        cue.version += 1
+                        if cueID in self.checkpoints:
+                                checkpoint = self.checkpoints[cueID]
+                                for key, value in changes.items():
+                                        checkpoint[key >> 16][key & 0xFFFF] = value
+
+        #Adds checkpoints around position until no cue is more than checkpointInterval cues after the last checkpoint
+        def balanceCheckpoints(self, position):
+                first = min(position, len(self.cueOrder) - 1)
+                while first >= 0 and self.cueOrder[first] not in self.checkpoints:
+                        first -= 1
+                while True:
+                        last = first + 1
+                        while last < len(self.cueOrder) and self.cueOrder[last] not in self.checkpoints:
+                                last += 1
+                        if last - first <= self.checkpointInterval:
+                                break
+                        first += self.checkpointInterval
+                        self.checkpoints[self.cueOrder[first]] = self.trackedState(self.cueOrder[first])
+
+        #Tracked copies of cues, with a checkpoint every checkpointInterval cues. Cues that are already tracked keep their deltas
+        def trackCues(self, cueList):
+                self.checkpoints = {}
+                trackedList = {}
+                state = Frame()
+                for position, cueID in enumerate(sorted(cueList.keys())):
+                        cue = cueList[cueID]
+                        if isinstance(cue, TrackedCue):
+                                delta = cue.delta
+                                applyDelta(state, delta)
+                        else:
+                                delta = frameDelta(cue.frame, state)
+                                state = cue.frame.copy()
+                        trackedList[cueID] = TrackedCue(cueID, delta, cue.fadeUp, cue.fadeDown, self)
+                        if (position + 1) % self.checkpointInterval == 0:
+                                self.checkpoints[cueID] = state.copy()
+                return trackedList
+
+        #Changes the fade times of a stored cue, leaving a time unchanged if it is None
+        def setFadeTimes(self, cueID, fadeUp=None, fadeDown=None):
+                cue = self.getCue(cueID)
+                if fadeUp is not None and fadeUp < 0:
+                        raise ValueError("Fade up time must be larger than 0")
+                if fadeDown is not None and fadeDown < 0:
+                        raise ValueError("Fade down time must be larger than 0")
+                if fadeUp is not None:
+                        cue.fadeUp = fadeUp
+                if fadeDown is not None:
+                        cue.fadeDown = fadeDown
+                self.notify('fadeTimes', cue.ID, cue.fadeUp, cue.fadeDown)
+
+        #Returns the transition between two cues, building it only if the pair has not been faded before or either cue has changed since
+        def getTransition(self, fromCue, toCue):
+                pair = (fromCue.ID, toCue.ID)
+                key = (fromCue, fromCue.version, toCue, toCue.version)
+                cached = self.transitions.get(pair)
+                if cached is None or cached[0] != key:
+                        cached = (key, CueTransition(fromCue.frame, toCue.frame))
+                        self.transitions[pair] = cached
+                return cached[1]
         
         #Function used for crossfading- Calculates an intermediate value 
         def interpolate(self, startValue, endValue, factor):
                  return startValue + (endValue - startValue) * factor
 
-        #Used to calculate factor for interpolate
-        def findIntermediates(self, currentFrame, nextFrame, rate, currentStep, fadeIn, fadeOut):
-                fadeArray =  array( 'B' , [] ) # This empty array is populated with intermediate values
+        #Used to calculate the up and down factors for a step of a fade
+        def fadeFactors(self, rate, currentStep, fadeIn, fadeOut):
                 #If the fade time is 0, this will instantly set the value to the end state
                 if fadeIn == 0:
                        factorIn = 1
@@ -145,88 +779,1761 @@ class  CueManager:
                         factorOut = (currentStep / (rate * fadeOut)) #Same as above for fading DOWN
                 if factorOut > 1:
                         factorOut = 1
-                for slotNo in range(len((currentFrame))):#Iterates over slots in the frame, using the correct fade  
-                        if currentFrame[slotNo] > nextFrame[slotNo]:
-                                intermediate = math.floor(self.interpolate(
-                                        currentFrame[slotNo],
-                                        nextFrame[slotNo],
-                                        factorOut
-                                        ))
-                        if currentFrame[slotNo] < nextFrame[slotNo]:
-                                intermediate = math.floor(self.interpolate(
-                                        currentFrame[slotNo],
-                                        nextFrame[slotNo],
-                                        factorIn
-                                        ))
-                        if currentFrame[slotNo] == nextFrame[slotNo]:
-                                intermediate = currentFrame[slotNo]
-                        fadeArray.append(intermediate)
-                return fadeArray
-
-        #Used to call findIntermediates over a fixed time
-        def crossFade(self, startValues, endValues, rate, fadeIn, fadeOut):
-                fades = [fadeIn,fadeOut]
-                maxSteps = max(fades) * rate
-                if maxSteps == 0:
-                       sendOLA(endValues)
+                return factorIn, factorOut
+
+        #Used to calculate a whole intermediate frame of a fade. A kernel can be passed in so a fade only prepares its frames once
+        def findIntermediates(self, currentFrame, nextFrame, rate, currentStep, fadeIn, fadeOut, kernel=None):
+                if kernel is None:
+                        kernel = FadeKernel(currentFrame, nextFrame)
+                factorIn, factorOut = self.fadeFactors(rate, currentStep, fadeIn, fadeOut)
+                return kernel.frame(factorIn, factorOut)
+
+#Calculates every slot of a crossfade frame in one pass, using separate factors for slots fading up and down.
+#Output is byte-identical to interpolating and flooring each slot individually
+class FadeKernel:
+        def __init__(self, startFrame, endFrame):
+                if np is not None:
+                        self.start = np.frombuffer(bytes(startFrame), dtype=np.uint8).astype(np.float64)
+                        self.delta = np.frombuffer(bytes(endFrame), dtype=np.uint8).astype(np.float64) - self.start
+                        self.fadingDown = self.delta < 0
                 else:
-                        #NOTE: Rate is simply the number of transmissions per second. It has nothing to do with the rates of change.
-                        sleepTime = 1/rate
-                        for step in range(maxSteps + 1):
-                                currentFrame = self.findIntermediates(
-                                        startValues,endValues, rate, step, fadeIn, fadeOut
-                                        )
-                                sendOLA(currentFrame)
-                                time.sleep(sleepTime)
-
-#Used to store fixtures and call some functions                                
+                        self.start = list(startFrame)
+                        self.end = list(endFrame)
+
+        def frame(self, factorIn, factorOut):
+                if np is not None:
+                        #Each slot gets the factor for its direction, unchanged slots have a delta of 0 so either factor works
+                        factors = np.where(self.fadingDown, factorOut, factorIn)
+                        values = np.floor(self.start + self.delta * factors)
+                        return array('B', values.astype(np.uint8).tobytes())
+                floor = math.floor
+                return array('B', [
+                        startValue if startValue == endValue
+                        else floor(startValue + (endValue - startValue) * (factorOut if startValue > endValue else factorIn))
+                        for startValue, endValue in zip(self.start, self.end)
+                        ])
+
+#Sparse fade between two multi-universe frames. Only the slots that differ are kept, with their start and end values and whether they fade up or down,
+#so each step of a fade only touches the changed slots. The changed slots of every universe are stored back to back and calculated in one pass
+class CueTransition:
+        def __init__(self, startFrame, endFrame):
+                self.endFrame = endFrame
+                self.segments = {} #Universe -> (first, last) position of its slots in the arrays below
+                slotIndices = []
+                startValues = []
+                endValues = []
+                for universe in sorted(set(startFrame.getUniverses()) | set(endFrame.getUniverses())):
+                        startSlots = startFrame.get(universe)
+                        endSlots = endFrame.get(universe)
+                        if startSlots == endSlots:
+                                continue
+                        first = len(slotIndices)
+                        for slotNo, (startValue, endValue) in enumerate(zip(startSlots, endSlots)):
+                                if startValue != endValue:
+                                        slotIndices.append(slotNo)
+                                        startValues.append(startValue)
+                                        endValues.append(endValue)
+                        self.segments[universe] = (first, len(slotIndices))
+                if np is not None:
+                        self.slotIndices = np.array(slotIndices, dtype=np.intp)
+                        self.start = np.array(startValues, dtype=np.float64)
+                        self.delta = np.array(endValues, dtype=np.float64) - self.start
+                        self.fadingDown = self.delta < 0
+                else:
+                        self.slotIndices = slotIndices
+                        self.start = startValues
+                        self.end = endValues
+
+        def getUniverses(self): #Universes changed by this transition
+                return list(self.segments.keys())
+
+        def changedSlots(self):
+                return len(self.slotIndices)
+
+        def getSlots(self, universe): #Indexes of the slots this transition changes in a universe
+                first, last = self.segments[universe]
+                return self.slotIndices[first:last]
+
+        #Writes the changed slots at this point of the fade into frame, every other slot is left alone
+        #Uses the same arithmetic as findIntermediates, so values are byte-identical
+        def apply(self, frame, factorIn, factorOut):
+                if np is not None:
+                        factors = np.where(self.fadingDown, factorOut, factorIn)
+                        values = np.floor(self.start + self.delta * factors).astype(np.uint8)
+                        for universe, (first, last) in self.segments.items():
+                                np.frombuffer(frame[universe], dtype=np.uint8)[self.slotIndices[first:last]] = values[first:last]
+                        return
+                floor = math.floor
+                for universe, (first, last) in self.segments.items():
+                        slots = frame[universe]
+                        for position in range(first, last):
+                                startValue = self.start[position]
+                                endValue = self.end[position]
+                                slots[self.slotIndices[position]] = floor(startValue + (endValue - startValue) * (factorOut if startValue > endValue else factorIn))
+
+        def applyFinal(self, frame): #Writes the end values of the changed slots into frame
+                for universe in self.segments:
+                        frame[universe][:] = self.endFrame.get(universe)
+
+#A fade that is currently being played back by the PlaybackEngine
+class ActiveFade:
+        def __init__(self, cueID, transition, fadeIn, fadeOut, rate):
+                self.cueID = cueID
+                self.fadeIn = fadeIn
+                self.fadeOut = fadeOut
+                self.transition = transition
+                self.maxSteps = math.ceil(max(fadeIn, fadeOut) * rate)
+                self.startTime = time.monotonic()
+
+#A cue stack with its own GO, playback pointer and fade, i.e. house lights, the main stack or an effects stack.
+#Each playback writes to its own merge layer, so playbacks running at the same time are merged like any other source
+class Playback:
+        def __init__(self, name, cueManager, layer):
+                self.name = name
+                self.cueManager = cueManager
+                self.layer = layer
+                self.fade = None
+
+#The fades of every playback running at the same time, calculated together in one pass per tick.
+#The changed slots of each fade are stored back to back, so the cost of a tick depends on the number of fading slots rather than the number of playbacks
+class FadeBatch:
+        def __init__(self, playbacks):
+                self.playbacks = playbacks
+                self.fades = [playback.fade for playback in playbacks]
+                if np is not None:
+                        transitions = [fade.transition for fade in self.fades]
+                        self.lengths = [transition.changedSlots() for transition in transitions]
+                        self.offsets = [0]
+                        for length in self.lengths:
+                                self.offsets.append(self.offsets[-1] + length)
+                        self.start = np.concatenate([transition.start for transition in transitions])
+                        self.delta = np.concatenate([transition.delta for transition in transitions])
+                        self.fadingDown = np.concatenate([transition.fadingDown for transition in transitions])
+
+        #Writes the fades at these factors, one pair of factors per playback, into each playback's layer
+        #Uses the same arithmetic as CueTransition.apply, so values are byte-identical
+        def apply(self, factors):
+                if np is None:
+                        for playback, (factorIn, factorOut) in zip(self.playbacks, factors):
+                                playback.fade.transition.apply(playback.layer, factorIn, factorOut)
+                        return
+                factorsIn = np.repeat([factorIn for factorIn, factorOut in factors], self.lengths)
+                factorsOut = np.repeat([factorOut for factorIn, factorOut in factors], self.lengths)
+                values = np.floor(self.start + self.delta * np.where(self.fadingDown, factorsOut, factorsIn)).astype(np.uint8)
+                for playback, offset in zip(self.playbacks, self.offsets):
+                        transition = playback.fade.transition
+                        for universe, (first, last) in transition.segments.items():
+                                np.frombuffer(playback.layer[universe], dtype=np.uint8)[transition.slotIndices[first:last]] = values[offset + first:offset + last]
+
+#A waveform applied to one attribute of a group of fixtures, i.e. a dimmer chase or half of a pan/tilt circle.
+#Fixtures are spread through the waveform by phaseSpread (degrees across the whole group) and fanned by up to fan values either side of the centre.
+#Slots are found through each fixture's attribute map when the effect is created, and every slot of the effect is calculated in one pass each frame
+class Effect:
+        waveforms = ('sine', 'square', 'sawtooth', 'random')
+
+        def __init__(self, name, fixtures, attribute, waveform='sine', rate=1.0, low=0, high=255, phaseSpread=360, phaseOffset=0, fan=0):
+                waveform = waveform.lower()
+                if waveform not in self.waveforms:
+                        raise ValueError(f'Waveform must be one of {", ".join(self.waveforms)}')
+                if rate <= 0:
+                        raise ValueError('Effect rate must be larger than 0')
+                if not (0 <= low <= 255 and 0 <= high <= 255):
+                        raise ValueError('Effect low and high values must be between 0-255')
+                fixtures = [fixture for fixture in fixtures if fixture.hasAttribute(attribute)]
+                if len(fixtures) == 0:
+                        raise IndexError(f'No fixtures in the effect have attribute {attribute.lower()}')
+                self.name = name
+                self.attribute = attribute
+                self.waveform = waveform
+                self.rate = rate #Cycles per second
+                self.low = low
+                self.high = high
+                self.startTime = time.monotonic()
+                #One entry per slot, grouped by universe. Fixtures with a fine channel also get the fractional part of their value written to it
+                entries = []
+                count = len(fixtures)
+                for position, fixture in enumerate(fixtures):
+                        phase = (phaseOffset + phaseSpread * position / count) / 360
+                        fanOffset = fan * (2 * position / (count - 1) - 1) if count > 1 else 0 #-fan for the first fixture to +fan for the last
+                        fineOffset = fixture.fineMap.get(attribute.lower())
+                        fineSlot = -1 if fineOffset is None else fixture.address - 1 + fineOffset
+                        for offset in fixture.attributeMap[attribute.lower()]:
+                                entries.append((fixture.universe, fixture.address - 1 + offset, fineSlot, phase, fanOffset, position))
+                entries.sort(key=lambda entry: entry[0])
+                self.segments = {} #Universe -> (first, last) position of its slots in the arrays below
+                for index, entry in enumerate(entries):
+                        first, last = self.segments.get(entry[0], (index, index))
+                        self.segments[entry[0]] = (first, index + 1)
+                columns = list(zip(*entries))
+                if np is not None:
+                        self.slotIndices = np.array(columns[1], dtype=np.intp)
+                        self.fineSlots = np.array(columns[2], dtype=np.intp)
+                        self.phases = np.array(columns[3], dtype=np.float64)
+                        self.fans = np.array(columns[4], dtype=np.float64)
+                        self.seeds = np.array(columns[5], dtype=np.float64)
+                else:
+                        self.slotIndices, self.fineSlots, self.phases, self.fans, self.seeds = [list(column) for column in columns[1:]]
+
+        def getUniverses(self):
+                return list(self.segments.keys())
+
+        def getSlots(self, universe): #Coarse and fine slots this effect writes in a universe
+                first, last = self.segments[universe]
+                return [int(slot) for slot in self.slotIndices[first:last]] + [int(slot) for slot in self.fineSlots[first:last] if slot >= 0]
+
+        #Value of every slot of the effect, from 0-255 with a fractional part for fine channels, at a time in seconds since the effect started
+        def values(self, elapsed):
+                if np is not None:
+                        position = elapsed * self.rate + self.phases
+                        cycle = position % 1
+                        if self.waveform == 'sine':
+                                wave = 0.5 + 0.5 * np.sin(2 * math.pi * cycle)
+                        elif self.waveform == 'square':
+                                wave = (cycle < 0.5).astype(np.float64)
+                        elif self.waveform == 'sawtooth':
+                                wave = cycle
+                        else: #A new random level every cycle, the same for every slot of a fixture
+                                wave = np.abs(np.modf(np.sin(np.floor(position) * 12.9898 + (self.seeds + 1) * 78.233) * 43758.5453)[0])
+                        return np.clip(self.low + (self.high - self.low) * wave + self.fans, 0, 255)
+                values = []
+                for phase, fanOffset, seed in zip(self.phases, self.fans, self.seeds):
+                        position = elapsed * self.rate + phase
+                        cycle = position % 1
+                        if self.waveform == 'sine':
+                                wave = 0.5 + 0.5 * math.sin(2 * math.pi * cycle)
+                        elif self.waveform == 'square':
+                                wave = 1.0 if cycle < 0.5 else 0.0
+                        elif self.waveform == 'sawtooth':
+                                wave = cycle
+                        else:
+                                wave = abs(math.modf(math.sin(math.floor(position) * 12.9898 + (seed + 1) * 78.233) * 43758.5453)[0])
+                        values.append(min(max(self.low + (self.high - self.low) * wave + fanOffset, 0), 255))
+                return values
+
+        #Writes the effect at a time in seconds since it started into data, the same way Fixture.setAttribute does
+        def apply(self, data, elapsed):
+                values = self.values(elapsed)
+                if np is not None:
+                        coarse = np.floor(values)
+                        fine = np.floor((values - coarse) * 256).astype(np.uint8)
+                        coarse = coarse.astype(np.uint8)
+                        for universe, (first, last) in self.segments.items():
+                                slots = np.frombuffer(data[universe], dtype=np.uint8)
+                                slots[self.slotIndices[first:last]] = coarse[first:last]
+                                fineSlots = self.fineSlots[first:last]
+                                hasFine = fineSlots >= 0
+                                slots[fineSlots[hasFine]] = fine[first:last][hasFine]
+                                data.markChanged(universe, np.concatenate((self.slotIndices[first:last], fineSlots[hasFine])))
+                        return data
+                for universe, (first, last) in self.segments.items():
+                        slots = data[universe]
+                        for position in range(first, last):
+                                value = values[position]
+                                slots[self.slotIndices[position]] = math.floor(value)
+                                if self.fineSlots[position] >= 0:
+                                        slots[self.fineSlots[position]] = math.floor((value - math.floor(value)) * 256)
+                        data.markChanged(universe, self.getSlots(universe))
+                return data
+
+#Runs effects on the output clock. Every effect writes to one merge layer, so intensity effects merge HTP with playback and position effects take over LTP
+class EffectsEngine:
+        def __init__(self, mergeEngine):
+                self.layer = mergeEngine.getLayer('Effects')
+                self.effects = {} #Name -> Effect
+                self.lock = threading.Lock()
+
+        def addEffect(self, effect): #Starts an effect, replacing any effect with the same name
+                with self.lock:
+                        effect.startTime = time.monotonic()
+                        self.effects[effect.name] = effect
+
+        def removeEffect(self, name):
+                with self.lock:
+                        if name not in self.effects:
+                                raise KeyError(f'There is no effect called {name}')
+                        del self.effects[name]
+                        #The remaining effects write their slots again on the next tick, before the layers are merged
+                        self.layer.release()
+
+        def clearEffects(self):
+                with self.lock:
+                        self.effects = {}
+                        self.layer.release()
+
+        def getEffects(self):
+                return list(self.effects.keys())
+
+        def tick(self, now=None):
+                if now is None:
+                        now = time.monotonic()
+                with self.lock:
+                        for effect in self.effects.values():
+                                effect.apply(self.layer, now - effect.startTime)
+
+#The output clock. Runs on its own thread and ticks at a fixed refresh rate on an absolute deadline clock, so compute and transmit time never add up into drift.
+#Each tick advances the fades of every playback together and the running effects, then merges and sends every universe changed since the last tick.
+#UI edits only mark their layer changed, so a burst of edits becomes a single frame and the UI never waits on output
+class PlaybackEngine(QObject):
+        fadeProgress = pyqtSignal(str, object, float) #Playback name, cue ID and fraction of the fade complete
+        fadeFinished = pyqtSignal(str, object) #Playback name and cue ID
+        tickFailed = pyqtSignal(str) #Error raised by a tick, the output carries on with the next tick
+
+        def __init__(self, cueManager, rate=50, mergeEngine=None):
+                super().__init__()
+                self.rate = rate
+                self.mergeEngine = mergeEngine if mergeEngine is not None else MergeEngine()
+                self.effectsEngine = EffectsEngine(self.mergeEngine)
+                self.outputFrame = Frame() #The frame currently on stage, merged from every layer
+                self.playbacks = {} #Name -> Playback
+                self.batch = None #Fades calculated together on each tick, rebuilt when a fade starts or finishes
+                self.running = False
+                self.thread = None
+                self.lock = threading.Lock()
+                self.wake = threading.Event()
+                self.lastError = None #Only a new error is reported, so one failing every tick does not flood the log
+                self.cueManager = cueManager
+                self.playbackLayer = self.addPlayback('Main', cueManager).layer #Fades and loaded cues of the main stack are written here
+
+        def setRate(self, rate):
+                if rate <= 0:
+                        raise ValueError('Refresh rate must be larger than 0')
+                self.rate = rate
+
+        #Adds a cue stack with its own GO. An existing playback with the same name is returned instead
+        def addPlayback(self, name, cueManager=None):
+                with self.lock:
+                        if name not in self.playbacks:
+                                if cueManager is None:
+                                        cueManager = CueManager()
+                                self.playbacks[name] = Playback(name, cueManager, self.mergeEngine.getLayer(f'Playback: {name}'))
+                        return self.playbacks[name]
+
+        def getPlayback(self, name):
+                if name not in self.playbacks:
+                        raise KeyError(f'There is no playback called {name}')
+                return self.playbacks[name]
+
+        def getPlaybacks(self):
+                return list(self.playbacks.keys())
+
+        def start(self):
+                if self.running:
+                        return
+                self.running = True
+                self.thread = threading.Thread(target=self.run, name='PlaybackEngine', daemon=True)
+                self.thread.start()
+
+        def stop(self):
+                self.running = False
+                self.wake.set()
+                if self.thread is not None:
+                        self.thread.join()
+                        self.thread = None
+
+        def isFading(self, name=None): #Whether a playback is fading, or any playback if no name is given
+                if name is None:
+                        return any(playback.fade is not None for playback in list(self.playbacks.values()))
+                return self.getPlayback(name).fade is not None
+
+        #Starts a fade between two frames on a playback, using a cached transition if one is given.
+        #If that playback is already fading, the new fade starts from the values it currently has on stage instead
+        def startFade(self, startFrame, endFrame, fadeIn, fadeOut, cueID=None, transition=None, playback='Main'):
+                playback = self.getPlayback(playback)
+                with self.lock:
+                        if playback.fade is not None:
+                                startFrame = playback.layer.copy()
+                                transition = None
+                        else:
+                                playback.layer.load(startFrame)
+                        if transition is None:
+                                transition = CueTransition(startFrame, endFrame)
+                        playback.fade = ActiveFade(cueID, transition, fadeIn, fadeOut, self.rate)
+                self.wake.set() #Start the fade on the next tick rather than waiting for the clock
+
+        #Puts a frame on stage straight away, stopping any fade running on that playback
+        def loadFrame(self, frame, playback='Main'):
+                playback = self.getPlayback(playback)
+                with self.lock:
+                        playback.fade = None
+                        playback.layer.load(frame)
+
+        def run(self):
+                nextTick = time.monotonic()
+                while self.running:
+                        #Wait for the absolute deadline of this tick, waking early if a new fade is started
+                        waitTime = nextTick - time.monotonic()
+                        if waitTime > 0 and self.wake.wait(waitTime):
+                                self.wake.clear()
+                        if not self.running:
+                                break
+                        #An error must not end the thread, or the output would freeze on the last frame sent
+                        try:
+                                self.tick()
+                                self.lastError = None
+                        except Exception as error:
+                                message = f'Output error: {error!r}'
+                                if message != self.lastError:
+                                        self.lastError = message
+                                        traceback.print_exc()
+                                        self.tickFailed.emit(message)
+                        nextTick += 1 / self.rate
+                        #If the thread fell behind, skip the ticks that were missed rather than sending them late
+                        now = time.monotonic()
+                        if nextTick < now:
+                                nextTick += math.ceil((now - nextTick) * self.rate) / self.rate
+
+        def tick(self):
+                finished = []
+                progress = []
+                with self.lock:
+                        now = time.monotonic()
+                        fading = []
+                        factors = []
+                        for playback in self.playbacks.values():
+                                fade = playback.fade
+                                if fade is None:
+                                        continue
+                                #Fades are timed from their own start, so the step on stage is always the one due now
+                                step = math.floor((now - fade.startTime) * self.rate)
+                                if step >= fade.maxSteps:
+                                        fade.transition.applyFinal(playback.layer)
+                                        playback.fade = None
+                                        finished.append((playback.name, fade.cueID))
+                                else:
+                                        fading.append(playback)
+                                        factors.append(self.cueManager.fadeFactors(self.rate, step, fade.fadeIn, fade.fadeOut))
+                                        progress.append((playback.name, fade.cueID, step / fade.maxSteps))
+                                for universe in fade.transition.getUniverses():
+                                        playback.layer.markChanged(universe, fade.transition.getSlots(universe))
+                        if fading:
+                                #Only the slots the running fades change are calculated, all in one pass
+                                if self.batch is None or self.batch.fades != [playback.fade for playback in fading]:
+                                        self.batch = FadeBatch(fading)
+                                self.batch.apply(factors)
+                        else:
+                                self.batch = None
+                self.effectsEngine.tick()
+                #Only universes changed since the last tick are merged and sent
+                dirty = self.mergeEngine.merge(self.outputFrame)
+                if dirty:
+                        sendOLA(self.outputFrame, dirty)
+                for name, cueID in finished:
+                        self.fadeFinished.emit(name, cueID)
+                for name, cueID, fraction in progress:
+                        self.fadeProgress.emit(name, cueID, fraction)
+
+#Used to store fixtures and call some functions
+#As well as the fixtures by control channel, an index of the slots each fixture occupies is kept per universe.
+#Footprints never overlap, so the start addresses and end addresses are both sorted and slot lookups are a binary search
 class FixtureManager:
         def __init__(self):
                 self.fixtureList = {}
+                self.patchVersion = 0 #Increased whenever the patch changes
+                self.addressStarts = {} #Universe -> sorted first addresses of patched fixtures
+                self.addressFixtures = {} #Universe -> fixtures in the same order as addressStarts
+                self.listeners = [] #Called with an event name and its arguments whenever the patch changes, see ShowJournal
+
+        def addListener(self, listener):
+                self.listeners.append(listener)
+
+        def notify(self, event, *args):
+                for listener in self.listeners:
+                        listener(event, *args)
 
         def addFixture(self, newFixture):
+                first, last = newFixture.getFootprint()
+                replacing = self.fixtureList.get(newFixture.channelNum)
+                overlaps = [fixture for fixture in self.getFixturesInRange(newFixture.universe, first, last) if fixture is not replacing]
+                if overlaps:
+                        raise PatchError(
+                                f'Addresses {newFixture.universe}/{first}-{last} overlap ' +
+                                ', '.join(f'channel {fixture.channelNum} ({fixture.type} at {fixture.universe}/{fixture.address})' for fixture in overlaps)
+                                )
+                if replacing is not None:
+                        self.removeFixture(replacing.channelNum)
                 self.fixtureList[newFixture.channelNum] = newFixture 
+                self.indexFixture(newFixture)
+                self.patchVersion += 1
+                self.notify('fixtures', [newFixture])
+
+        def removeFixture(self, channelNum):
+                fixture = self.fixtureList.pop(channelNum)
+                self.patchVersion += 1
+                starts = self.addressStarts.get(fixture.universe, [])
+                fixtures = self.addressFixtures.get(fixture.universe, [])
+                position = bisect_left(starts, fixture.address)
+                if position < len(fixtures) and fixtures[position] is fixture:
+                        del starts[position]
+                        del fixtures[position]
+                self.notify('removeFixture', channelNum)
+                return fixture
+
+        def indexFixture(self, fixture):
+                starts = self.addressStarts.setdefault(fixture.universe, [])
+                fixtures = self.addressFixtures.setdefault(fixture.universe, [])
+                position = bisect_left(starts, fixture.address)
+                starts.insert(position, fixture.address)
+                fixtures.insert(position, fixture)
+
+        #Patches count units of one fixture type in one go. Units start at DMXAddress and are stride slots apart (the fixture footprint by default),
+        #on consecutive channels from channelNum. Units that run past the end of a universe continue from address 1 of the next universe if wrap is set.
+        #The whole range is checked against the address index before anything is patched, so either every unit is patched or none are. Returns the new fixtures
+        def patchRange(self, fixType, attributes, count, DMXAddress, channelNum, universe=1, stride=None, wrap=True):
+                profile = attributes if isinstance(attributes, FixtureProfile) else FixtureProfile(fixType, attributes)
+                footprint = max(len(profile.attributes), 1)
+                if stride is None:
+                        stride = footprint
+                if count < 1:
+                        raise ValueError('Quantity must be 1 or larger')
+                if stride < footprint:
+                        raise ValueError(f'Stride must be at least the {footprint} slots {fixType} occupies')
+                if DMXAddress < 1 or DMXAddress + footprint - 1 > universeSize:
+                        raise ValueError(f'{fixType} needs {footprint} slots and does not fit in the universe at address {DMXAddress}')
+                newFixtures = []
+                address = DMXAddress
+                for unit in range(count):
+                        if address + footprint - 1 > universeSize:
+                                if not wrap:
+                                        raise ValueError(f'Only {unit} units of {fixType} fit in universe {universe} from address {DMXAddress}')
+                                universe += 1
+                                address = 1
+                        newFixtures.append(Fixture(fixType, profile, address, channelNum + unit, universe))
+                        address += stride
+                #Units never overlap each other, so only overlaps with fixtures that are not being replaced need checking
+                replacing = {self.fixtureList[fixture.channelNum] for fixture in newFixtures if fixture.channelNum in self.fixtureList}
+                overlaps = []
+                for fixture in newFixtures:
+                        first, last = fixture.getFootprint()
+                        overlaps.extend((fixture, existing) for existing in self.getFixturesInRange(fixture.universe, first, last) if existing not in replacing)
+                if overlaps:
+                        raise PatchError(
+                                f'{len(overlaps)} of the units would overlap patched fixtures, first channel {overlaps[0][0].channelNum} at ' +
+                                f'{overlaps[0][0].universe}/{overlaps[0][0].address} overlaps channel {overlaps[0][1].channelNum} ' +
+                                f'({overlaps[0][1].type} at {overlaps[0][1].universe}/{overlaps[0][1].address})'
+                                )
+                for fixture in replacing:
+                        self.removeFixture(fixture.channelNum)
+                #Each universe's index is rebuilt with one merge, rather than inserting units one at a time
+                byUniverse = {}
+                for fixture in newFixtures:
+                        self.fixtureList[fixture.channelNum] = fixture
+                        byUniverse.setdefault(fixture.universe, []).append(fixture)
+                for universeNum, fixtures in byUniverse.items():
+                        merged = sorted(self.addressFixtures.get(universeNum, []) + fixtures, key=lambda fixture: fixture.address)
+                        self.addressFixtures[universeNum] = merged
+                        self.addressStarts[universeNum] = [fixture.address for fixture in merged]
+                self.patchVersion += 1
+                self.notify('fixtures', newFixtures)
+                return newFixtures
+
+        #Replaces all fixtures, used when loading a show. Fixtures that overlap an earlier one are kept but left out of the address index, and are returned so they can be reported
+        def setFixtureList(self, fixtureList):
+                self.fixtureList = fixtureList
+                self.patchVersion += 1
+                self.addressStarts = {}
+                self.addressFixtures = {}
+                conflicts = []
+                for channelNum in sorted(fixtureList.keys()):
+                        fixture = fixtureList[channelNum]
+                        first, last = fixture.getFootprint()
+                        if self.getFixturesInRange(fixture.universe, first, last):
+                                conflicts.append(fixture)
+                        else:
+                                self.indexFixture(fixture)
+                self.notify('reset')
+                return conflicts
 
         def getFixtureList(self):
                return self.fixtureList
 
+        def getUniverses(self): #Universes that have at least one fixture patched
+                return sorted(universe for universe, fixtures in self.addressFixtures.items() if fixtures)
+
+        def getUniverseFixtures(self, universe): #Fixtures in a universe in address order
+                return list(self.addressFixtures.get(universe, []))
+
+        #Returns the fixture occupying an address (1-512), or None if the address is free
+        def getFixtureAt(self, universe, address):
+                position = bisect_right(self.addressStarts.get(universe, []), address) - 1
+                if position < 0:
+                        return None
+                fixture = self.addressFixtures[universe][position]
+                if fixture.getFootprint()[1] < address:
+                        return None
+                return fixture
+
+        #Returns the fixtures occupying any address from first to last inclusive, in address order
+        def getFixturesInRange(self, universe, first, last):
+                starts = self.addressStarts.get(universe, [])
+                fixtures = self.addressFixtures.get(universe, [])
+                #Only the fixture starting before first can reach into the range from below
+                position = max(bisect_right(starts, first) - 1, 0)
+                end = bisect_right(starts, last)
+                return [fixture for fixture in fixtures[position:end] if fixture.getFootprint()[1] >= first]
+
+#The attributes of a fixture type and mode, with the map of attribute name to slot offsets built once.
+#Profiles are never changed after they are made, so every fixture of the same type shares one
+class FixtureProfile:
+        def __init__(self, name, attributes):
+                self.name = name
+                self.attributes = tuple(attributes)
+                attributeMap = {}
+                for offset, entry in enumerate(self.attributes):
+                        #Some fixtures have null values (or matrix entries) in attributes. These still take up a slot but cannot be set by name
+                        if isinstance(entry, str):
+                                attributeMap.setdefault(entry.lower(), []).append(offset)
+                #Attributes listed more than once are written to every slot they occupy
+                self.attributeMap = {name: tuple(offsets) for name, offsets in attributeMap.items()}
+                #16-bit attributes have a coarse channel followed by a fine channel, i.e. 'Pan' and 'Pan fine'
+                self.fineMap = {}
+                for name, offsets in self.attributeMap.items():
+                        if name.endswith(' fine') and name[:-5] in self.attributeMap:
+                                self.fineMap[name[:-5]] = offsets[0]
+
+        def __repr__(self):
+                return f'FixtureProfile({self.name!r}, {list(self.attributes)!r})'
+
 #Used to contain information about a device on a network. 
+#attributes can be a FixtureProfile shared with other fixtures of the same type, or a list of attribute names
 class Fixture:
-    def __init__(self, fixType, attributes, DMXAddress, channelNum):
+    def __init__(self, fixType, attributes, DMXAddress, channelNum, universe=1):
         self.type = fixType
-        self.attributes = attributes
+        self.profile = attributes if isinstance(attributes, FixtureProfile) else FixtureProfile(fixType, attributes)
         self.address = int(DMXAddress)
         self.channelNum = int(channelNum)
-        
+        self.universe = int(universe)
+
+    def __setstate__(self, state): #Fixtures saved before multiple universes or shared profiles were supported are upgraded
+        state = dict(state)
+        state.setdefault('universe', 1)
+        if 'profile' not in state:
+                state['profile'] = FixtureProfile(state['type'], state.pop('attributes'))
+                state.pop('attributeMap', None)
+                state.pop('fineMap', None)
+        self.__dict__.update(state)
+
+    #The attribute list and the maps of attribute name to slot offsets come from the shared profile
+    @property
+    def attributes(self):
+        return self.profile.attributes
+
+    @property
+    def attributeMap(self):
+        return self.profile.attributeMap
+
+    @property
+    def fineMap(self):
+        return self.profile.fineMap
+
+    def getFootprint(self): #First and last address occupied by the fixture
+        return self.address, self.address + max(len(self.attributes), 1) - 1
+
+    def hasAttribute(self, attribute):
+        return attribute.lower() in self.attributeMap
+
+    def getSlot(self, attribute): #The index in the fixture's universe of the (first) slot of an attribute
+        offsets = self.attributeMap.get(attribute.lower())
+        if offsets is None:
+                 raise IndexError(f'Fixture does not have attribute {attribute.lower()}')
+        #DMX addressing starts from 1, 1 must be subtracted for the index
+        return self.address - 1 + offsets[0]
+
+    def getAttribute(self, data, attribute):
+        return data[self.universe][self.getSlot(attribute)]
+
     def setAttribute(self, data, attribute, attributeValue):
         #Account for letter case of user input
-        attribute = attribute.lower()
-        attributesCopy = []
-        for entry in self.attributes:
-                if isinstance(entry,str) is True and entry not in attributesCopy: # Assuming 8-bit resolution and no duplicates
-                        attributesCopy.append(entry)
-                if entry is None: # Some fixtures have null values in attributes
-                        attributesCopy.append('Empty')
-        attributesCopy = [x.lower() for x in attributesCopy]
-        if attribute not in attributesCopy:
-                 raise IndexError(f'Fixture does not have attribute {attribute}')
-        #Sets appropriate slot to new value
-        #DMX addressing starts from 1, 1 must be subtracted for the index
-        data[self.address - 1 + attributesCopy.index(attribute)] = attributeValue
+        offsets = self.attributeMap.get(attribute.lower())
+        if offsets is None:
+                 raise IndexError(f'Fixture does not have attribute {attribute.lower()}')
+        #Sets appropriate slots to new value
+        slots = data[self.universe]
+        for offset in offsets:
+                slots[self.address - 1 + offset] = attributeValue
+        data.markChanged(self.universe, [self.address - 1 + offset for offset in offsets])
+        return data
+
+    #Sets a 16-bit value (0-65535) across the coarse and fine channels of an attribute. Fixtures without a fine channel only get the coarse value
+    def setAttribute16(self, data, attribute, attributeValue):
+        self.setAttribute(data, attribute, attributeValue >> 8)
+        fineOffset = self.fineMap.get(attribute.lower())
+        if fineOffset is not None:
+                data[self.universe][self.address - 1 + fineOffset] = attributeValue & 0xFF
+                data.markChanged(self.universe, [self.address - 1 + fineOffset])
         return data
 
+#Base class for output transports. Frames are handed over with send() and transmitted in the background, so callers never wait on the network.
+#The last frame sent to each universe is remembered, so a frame identical to it is not sent again unless a keep-alive is due.
+#keepAlive() resends unchanged universes at a low rate so receivers never time out
+class DMXTransport:
+        def __init__(self, keepAliveInterval=1.0):
+                self.keepAliveInterval = keepAliveInterval #Seconds an unchanged universe can go without being sent
+                self.lastFrames = {} #Universe -> last frame passed on for transmission
+                self.lastSendTimes = {} #Universe -> time that frame was passed on
+                self.lock = threading.Lock()
+                self.framesQueued = 0 #Frames handed to send()
+                self.framesSuppressed = 0 #Frames not sent because they matched the last frame sent
+                self.keepAlivesSent = 0 #Unchanged frames resent by keepAlive()
+                self.framesSent = 0 #Frames confirmed as transmitted
+                self.framesFailed = 0 #Frames that were rejected or could not be sent
+                self.framesDropped = 0 #Frames replaced by a newer frame before they were transmitted
+                self.lastError = None
+
+        def start(self):
+                pass
+
+        def stop(self):
+                pass
+
+        def send(self, universe, frame):
+                frame = array('B', frame) #Copy, the caller keeps editing its own frame
+                now = time.monotonic()
+                with self.lock:
+                        self.framesQueued += 1
+                        if frame == self.lastFrames.get(universe) and now - self.lastSendTimes[universe] < self.keepAliveInterval:
+                                self.framesSuppressed += 1
+                                return
+                        self.lastFrames[universe] = frame
+                        self.lastSendTimes[universe] = now
+                self.queueFrame(universe, frame)
+
+        #Resends every universe that has not been sent for a keep-alive interval
+        def keepAlive(self):
+                now = time.monotonic()
+                with self.lock:
+                        stale = [universe for universe, sendTime in self.lastSendTimes.items() if now - sendTime >= self.keepAliveInterval]
+                        for universe in stale:
+                                self.lastSendTimes[universe] = now
+                        self.keepAlivesSent += len(stale)
+                for universe in stale:
+                        self.queueFrame(universe, self.lastFrames[universe])
+
+        def queueFrame(self, universe, frame): #Implemented by each transport to transmit a frame
+                raise NotImplementedError
+
+        def getStats(self): #Counters are updated on the transport's own thread, so they are read under the lock
+                with self.lock:
+                        return {
+                                'queued' : self.framesQueued,
+                                'suppressed' : self.framesSuppressed,
+                                'keepAlives' : self.keepAlivesSent,
+                                'sent' : self.framesSent,
+                                'failed' : self.framesFailed,
+                                'dropped' : self.framesDropped,
+                                'lastError' : self.lastError
+                        }
+
+#Prints frames instead of transmitting them, used where OLA is not available
+class PrintTransport(DMXTransport):
+        def queueFrame(self, universe, frame):
+                print(universe, frame)
+                with self.lock:
+                        self.framesSent += 1
+
+#A frame as handed to the OLA client. Older OLA clients read frames with array.tostring, which Python 3.9 removed
+class OLAFrame(array):
+        def tostring(self):
+                return self.tobytes()
+
+#Holds one long-lived connection to olad, with the OLA event loop running on its own thread.
+#Only the newest frame for each universe is kept while a transmission is in flight, so throughput is limited by DMX rather than by round trips
+#Adapted from code at https://github.com/OpenLightingProject/ola/blob/master/python/examples/ola_send_dmx.py
+class OLATransport(DMXTransport):
+        def __init__(self, host='localhost', port=9010, keepAliveInterval=1.0, reconnectInterval=2.0):
+                super().__init__(keepAliveInterval)
+                self.host = host
+                self.port = port
+                self.reconnectInterval = reconnectInterval #Seconds between attempts to reach olad while it is not connected
+                self.loop = None #OLA's select server, which runs on self.thread while connected
+                self.client = None
+                self.connection = None
+                self.thread = None
+                self.stopped = True
+                self.connecting = False
+                self.lastAttempt = None #When a connection was last tried
+                self.pending = {} #Universe -> newest frame waiting to be transmitted
+                self.inFlight = set() #Universes with a transmission awaiting its reply
+
+        def start(self):
+                self.stopped = False
+                self.connect()
+
+        #Connects to olad and starts the OLA event loop. If olad cannot be reached frames are counted as failed,
+        #and queueFrame tries again in the background every reconnectInterval until it can
+        def connect(self):
+                #OLA is imported here so the rest of the application can run on machines without it
+                from ola.ClientWrapper import SelectServer
+                from ola.OlaClient import OlaClient
+                with self.lock:
+                        self.lastAttempt = time.monotonic()
+                try:
+                        connection = socket.create_connection((self.host, self.port), timeout=self.reconnectInterval)
+                except OSError as e:
+                        with self.lock:
+                                self.lastError = f'Could not connect to olad at {self.host}:{self.port}: {e}'
+                        return False
+                connection.settimeout(None)
+                ready = threading.Event()
+                thread = threading.Thread(target=self.run, args=(SelectServer, OlaClient, connection, ready), name='OLATransport', daemon=True)
+                thread.start()
+                ready.wait()
+                self.thread = thread
+                return self.loop is not None
+
+        #Runs the OLA event loop. A select server only runs on the thread that created it, so it is made here
+        def run(self, SelectServer, OlaClient, connection, ready):
+                try:
+                        loop = SelectServer()
+                        client = OlaClient(connection, lambda: self.connectionLost(loop, 'olad closed the connection'))
+                        loop.AddReadDescriptor(connection, client.SocketReady)
+                        loop.AddEvent(self.keepAliveCheckMs(), lambda: self.keepAliveTick(loop))
+                        with self.lock:
+                                self.loop, self.client, self.connection = loop, client, connection
+                                self.lastError = None
+                finally:
+                        ready.set()
+                loop.Run()
+
+        #Connects again on a background thread, so the playback thread never waits on the network
+        def reconnect(self):
+                with self.lock:
+                        if self.stopped or self.connecting or self.loop is not None or time.monotonic() - self.lastAttempt < self.reconnectInterval:
+                                return
+                        self.connecting = True
+                threading.Thread(target=self.reconnectThread, name='OLAReconnect', daemon=True).start()
+
+        def reconnectThread(self):
+                try:
+                        self.connect()
+                finally:
+                        with self.lock:
+                                self.connecting = False
+
+        def keepAliveCheckMs(self): #Checked twice per interval so no universe goes much longer than the interval
+                return max(int(self.keepAliveInterval * 500), 1)
+
+        #Runs on the OLA thread
+        def keepAliveTick(self, loop):
+                if self.loop is loop:
+                        self.keepAlive()
+                        loop.AddEvent(self.keepAliveCheckMs(), lambda: self.keepAliveTick(loop))
+
+        def stop(self):
+                with self.lock:
+                        self.stopped = True
+                        loop, connection, thread = self.loop, self.connection, self.thread
+                        self.loop, self.client, self.connection = None, None, None
+                if loop is not None:
+                        loop.Terminate() #Stops from inside the loop so it wakes up
+                        thread.join(timeout=1)
+                        connection.close()
+
+        def queueFrame(self, universe, frame):
+                with self.lock:
+                        if universe in self.pending:
+                                self.framesDropped += 1
+                        self.pending[universe] = frame
+                        if universe in self.inFlight:
+                                return #Sent once the current transmission completes
+                        self.inFlight.add(universe)
+                        loop = self.loop
+                if loop is None:
+                        self.transmitFailed(universe)
+                        self.reconnect()
+                        return
+                loop.Execute(lambda: self.transmit(universe))
+
+        #Runs on the OLA thread
+        def transmit(self, universe):
+                with self.lock:
+                        frame = self.pending.pop(universe, None)
+                        if frame is None:
+                                self.inFlight.discard(universe)
+                                return
+                        client, loop = self.client, self.loop
+                if client is None:
+                        self.transmitFailed(universe)
+                        return
+                try:
+                        sent = client.SendDmx(universe, OLAFrame('B', frame), lambda status: self.dmxSent(universe, status))
+                except Exception: #The OLA client raises its own error types when the socket fails
+                        sent = False
+                if not sent:
+                        self.connectionLost(loop, 'Lost connection to olad')
+
+        #Runs on the OLA thread when olad replies to a frame
+        def dmxSent(self, universe, status):
+                with self.lock:
+                        if status.Succeeded():
+                                self.framesSent += 1
+                        else:
+                                self.framesFailed += 1
+                                self.lastError = status.message
+                self.transmitNext(universe)
+
+        #Counts a frame that could not be sent. The last error is kept, it says why
+        def transmitFailed(self, universe):
+                with self.lock:
+                        self.framesFailed += 1
+                        if self.lastError is None:
+                                self.lastError = 'OLA transport is not connected'
+                        self.pending.pop(universe, None)
+                        self.inFlight.discard(universe)
+
+        #Runs on the OLA thread. Frames awaiting a reply will not get one and count as failed, the next frame queued starts a reconnect
+        def connectionLost(self, loop, message):
+                with self.lock:
+                        if self.loop is not loop:
+                                return
+                        connection = self.connection
+                        self.loop, self.client, self.connection = None, None, None
+                        self.framesFailed += len(self.inFlight)
+                        self.lastError = message
+                        self.pending.clear()
+                        self.inFlight.clear()
+                loop.Terminate()
+                connection.close()
+
+        #Sends the newest frame that arrived while the last one was in flight
+        def transmitNext(self, universe):
+                with self.lock:
+                        if universe not in self.pending:
+                                self.inFlight.discard(universe)
+                                return
+                self.transmit(universe)
+
+#Where fixture profiles are synced from. {path} is a path in the repository such as fixtures/generic/desk-channel.json
+OFLTreeURL = 'https://api.github.com/repos/OpenLightingProject/open-fixture-library/git/trees/master?recursive=1'
+OFLRawURL = 'https://raw.githubusercontent.com/OpenLightingProject/open-fixture-library/master/{path}'
+
+#Whether a repository path is a fixture file. Fixtures are inside a manufacturer folder, manufacturers.json and other top level files are not
+def isFixturePath(path):
+        parts = path.split('/')
+        return len(parts) == 3 and parts[0] == 'fixtures' and parts[2].endswith('.json')
+
+#Turns one open-fixture-library fixture file into (fixture - mode name, model, mode, channels JSON) rows. Files that only redirect to another fixture have no rows.
+#The git blob SHA of the file is returned too, so a later sync can tell whether the file changed. Module level so it can be run in a process pool
+def parseFixtureProfile(fixtureData):
+        path, data = fixtureData
+        sha = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+        folder = path.split('/')[1]
+        fixDict = json.loads(data)
+        if 'redirectTo' in fixDict:
+                rows = []
+        elif 'modes' in fixDict:
+                rows = [(fixDict['name'] + ' - ' + fixMode['name'], fixDict['name'], fixMode['name'], json.dumps(fixMode['channels'])) for fixMode in fixDict['modes']]
+        else:
+                rows = [(fixDict['name'], fixDict['name'], None, json.dumps(fixDict['channels']))]
+        return path, sha, folder, rows
+
+def readFixtureFile(path): #Reads and parses a fixture file from a local checkout
+        path = Path(path)
+        return parseFixtureProfile((f'fixtures/{path.parent.name}/{path.name}', path.read_bytes()))
+
+#The fixture profile database. Profiles can be imported from a local clone or tarball of open-fixture-library,
+#which is parsed in a process pool and written with batched inserts in a single transaction.
+#The path and git blob SHA of every source file is kept, so a sync only downloads the files that changed since the last import or sync
+class FixtureDB:
+        def __init__(self, path, treeURL=OFLTreeURL, rawURL=OFLRawURL, profileCacheSize=128):
+                self.path = path
+                self.treeURL = treeURL
+                self.rawURL = rawURL
+                self.conn = None #Long-lived connection for lookups from the UI thread
+                self.profileCache = OrderedDict() #Fixture name -> FixtureProfile, least recently used first
+                self.profileCacheSize = profileCacheSize
+                self.cacheLock = threading.Lock()
+                self.cacheVersion = 0 #Increased whenever profiles are written, so a lookup that overlapped a write is not cached
+
+        #Version of the database layout, stored in PRAGMA user_version. Older databases are migrated when they are opened
+        schemaVersion = 2
+
+        #Opens a new connection. Imports and syncs use their own, lookups from the UI share the one from getConnection
+        def connect(self):
+                conn = sqlite3.connect(self.path, cached_statements=256)
+                #WAL lets the UI read profiles while an import or sync is writing
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA foreign_keys=ON')
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                if version < self.schemaVersion:
+                        #The whole migration is one transaction, so a failed upgrade leaves the old layout untouched
+                        conn.execute('BEGIN IMMEDIATE')
+                        try:
+                                self.migrate(conn.cursor(), version)
+                                conn.commit()
+                        except sqlite3.Error:
+                                conn.rollback()
+                                conn.close()
+                                raise
+                return conn
+
+        #Version 0 is the original layout: fixtures (fixName, channels) and manufacturers (man, fixName) with no keys or indexes, and a source column on databases that have been synced.
+        #Version 1 keeps profiles keyed by name with a foreign key to their maker. fixtures and manufacturers become views, so queries written for the old layout still work.
+        #Version 2 adds profileSearch, a full-text index of maker, model and mode kept up to date by triggers on profiles
+        def migrate(self, cur, version):
+                if version < 1:
+                        cur.execute('''CREATE TABLE makers
+                                    (id INTEGER PRIMARY KEY , name TEXT NOT NULL UNIQUE)''')
+                        cur.execute('''CREATE TABLE profiles
+                                    (id INTEGER PRIMARY KEY , fixName TEXT NOT NULL UNIQUE , makerID INTEGER REFERENCES makers (id) ,
+                                    model TEXT , mode TEXT , channels TEXT NOT NULL , source TEXT)''')
+                        cur.execute('CREATE INDEX profilesMaker ON profiles (makerID)')
+                        cur.execute('CREATE INDEX profilesSource ON profiles (source)')
+                        cur.execute('''CREATE TABLE IF NOT EXISTS sources
+                                    (path TEXT PRIMARY KEY , sha TEXT)''')
+                        cur.execute('''CREATE TABLE IF NOT EXISTS syncState
+                                    (key TEXT PRIMARY KEY , value TEXT)''')
+                        tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                        if 'fixtures' in tables and 'manufacturers' in tables:
+                                hasSource = 'source' in [row[1] for row in cur.execute('PRAGMA table_info(fixtures)')]
+                                makers = dict(cur.execute('SELECT fixName , man FROM manufacturers').fetchall())
+                                legacyRows = cur.execute(f"SELECT fixName , channels , {'source' if hasSource else 'NULL'} FROM fixtures").fetchall()
+                                cur.executemany('INSERT INTO makers (name) VALUES (?) ON CONFLICT (name) DO NOTHING', [(man,) for man in set(makers.values()) if man is not None])
+                                #Old names are 'Model - Mode', split at the first separator. Duplicate names keep their first row, as lookups always did
+                                cur.executemany('''INSERT INTO profiles (fixName , makerID , model , mode , channels , source)
+                                                VALUES (? , (SELECT id FROM makers WHERE name = ?) , ? , ? , ? , ?)
+                                                ON CONFLICT (fixName) DO NOTHING''',
+                                                [(fixName, makers.get(fixName), fixName.partition(' - ')[0], fixName.partition(' - ')[2] or None, channels, source)
+                                                 for fixName, channels, source in legacyRows if fixName is not None and channels is not None])
+                                cur.execute('DROP TABLE fixtures')
+                                cur.execute('DROP TABLE manufacturers')
+                        cur.execute('''CREATE VIEW fixtures AS
+                                    SELECT fixName , channels , source FROM profiles''')
+                        cur.execute('''CREATE VIEW manufacturers AS
+                                    SELECT makers.name AS man , profiles.fixName AS fixName , profiles.source AS source
+                                    FROM profiles JOIN makers ON makers.id = profiles.makerID''')
+                if version < 2:
+                        #Rowids match profiles.id. Prefix indexes make search-as-you-type queries on short prefixes fast
+                        cur.execute('''CREATE VIRTUAL TABLE profileSearch USING fts5
+                                    (man , model , mode , tokenize = 'unicode61 remove_diacritics 2' , prefix = '1 2 3')''')
+                        cur.execute('''CREATE TRIGGER profilesSearchInsert AFTER INSERT ON profiles BEGIN
+                                    INSERT INTO profileSearch (rowid , man , model , mode)
+                                    VALUES (NEW.id , (SELECT name FROM makers WHERE id = NEW.makerID) , NEW.model , NEW.mode);
+                                    END''')
+                        cur.execute('''CREATE TRIGGER profilesSearchDelete AFTER DELETE ON profiles BEGIN
+                                    DELETE FROM profileSearch WHERE rowid = OLD.id;
+                                    END''')
+                        cur.execute('''CREATE TRIGGER profilesSearchUpdate AFTER UPDATE ON profiles BEGIN
+                                    DELETE FROM profileSearch WHERE rowid = OLD.id;
+                                    INSERT INTO profileSearch (rowid , man , model , mode)
+                                    VALUES (NEW.id , (SELECT name FROM makers WHERE id = NEW.makerID) , NEW.model , NEW.mode);
+                                    END''')
+                        cur.execute('''INSERT INTO profileSearch (rowid , man , model , mode)
+                                    SELECT profiles.id , makers.name , profiles.model , profiles.mode
+                                    FROM profiles LEFT JOIN makers ON makers.id = profiles.makerID''')
+                cur.execute(f'PRAGMA user_version = {self.schemaVersion}')
+
+        #The shared connection, opened on first use. Statements run through it are prepared once and reused from the statement cache
+        def getConnection(self):
+                if self.conn is None:
+                        self.conn = self.connect()
+                return self.conn
+
+        def close(self):
+                if self.conn is not None:
+                        self.conn.close()
+                        self.conn = None
+
+        #The profile of a fixture - mode name. Profiles are parsed once and kept in a bounded least recently used cache, so patching many of one fixture reuses it
+        def getProfile(self, fixName):
+                with self.cacheLock:
+                        profile = self.profileCache.get(fixName)
+                        if profile is not None:
+                                self.profileCache.move_to_end(fixName)
+                                return profile
+                        version = self.cacheVersion
+                row = self.getConnection().execute('SELECT fixName , channels FROM profiles WHERE fixName = ?', (fixName,)).fetchone()
+                if row is None:
+                        raise KeyError(f'There is no fixture profile called {fixName}')
+                profile = FixtureProfile(row[0], json.loads(row[1]))
+                with self.cacheLock:
+                        if version != self.cacheVersion: #Profiles were written while this one was read, so it may be the old row
+                                return profile
+                        self.profileCache[fixName] = profile
+                        if len(self.profileCache) > self.profileCacheSize:
+                                self.profileCache.popitem(last=False)
+                return profile
+
+        #Turns what the user typed into a full-text query. Every word must match the start of a word in the maker, model or mode
+        def searchQuery(self, text):
+                words = re.findall(r'\w+', text)
+                return ' '.join(f'"{word}"*' for word in words)
+
+        #SQL and parameters selecting (manufacturer, fixture name) of profiles matching a search, best matches first.
+        #A blank search returns every profile in the order they were added, which SQLite can stream without sorting
+        def searchSQL(self, text):
+                query = self.searchQuery(text)
+                if not query:
+                        return '''SELECT makers.name , profiles.fixName
+                                FROM profiles JOIN makers ON makers.id = profiles.makerID
+                                ORDER BY profiles.id''', ()
+                #bm25 weights a match in the model above one in the maker or mode
+                return '''SELECT makers.name , profiles.fixName
+                        FROM profileSearch
+                        JOIN profiles ON profiles.id = profileSearch.rowid
+                        JOIN makers ON makers.id = profiles.makerID
+                        WHERE profileSearch MATCH ?
+                        ORDER BY bm25(profileSearch , 2.0 , 5.0 , 1.0) , profiles.fixName''', (query,)
+
+        def searchProfiles(self, text, limit=None):
+                sql, parameters = self.searchSQL(text)
+                if limit is not None:
+                        sql += f' LIMIT {int(limit)}'
+                return self.getConnection().execute(sql, parameters).fetchall()
+
+        def getSources(self): #Path -> git blob SHA of every source file in the database
+                conn = self.connect()
+                try:
+                        return dict(conn.execute('SELECT path , sha FROM sources'))
+                finally:
+                        conn.close()
+
+        #Writes parsed fixture files, replacing the rows of any file already in the database, and removes the rows of deleted files, all in one transaction.
+        #A fixture name already defined by another file is kept as it is. Returns the number of fixtures written
+        def insertProfiles(self, parsedFiles, removedPaths=()):
+                conn = self.connect()
+                try:
+                        with conn:
+                                cur = conn.cursor()
+                                stalePaths = [(path,) for path, sha, folder, rows in parsedFiles] + [(path,) for path in removedPaths]
+                                cur.executemany('DELETE FROM profiles WHERE source = ?', stalePaths)
+                                cur.executemany('DELETE FROM sources WHERE path = ?', [(path,) for path in removedPaths])
+                                cur.executemany('INSERT INTO makers (name) VALUES (?) ON CONFLICT (name) DO NOTHING',
+                                                [(folder,) for folder in {folder for path, sha, folder, rows in parsedFiles if rows}])
+                                #Rows with no source came from a database made before sources were tracked, and are taken over by the file that defines them
+                                cur.executemany('''INSERT INTO profiles (fixName , makerID , model , mode , channels , source)
+                                                VALUES (? , (SELECT id FROM makers WHERE name = ?) , ? , ? , ? , ?)
+                                                ON CONFLICT (fixName) DO UPDATE SET makerID = excluded.makerID , model = excluded.model ,
+                                                mode = excluded.mode , channels = excluded.channels , source = excluded.source
+                                                WHERE profiles.source IS NULL''',
+                                                [(fixName, folder, model, mode, channels, path)
+                                                 for path, sha, folder, rows in parsedFiles for fixName, model, mode, channels in rows])
+                                written = cur.rowcount
+                                cur.executemany('''INSERT INTO sources (path , sha) VALUES (? , ?)
+                                                ON CONFLICT (path) DO UPDATE SET sha = excluded.sha''',
+                                                [(path, sha) for path, sha, folder, rows in parsedFiles])
+                finally:
+                        conn.close()
+                #Profiles may have changed, so parse them again on next use. Only cleared once committed, or a lookup in between would cache the old row again
+                with self.cacheLock:
+                        self.profileCache.clear()
+                        self.cacheVersion += 1
+                return written
+
+        #Finds the fixture files of a checkout, which can be the repository root or its fixtures folder
+        def findLocalFiles(self, source):
+                source = Path(source)
+                if (source / 'fixtures').is_dir():
+                        source = source / 'fixtures'
+                if not source.is_dir():
+                        raise FileNotFoundError(f'{source} is not an open-fixture-library checkout')
+                return sorted(source.glob('*/*.json'))
+
+        #Reads the fixture files out of a tarball, as (repository path, file contents)
+        def readTarball(self, source):
+                fixtureFiles = []
+                with tarfile.open(source) as tar:
+                        for member in tar:
+                                path = '/'.join(member.name.split('/')[-3:])
+                                if member.isfile() and isFixturePath(path):
+                                        fixtureFiles.append((path, tar.extractfile(member).read()))
+                return fixtureFiles
+
+        #Imports every fixture in a local clone or tarball of open-fixture-library and returns the number of fixtures written.
+        #progress is called with (files parsed, total files). workers=1 parses in this process
+        def importLibrary(self, source, progress=None, workers=None):
+                if Path(source).is_file():
+                        jobs = self.readTarball(source)
+                        parse = parseFixtureProfile
+                else:
+                        jobs = self.findLocalFiles(source)
+                        parse = readFixtureFile
+                total = len(jobs)
+                parsedFiles = []
+                def collect(results):
+                        for parsed, parsedFile in enumerate(results, 1):
+                                parsedFiles.append(parsedFile)
+                                if progress is not None and (parsed % 100 == 0 or parsed == total):
+                                        progress(parsed, total)
+                if workers == 1 or total < 2:
+                        collect(map(parse, jobs))
+                else:
+                        with ProcessPoolExecutor(workers) as pool:
+                                collect(pool.map(parse, jobs, chunksize=64))
+                return self.insertProfiles(parsedFiles)
+
+        #Brings the database up to date with the online library, downloading only fixture files whose git blob SHA changed.
+        #The tree listing is a conditional request, so an unchanged library costs one request. Returns (files downloaded, files removed)
+        def sync(self, progress=None, workers=8, session=None):
+                ownSession = session is None
+                if ownSession:
+                        session = requests.Session()
+                try:
+                        conn = self.connect()
+                        try:
+                                row = conn.execute('SELECT value FROM syncState WHERE key = ?', ('treeETag',)).fetchone()
+                        finally:
+                                conn.close()
+                        headers = {'If-None-Match': row[0]} if row is not None else {}
+                        response = session.get(self.treeURL, headers=headers, timeout=30)
+                        if response.status_code == 304: #Nothing has changed since the last sync
+                                return 0, 0
+                        response.raise_for_status()
+                        tree = response.json()
+                        if tree.get('truncated'):
+                                raise ValueError('The fixture library listing was truncated')
+                        remote = {entry['path']: entry['sha'] for entry in tree['tree'] if entry['type'] == 'blob' and isFixturePath(entry['path'])}
+                        local = self.getSources()
+                        changed = [path for path, sha in remote.items() if local.get(path) != sha]
+                        removed = [path for path in local if path not in remote]
+                        def download(path):
+                                fileResponse = session.get(self.rawURL.format(path=path), timeout=30)
+                                fileResponse.raise_for_status()
+                                return parseFixtureProfile((path, fileResponse.content))
+                        parsedFiles = []
+                        #A bounded pool of threads shares the session's connections
+                        with ThreadPoolExecutor(workers) as pool:
+                                for fetched, parsedFile in enumerate(pool.map(download, changed), 1):
+                                        parsedFiles.append(parsedFile)
+                                        if progress is not None and (fetched % 100 == 0 or fetched == len(changed)):
+                                                progress(fetched, len(changed))
+                        self.insertProfiles(parsedFiles, removed)
+                        if 'ETag' in response.headers:
+                                conn = self.connect()
+                                try:
+                                        with conn:
+                                                conn.execute('''INSERT INTO syncState (key , value) VALUES (? , ?)
+                                                             ON CONFLICT (key) DO UPDATE SET value = excluded.value''',
+                                                             ('treeETag', response.headers['ETag']))
+                                finally:
+                                        conn.close()
+                        return len(changed), len(removed)
+                finally:
+                        if ownSession:
+                                session.close()
+
+#Runs a fixture library import or sync on its own thread, reporting back through signals so the UI stays responsive
+class FixtureImporter(QObject):
+        progress = pyqtSignal(int, int) #Files read and total files
+        finished = pyqtSignal(str) #Summary of what changed
+        failed = pyqtSignal(str)
+
+        def __init__(self, fixtureDB):
+                super().__init__()
+                self.fixtureDB = fixtureDB
+                self.thread = None
+
+        def isRunning(self):
+                return self.thread is not None and self.thread.is_alive()
+
+        def launch(self, task):
+                if self.isRunning():
+                        raise RuntimeError('A fixture import is already running')
+                self.thread = threading.Thread(target=self.run, args=(task,), name='FixtureImporter', daemon=True)
+                self.thread.start()
+
+        def startImport(self, source): #Imports a local clone or tarball
+                self.launch(lambda: f'{self.fixtureDB.importLibrary(source, self.progress.emit)} fixtures imported')
+
+        def startSync(self): #Downloads changes from the online library
+                def sync():
+                        downloaded, removed = self.fixtureDB.sync(self.progress.emit)
+                        return f'{downloaded} files updated, {removed} removed'
+                self.launch(sync)
+
+        def run(self, task):
+                try:
+                        summary = task()
+                except (OSError, ValueError, KeyError, TypeError, tarfile.TarError, sqlite3.Error, requests.RequestException) as e:
+                        self.failed.emit(str(e))
+                        return
+                self.finished.emit(summary)
+
+#Table model for browsing fixture profiles. Rows are read from an open SQLite cursor a page at a time as the view scrolls,
+#so only rows that have been shown are ever loaded and a search costs the same however large the library is
+class FixtureBrowserModel(QAbstractTableModel):
+        columns = ['Manufacturer', 'Fixture - Mode']
+
+        def __init__(self, fixtureDB, pageSize=256):
+                super().__init__()
+                self.fixtureDB = fixtureDB
+                self.pageSize = pageSize
+                self.conn = fixtureDB.getConnection()
+                self.cursor = None
+                self.rows = []
+                self.exhausted = True
+                self.setSearch('')
+
+        def setSearch(self, text):#Starts a new search, replacing every row in the model
+                self.beginResetModel()
+                if self.cursor is not None:
+                        self.cursor.close()
+                sql, parameters = self.fixtureDB.searchSQL(text)
+                self.cursor = self.conn.execute(sql, parameters)
+                self.rows = self.cursor.fetchmany(self.pageSize)
+                self.exhausted = len(self.rows) < self.pageSize
+                self.endResetModel()
+
+        def rowCount(self, parent=QModelIndex()):
+                return 0 if parent.isValid() else len(self.rows)
+
+        def columnCount(self, parent=QModelIndex()):
+                return 0 if parent.isValid() else len(self.columns)
+
+        def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+                if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+                        return str(self.rows[index.row()][index.column()])
+                return None
+
+        def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+                if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+                        return self.columns[section]
+                return super().headerData(section, orientation, role)
+
+        def canFetchMore(self, parent=QModelIndex()):
+                return not parent.isValid() and not self.exhausted
+
+        def fetchMore(self, parent=QModelIndex()):
+                page = self.cursor.fetchmany(self.pageSize)
+                self.exhausted = len(page) < self.pageSize
+                if page:
+                        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+                        self.rows.extend(page)
+                        self.endInsertRows()
+
+        def fixtureName(self, row):
+                return self.rows[row][1]
+
+        def close(self): #The connection is shared, only the cursor is closed
+                if self.cursor is not None:
+                        self.cursor.close()
+                        self.cursor = None
+
+#Show files start with a fixed header, followed by JSON metadata (cues, fixture profiles and the patch), an index of (cue position, universe, slot count)
+#entries and then every cue frame in one contiguous block in index order. Full frames are universeSize values. Tracking cue lists store each cue's delta instead,
+#as slot count little-endian 16-bit slot numbers followed by their values. Format 1 files have no slot count in the index and only full frames.
+#Header: magic, format version, metadata length, number of index entries
+showMagic = b'PIGSHOW\0'
+showFormatVersion = 2
+showHeader = struct.Struct('<8sHIQ')
+showIndexEntry = struct.Struct('<III')
+showIndexEntryV1 = struct.Struct('<II')
+
+#Fixtures as JSON-ready profiles and fixtures. Fixtures of the same type share a profile, which is only written once
+def encodeFixtures(fixtures):
+        profiles = []
+        profileNumbers = {}
+        encoded = []
+        for fixture in fixtures:
+                if id(fixture.profile) not in profileNumbers:
+                        profileNumbers[id(fixture.profile)] = len(profiles)
+                        profiles.append({'name': fixture.profile.name, 'attributes': list(fixture.profile.attributes)})
+                encoded.append({'type': fixture.type, 'profile': profileNumbers[id(fixture.profile)], 'address': fixture.address,
+                                'channel': fixture.channelNum, 'universe': fixture.universe})
+        return profiles, encoded
+
+def decodeFixtures(profiles, fixtures):
+        profiles = [FixtureProfile(profile['name'], profile['attributes']) for profile in profiles]
+        return [Fixture(fixture['type'], profiles[fixture['profile']], fixture['address'], fixture['channel'], fixture['universe']) for fixture in fixtures]
+
+#Writes a show to a temporary file next to path and then renames it over path, so a failed save never leaves a half written show
+def writeShowFile(path, cueList, fixtureList):
+        cueIDs = sorted(cueList.keys())
+        tracking = len(cueList) > 0 and all(isinstance(cue, TrackedCue) for cue in cueList.values())
+        profiles, fixtures = encodeFixtures(fixtureList.values())
+        cues = []
+        index = bytearray()
+        blocks = [] #Written in index order
+        for position, cueID in enumerate(cueIDs):
+                cue = cueList[cueID]
+                cues.append({'ID': str(cueID), 'fadeUp': cue.fadeUp, 'fadeDown': cue.fadeDown})
+                if tracking: #Keys are split back into universes and 16-bit slot numbers
+                        keys, values = cue.delta
+                        first = 0
+                        while first < len(keys):
+                                universe = keys[first] >> 16
+                                last = first
+                                while last < len(keys) and keys[last] >> 16 == universe:
+                                        last += 1
+                                slots = array('H', [key & 0xFFFF for key in keys[first:last]])
+                                if sys.byteorder == 'big':
+                                        slots.byteswap()
+                                index += showIndexEntry.pack(position, universe, last - first)
+                                blocks += [slots, values[first:last]]
+                                first = last
+                else:
+                        frame = cue.frame
+                        for universe in frame.getUniverses():
+                                index += showIndexEntry.pack(position, universe, universeSize)
+                                blocks.append(frame[universe])
+        metadata = json.dumps({'cues': cues, 'profiles': profiles, 'fixtures': fixtures, 'tracking': tracking}).encode('utf-8')
+        tempPath = f'{path}.tmp'
+        try:
+                with open(tempPath, 'wb') as file:
+                        file.write(showHeader.pack(showMagic, showFormatVersion, len(metadata), len(index) // showIndexEntry.size))
+                        file.write(metadata)
+                        file.write(index)
+                        for block in blocks:
+                                file.write(block)
+                        file.flush()
+                        os.fsync(file.fileno())
+                os.replace(tempPath, path)
+        except BaseException:
+                if os.path.exists(tempPath):
+                        os.remove(tempPath)
+                raise
+
+#Reads a show file, returning its cue list and fixture list. Files saved before the show format existed hold pickled dicts,
+#appended to on every save, so the last (newest) one is used
+def readShowFile(path):
+        with open(path, 'rb') as file:
+                if file.read(len(showMagic)) != showMagic:
+                        file.seek(0)
+                        return readLegacyShowFile(file)
+                file.seek(0)
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        return readShowView(view, path)
+
+def readShowView(view, path):
+        if len(view) < showHeader.size:
+                raise ValueError(f'{path} is not a complete show file')
+        magic, version, metadataLength, entryCount = showHeader.unpack_from(view, 0)
+        if version > showFormatVersion:
+                raise ValueError(f'{path} was saved by a newer version of PIghting (show format {version})')
+        indexEntry = showIndexEntry if version >= 2 else showIndexEntryV1
+        indexStart = showHeader.size + metadataLength
+        dataStart = indexStart + entryCount * indexEntry.size
+        if len(view) < dataStart:
+                raise ValueError(f'{path} is not a complete show file')
+        #JSON and text decoding errors are already ValueErrors, anything else wrong with the metadata is reported as one too
+        try:
+                metadata = json.loads(view[showHeader.size:indexStart].decode('utf-8'))
+                tracking = metadata.get('tracking', False)
+                cueIDs = [normaliseCueID(cue['ID']) for cue in metadata['cues']]
+                fadeTimes = [(cue['fadeUp'], cue['fadeDown']) for cue in metadata['cues']]
+                fixtures = decodeFixtures(metadata['profiles'], metadata['fixtures'])
+        except (KeyError, IndexError, TypeError, AttributeError, InvalidOperation) as e:
+                raise ValueError(f'{path} has damaged show metadata ({e!r})')
+        frames = [(array('I'), array('B')) if tracking else Frame() for cue in cueIDs] #Deltas for tracking cue lists
+        data = memoryview(view)
+        try:
+                offset = dataStart
+                for entryNo, entry in enumerate(indexEntry.iter_unpack(data[indexStart:dataStart])):
+                        position, universe = entry[0], entry[1]
+                        slotCount = entry[2] if version >= 2 else universeSize
+                        size = slotCount * 3 if tracking else slotCount
+                        #Every entry is checked before it is used, so a damaged file is reported rather than read out of range
+                        if (position >= len(cueIDs) or universe < 1 or (tracking and universe >= 1 << 16)
+                                        or slotCount > universeSize or (not tracking and slotCount != universeSize)):
+                                raise ValueError(f'{path} has a damaged index entry {entryNo} (cue {position}, universe {universe}, {slotCount} slots)')
+                        if offset + size > len(view):
+                                raise ValueError(f'{path} is not a complete show file')
+                        if tracking:
+                                slots = array('H')
+                                slots.frombytes(data[offset:offset + slotCount * 2])
+                                if sys.byteorder == 'big':
+                                        slots.byteswap()
+                                if any(slotNo >= universeSize for slotNo in slots):
+                                        raise ValueError(f'{path} has a damaged cue {cueIDs[position]} in universe {universe}')
+                                keys, values = frames[position]
+                                keys.extend((universe << 16) | slotNo for slotNo in slots)
+                                values.frombytes(data[offset + slotCount * 2:offset + size])
+                        else:
+                                values = array('B')
+                                values.frombytes(data[offset:offset + size])
+                                frames[position].universes[universe] = values
+                        offset += size
+        finally:
+                data.release() #The map cannot be closed while a view of it exists
+        if tracking:
+                cueList = {cueID: TrackedCue(cueID, delta, fadeUp, fadeDown) for cueID, delta, (fadeUp, fadeDown) in zip(cueIDs, frames, fadeTimes)}
+        else:
+                cueList = {cueID: Cue(cueID, frame, fadeUp, fadeDown) for cueID, frame, (fadeUp, fadeDown) in zip(cueIDs, frames, fadeTimes)}
+        fixtureList = {fixture.channelNum: fixture for fixture in fixtures}
+        return cueList, fixtureList
+
+def readLegacyShowFile(file):
+        saveDict = None
+        while True:
+                try:
+                        saveDict = pickle.load(file)
+                except EOFError:
+                        break
+        if saveDict is None:
+                raise ValueError('Show file is empty')
+        return saveDict['cueList'], saveDict['fixtureList']
+
+#Autosave for the main cue stack and the patch. Every change is appended to a journal as a small record as it happens,
+#and compaction folds the journal into a snapshot (a show file) on a background thread, so nothing large is written on the UI thread.
+#Journals and snapshots are numbered by generation. Compaction starts a new journal generation and snapshots the state at that moment,
+#then deletes older journals and snapshots once the snapshot is safely written. Recovery loads the newest snapshot and replays the journals from its generation on.
+#Loading a show or switching tracking replaces everything, so it starts a new generation whose journal begins with a reset record. Records after it
+#only make sense on top of that generation's snapshot, so if a crash comes before the snapshot is written they are set aside rather than replayed
+#Each record is a header of metadata length, frame data length and a CRC32 of both, then JSON metadata and the raw slots of any universes it carries
+journalRecordHeader = struct.Struct('<III')
+
+class ShowJournal:
+        def __init__(self, directory, cueManager, fixtureManager, compactAfter=1000):
+                self.directory = Path(directory)
+                self.cueManager = cueManager
+                self.fixtureManager = fixtureManager
+                self.compactAfter = compactAfter #Records written to a journal before it is folded into a snapshot
+                self.generation = 0
+                self.records = 0
+                self.file = None
+                self.lock = threading.Lock()
+                self.compactor = None #Thread writing snapshots, while any are waiting
+                self.pendingSnapshot = None #(generation, cue list, fixture list) of the newest snapshot waiting to be written
+                self.compactError = None
+                self.holdResets = False #Set while loadShow replaces the show, so its cue list and patch resets make one snapshot
+                self.unrestored = None #Folder of journals set aside by open because the snapshot they follow was never written
+
+        def snapshotPath(self, generation):
+                return self.directory / f'snapshot.{generation}.show'
+
+        def journalPath(self, generation):
+                return self.directory / f'journal.{generation}'
+
+        def findGenerations(self, pattern):
+                generations = []
+                for path in self.directory.iterdir():
+                        match = re.fullmatch(pattern, path.name)
+                        if match:
+                                generations.append(int(match.group(1)))
+                return sorted(generations)
+
+        #Restores the managers from the newest snapshot and the journals written after it, then starts recording changes.
+        #Returns the number of changes replayed from the journals
+        def open(self):
+                snapshots = self.findGenerations(r'snapshot\.(\d+)\.show')
+                journals = self.findGenerations(r'journal\.(\d+)')
+                start = snapshots[-1] if snapshots else 0
+                if snapshots:
+                        cueList, fixtureList = readShowFile(str(self.snapshotPath(start)))
+                        self.cueManager.setCueList(cueList)
+                        self.fixtureManager.setFixtureList(fixtureList)
+                replayed = 0
+                journals = [generation for generation in journals if generation >= start]
+                for number, generation in enumerate(journals):
+                        if generation > start and self.startsWithReset(generation):
+                                self.unrestored = self.setAside([self.journalPath(later) for later in journals[number:]])
+                                journals = journals[:number]
+                                break
+                        replayed += self.replay(generation)
+                self.generation = max([start] + journals)
+                self.file = open(self.journalPath(self.generation), 'ab')
+                self.records = replayed
+                if self.records >= self.compactAfter:
+                        self.compact()
+                #Listeners are added last, so a journal that fails to open records nothing and can be discarded and opened again
+                self.cueManager.addListener(self.record)
+                self.fixtureManager.addListener(self.record)
+                return replayed
+
+        #The complete records of a journal as (metadata, frames, end position). A record cut short by a crash, or failing its CRC, ends the journal
+        def readRecords(self, data):
+                position = 0
+                while position + journalRecordHeader.size <= len(data):
+                        metadataLength, frameLength, checksum = journalRecordHeader.unpack_from(data, position)
+                        start = position + journalRecordHeader.size
+                        end = start + metadataLength + frameLength
+                        if end > len(data) or zlib.crc32(data[start:end]) != checksum:
+                                return
+                        yield json.loads(data[start:start + metadataLength].decode('utf-8')), data[start + metadataLength:end], end
+                        position = end
+
+        #Applies the records of one journal, and cuts off anything after the last complete record
+        def replay(self, generation):
+                path = self.journalPath(generation)
+                with open(path, 'rb') as file:
+                        data = file.read()
+                position = 0
+                replayed = 0
+                for metadata, frames, position in self.readRecords(data):
+                        if self.apply(metadata, frames):
+                                replayed += 1
+                if position < len(data):
+                        os.truncate(path, position)
+                return replayed
+
+        def startsWithReset(self, generation):
+                with open(self.journalPath(generation), 'rb') as file:
+                        for metadata, frames, end in self.readRecords(file.read()):
+                                return metadata['op'] == 'reset'
+                return False
+
+        #Moves journals or snapshots into a folder of their own, so they are kept but never restored. Returns the folder
+        def setAside(self, paths):
+                folder = self.directory / f'unrestored.{time.strftime("%Y%m%d-%H%M%S")}'
+                folder.mkdir(exist_ok=True)
+                for path in paths:
+                        os.replace(path, folder / path.name)
+                return folder
+
+        #Applies one record, returning whether it changed anything. A reset record only marks where the snapshot it belongs to was loaded
+        def apply(self, metadata, frames):
+                op = metadata['op']
+                if op == 'reset':
+                        return False
+                if op == 'cue':
+                        frame = Frame()
+                        for number, universe in enumerate(metadata['universes']):
+                                frame.universes[universe] = array('B', frames[number * universeSize:(number + 1) * universeSize])
+                        self.cueManager.addCue(normaliseCueID(metadata['ID']), frame, metadata['fadeUp'], metadata['fadeDown'])
+                elif op == 'deleteCue':
+                        self.cueManager.deleteCue(metadata['ID'])
+                elif op == 'fadeTimes':
+                        self.cueManager.setFadeTimes(metadata['ID'], metadata['fadeUp'], metadata['fadeDown'])
+                elif op == 'fixtures':
+                        for fixture in decodeFixtures(metadata['profiles'], metadata['fixtures']):
+                                self.fixtureManager.addFixture(fixture)
+                elif op == 'removeFixture':
+                        self.fixtureManager.removeFixture(metadata['channel'])
+                return True
+
+        #Listener for both managers. Loading a whole show replaces everything, so it starts a new generation with a snapshot rather than a record
+        def record(self, event, *args):
+                frames = b''
+                if event == 'reset':
+                        if not self.holdResets:
+                                self.compact(reset=True)
+                        return
+                elif event == 'cue':
+                        cue = args[0]
+                        universes = cue.frame.getUniverses()
+                        metadata = {'op': 'cue', 'ID': str(cue.ID), 'fadeUp': cue.fadeUp, 'fadeDown': cue.fadeDown, 'universes': universes}
+                        frames = b''.join(cue.frame[universe].tobytes() for universe in universes)
+                elif event == 'deleteCue':
+                        metadata = {'op': 'deleteCue', 'ID': str(args[0])}
+                elif event == 'fadeTimes':
+                        metadata = {'op': 'fadeTimes', 'ID': str(args[0]), 'fadeUp': args[1], 'fadeDown': args[2]}
+                elif event == 'fixtures':
+                        profiles, fixtures = encodeFixtures(args[0])
+                        metadata = {'op': 'fixtures', 'profiles': profiles, 'fixtures': fixtures}
+                elif event == 'removeFixture':
+                        metadata = {'op': 'removeFixture', 'channel': args[0]}
+                else:
+                        return
+                self.write(metadata, frames)
+                self.records += 1
+                if self.records >= self.compactAfter and self.compactor is None:
+                        self.compact()
+
+        def write(self, metadata, frames=b''):
+                metadata = json.dumps(metadata).encode('utf-8')
+                self.file.write(journalRecordHeader.pack(len(metadata), len(frames), zlib.crc32(metadata + frames)) + metadata + frames)
+                self.file.flush() #Handed to the OS straight away, so a crash of the application loses nothing
+
+        #Replaces the whole show. The cue list and the patch are recorded as one reset, with one snapshot. Returns the conflicting fixtures
+        def loadShow(self, cueList, fixtureList):
+                self.holdResets = True
+                try:
+                        self.cueManager.setCueList(cueList)
+                        return self.fixtureManager.setFixtureList(fixtureList)
+                finally:
+                        self.holdResets = False
+                        self.record('reset')
+
+        #Starts a new journal and writes the current state as a snapshot in the background. After a reset the new journal starts with a reset record
+        def compact(self, reset=False):
+                #The state is copied now, so changes made while the snapshot is written only go to the new journal
+                cueList = {cueID: cue.copy() for cueID, cue in self.cueManager.getCueList().items()}
+                fixtureList = dict(self.fixtureManager.getFixtureList())
+                self.file.close()
+                self.generation += 1
+                self.file = open(self.journalPath(self.generation), 'ab')
+                self.records = 0
+                if reset:
+                        self.write({'op': 'reset', 'snapshot': self.generation})
+                with self.lock:
+                        #Snapshots are written one at a time in order. A newer snapshot covers everything an older one not yet started would, so it replaces it
+                        self.pendingSnapshot = (self.generation, cueList, fixtureList)
+                        if self.compactor is None:
+                                self.compactor = threading.Thread(target=self.writeSnapshots, name='ShowJournal', daemon=True)
+                                self.compactor.start()
+
+        #Runs on the compactor thread until no snapshot is waiting
+        def writeSnapshots(self):
+                while True:
+                        with self.lock:
+                                if self.pendingSnapshot is None:
+                                        self.compactor = None
+                                        return
+                                generation, cueList, fixtureList = self.pendingSnapshot
+                                self.pendingSnapshot = None
+                        try:
+                                self.writeSnapshot(generation, cueList, fixtureList)
+                        except Exception as e: #The older journals are kept as in writeSnapshot, and later snapshots are still written
+                                self.compactError = e
+
+        def waitForSnapshots(self):
+                with self.lock:
+                        compactor = self.compactor
+                if compactor is not None:
+                        compactor.join()
+
+        def writeSnapshot(self, generation, cueList, fixtureList):
+                try:
+                        writeShowFile(str(self.snapshotPath(generation)), cueList, fixtureList)
+                except OSError as e: #Older journals are kept, so the show can still be recovered from them
+                        self.compactError = e
+                        return
+                self.compactError = None
+                for older in self.findGenerations(r'journal\.(\d+)'):
+                        if older < generation:
+                                os.remove(self.journalPath(older))
+                for older in self.findGenerations(r'snapshot\.(\d+)\.show'):
+                        if older < generation:
+                                os.remove(self.snapshotPath(older))
+
+        def close(self):
+                self.waitForSnapshots()
+                if self.file is not None:
+                        self.file.close()
+                        self.file = None
+
+        #Used when the autosave cannot be restored. Every snapshot and journal is moved into a folder of its own, so the journal can be opened again
+        #with an empty show, and the managers are emptied. Returns the folder
+        def discard(self):
+                self.close()
+                folder = self.setAside([path for path in self.directory.iterdir() if re.fullmatch(r'snapshot\.\d+\.show(\.tmp)?|journal\.\d+', path.name)])
+                self.cueManager.setTracking(False)
+                self.cueManager.setCueList({})
+                self.fixtureManager.setFixtureList({})
+                return folder
+
 class MainWindow(PIghtingWidget):
         def __init__(self):
                 super().__init__()
                 self.setWindowTitle('PIghting Controller')
 
                 ###This is for creating attributes/objects related to DMX
-                # Self.data is the data CURRENTLY being outputted to OLA 
-                self.data = array('B', [0]*512)
                 self.cueManager = CueManager()
                 self.fixtureManager = FixtureManager()
+                self.fixtureDB = None #Opened when the patch window is first used
                 #Fade rate chosen arbitrarily
                 self.fadeRate = 50
+                #Each source of values writes to its own layer, which are merged into the output
+                self.mergeEngine = MergeEngine(self.fixtureManager)
+                self.manualLayer = self.mergeEngine.getLayer('Manual')
+                #Fades and output run on their own thread, which reports back through signals
+                self.playbackEngine = PlaybackEngine(self.cueManager, self.fadeRate, self.mergeEngine)
+                self.playbackEngine.fadeProgress.connect(self.fadeProgress)
+                self.playbackEngine.fadeFinished.connect(self.fadeFinished)
+                self.playbackEngine.tickFailed.connect(self.handleError)
+                self.playbackEngine.start()
+                self.playback = self.playbackEngine.getPlayback('Main') #The cue stack the cue controls work on
+                # Self.data is the data CURRENTLY being outputted to OLA, merged from every layer. Edits are sent on the next output tick
+                self.data = self.playbackEngine.outputFrame
+                #Restores the show as it was when the application last closed or crashed, then records every change
+                self.journal = ShowJournal(autosavePath(), self.cueManager, self.fixtureManager)
+                restoreError = None
+                try:
+                        restored = self.journal.open()
+                except (ValueError, KeyError, PatchError, OSError) as e:
+                        #A damaged autosave must not stop the application starting, so it is moved aside and an empty show started
+                        folder = self.journal.discard()
+                        restored = self.journal.open()
+                        restoreError = f'The autosave could not be restored ({e}), it was moved to {folder}'
 
                 #---------Setting up UI---------
                 ###App layout
@@ -284,6 +2591,9 @@ class MainWindow(PIghtingWidget):
                 playCue = QPushButton('Play Next Cue', clicked = self.playCues)
                 layout.addWidget(playCue, 4, 4)
 
+                previousCue = QPushButton('Play Previous Cue', clicked = self.playPreviousCue)
+                layout.addWidget(previousCue, 4, 5)
+
                 deleteCue = QPushButton('Delete Cue', clicked = self.deleteCue)
                 layout.addWidget(deleteCue, 5, 4)
 
@@ -306,7 +2616,37 @@ class MainWindow(PIghtingWidget):
 
                 debug = QPushButton('Open debug menu', clicked = self.openDebug)
                 layout.addWidget(debug, 6, 0)
+
+                clearButton = QPushButton('Clear Manual Values', clicked = self.clearManual)
+                layout.addWidget(clearButton, 5, 2)
+
+                self.playbackLabel = QLabel('Playback: ')
+                layout.addWidget(self.playbackLabel, 6, 2)
+                self.inputPlayback = QLineEdit('Main')
+                layout.addWidget(self.inputPlayback, 6, 3)
+
+                playbackButton = QPushButton('Select Playback', clicked = self.selectPlayback)
+                layout.addWidget(playbackButton, 6, 4)
+
+                effectsButton = QPushButton('Effects', clicked = self.openEffects)
+                layout.addWidget(effectsButton, 6, 5)
+
+                fadeTimesButton = QPushButton('Set Fade Times', clicked = self.setFadeTimes)
+                layout.addWidget(fadeTimesButton, 3, 4)
+
+                #In tracking mode cues only store what they change, and changes carry on into later cues
+                self.trackingBox = QCheckBox('Tracking', clicked = self.toggleTracking)
+                self.trackingBox.setChecked(self.cueManager.tracking)
+                layout.addWidget(self.trackingBox, 5, 3)
+                self.playbackEngine.cueManager.addListener(self.syncTracking) #Loading a show can switch the main stack to tracking
                 #---------Setting up UI end---------
+                self.refreshCueViewer()
+                if restoreError is not None:
+                        self.handleError(restoreError)
+                elif self.journal.unrestored is not None:
+                        self.handleError(f'Changes made after the last show load were lost in a crash, they were moved to {self.journal.unrestored}')
+                elif self.cueManager.getCueIDs() or self.fixtureManager.getFixtureList():
+                        self.handleSuccess(f'Show restored from autosave ({restored} changes since the last snapshot)')
 
         ###Function Definitions
         def updateArray(self):#This updates the self.data attribute with new values at the channel indicated
@@ -322,97 +2662,149 @@ class MainWindow(PIghtingWidget):
                                raise ValueError('The designated value must be between 0-255')
                         fixture = fixtureList[channel]
                         attribute = self.inputAttribute.text()
-                        fixture.setAttribute(self.data, attribute, value)
-                        sendOLA(self.data)
+                        fixture.setAttribute(self.manualLayer, attribute, value)
                         self.handleSuccess('Signal Transmitted')
                 except (PatchError, KeyError, ValueError, IndexError) as e:
                         self.handleError(e)
 
+        def clearManual(self):#Releases every manual source, leaving only playback on stage
+                for name in ('Manual', 'Colour Picker', 'Pan/Tilt'):
+                        self.mergeEngine.getLayer(name).release()
+                self.handleSuccess('Manual values cleared')
+
         def saveCue(self):#This adds a cue to the cueManager. It will also increment the user input by one.
                 #Need to create a new copy of data
-                newData = self.data[:]
+                newData = self.data.copy()
                 try:
-                        newCue = safeInt(self.inputCue.text(), 'Cue')
+                        newCue = safeCueID(self.inputCue.text(), 'Cue')
                         newIn = safeInt(self.inputTimeIn.text(), 'Fade in time')
                         newOut = safeInt(self.inputTimeOut.text(), 'Fade out time')
                         self.cueManager.addCue(newCue, newData, newIn, newOut)
                         #Creates UI for viewing this cue
-                        cueList = self.cueManager.getCueList()
-                        cueNums = []
-                        for key in cueList.keys():
-                               cueNums.append(key)
-                        self.cueViewer.setRowCount(len(cueList))
-                        cueNums.sort()
-                        for row, cue in enumerate(cueNums):
-                                self.cueViewer.setItem(row, 0, QTableWidgetItem(str(cue)))
-                                self.cueViewer.setItem(row, 1, QTableWidgetItem('Click to edit Label'))
-                        #Updates the input field
-                        self.inputCue.setText(str(newCue + 1))
+                        self.refreshCueViewer()
+                        #Updates the input field to the next whole cue
+                        self.inputCue.setText(str(math.floor(newCue) + 1))
                         self.handleSuccess('Cue saved')
                 except (ValueError, TypeError) as e:
                         self.handleError(e)
 
+        def setFadeTimes(self):#Changes the fade times of the cue in the cue field to the fade up and down fields
+                try:
+                        targetCue = safeCueID(self.inputCue.text(), 'Target Cue')
+                        newIn = safeInt(self.inputTimeIn.text(), 'Fade in time')
+                        newOut = safeInt(self.inputTimeOut.text(), 'Fade out time')
+                        self.cueManager.setFadeTimes(targetCue, newIn, newOut)
+                        self.handleSuccess(f'Fade times of cue {targetCue} set')
+                except (KeyError, ValueError) as e:
+                        self.handleError(e)
+
+        def toggleTracking(self):#Switches the selected playback between tracking and storing whole cues
+                try:
+                        self.cueManager.setTracking(self.trackingBox.isChecked())
+                        self.handleSuccess('Tracking on' if self.cueManager.tracking else 'Tracking off')
+                except ValueError as e:
+                        self.trackingBox.setChecked(self.cueManager.tracking)
+                        self.handleError(e)
+
+        def syncTracking(self, event, *args):#Keeps the checkbox on the main stack's mode when a load or restore replaces its cue list
+                if event == 'reset' and self.cueManager is self.playbackEngine.cueManager:
+                        self.trackingBox.setChecked(self.cueManager.tracking)
+
+        def refreshCueViewer(self):#Fills the cue table from the sorted cue order
+                cueNums = self.cueManager.getCueIDs()
+                self.cueViewer.setRowCount(len(cueNums))
+                for row, cue in enumerate(cueNums):
+                        self.cueViewer.setItem(row, 0, QTableWidgetItem(str(cue)))
+                        self.cueViewer.setItem(row, 1, QTableWidgetItem('Click to edit Label'))
+
+        def selectPlayback(self):#Switches the cue controls to another cue stack, creating it if it does not exist yet
+                name = self.inputPlayback.text().strip()
+                if not name:
+                        self.handleError(ValueError('Playback name cannot be blank'))
+                        return
+                self.playback = self.playbackEngine.addPlayback(name)
+                self.cueManager = self.playback.cueManager
+                self.trackingBox.setChecked(self.cueManager.tracking)
+                self.refreshCueViewer()
+                self.handleSuccess(f'Selected playback {name}')
+
         def playCues(self):#Fades into next cue
                 try:
                         currentCue = self.cueManager.getCurrentCue()
                         nextCue = self.cueManager.getNextCue()
-                        nextCueNumber = self.cueManager.getPlaybackPointer()
-                        #Updating UI
-                        self.errorMessage.setText(f'Playing Cue {nextCueNumber}...')
-                        self.errorMessage.setStyleSheet('color: yellow')
-                        QApplication.processEvents()
-                        #Call crossfade function
-                        self.cueManager.crossFade(currentCue.frame, nextCue.frame, self.fadeRate, nextCue.fadeUp, currentCue.fadeDown)
-                        self.data = nextCue.frame
-                        sendOLA(self.data)
-                        #Set text to display the current cue
-                        self.inputCue.setText(str(nextCueNumber))
-                        self.handleSuccess(f'Currently in Cue {nextCueNumber}')
+                        self.fadeToCue(currentCue, nextCue)
                 except IndexError as e:
                         self.handleError(e)
 
+        def playPreviousCue(self):#Fades back to the previous cue
+                try:
+                        currentCue = self.cueManager.getCurrentCue()
+                        previousCue = self.cueManager.getPreviousCue()
+                        self.fadeToCue(currentCue, previousCue)
+                except IndexError as e:
+                        self.handleError(e)
+
+        def fadeToCue(self, currentCue, nextCue):
+                nextCueNumber = nextCue.ID
+                #Updating UI
+                self.errorMessage.setText(f'Playing Cue {nextCueNumber}...')
+                self.errorMessage.setStyleSheet('color: yellow')
+                #Start the crossfade on the playback thread, fadeFinished is called once it completes
+                transition = self.cueManager.getTransition(currentCue, nextCue)
+                self.playbackEngine.startFade(currentCue.frame, nextCue.frame, nextCue.fadeUp, currentCue.fadeDown, nextCueNumber, transition, self.playback.name)
+                #Set text to display the current cue
+                self.inputCue.setText(str(nextCueNumber))
+
+        def fadeProgress(self, playbackName, cueID, progress):#Called by the playback engine while a fade runs
+                if playbackName != self.playback.name: #Only the selected playback is shown
+                        return
+                self.errorMessage.setText(f'Playing Cue {cueID}... {progress:.0%}')
+                self.errorMessage.setStyleSheet('color: yellow')
+
+        def fadeFinished(self, playbackName, cueID):#Called by the playback engine when a fade completes
+                if playbackName != self.playback.name or self.playbackEngine.isFading(playbackName): #Another GO was pressed, wait for that fade instead
+                        return
+                self.handleSuccess(f'Currently in Cue {cueID}')
+
+        def closeEvent(self, event):
+                self.playbackEngine.stop()
+                self.journal.close()
+                if self.fixtureDB is not None:
+                        self.fixtureDB.close()
+                super().closeEvent(event)
+
         def loadCue(self): #Changes output to selected cue. Also increments Pointer to select the next cue numerically
                 try:
-                        cueDict=self.cueManager.getCueList()
-                        targetCue = safeInt(self.inputCue.text(),'Target Cue')
-                        if targetCue not in cueDict.keys():
-                               raise KeyError(f'Cue {targetCue} does not exist')
+                        targetCue = safeCueID(self.inputCue.text(),'Target Cue')
+                        playback = self.cueManager.getCue(targetCue)
                         self.cueManager.setPlaybackCue(targetCue)
-                        playback = cueDict[targetCue]
-                        self.data = playback.frame
-                        sendOLA(self.data)
+                        #Copied into the output frame, so later edits do not change the stored cue
+                        self.playbackEngine.loadFrame(playback.frame, self.playback.name)
                         self.handleSuccess('Loaded Cue')
                 except (KeyError, ValueError) as e:
                        self.handleError(e)
         
         def deleteCue(self):#If targetCue = currentCue, set playbackpointer to currentCue position -1
                 try:
-                        cueList = self.cueManager.cueList
-                        targetCue = safeInt(self.inputCue.text(), 'Target Cue')
+                        targetCue = safeCueID(self.inputCue.text(), 'Target Cue')
                         currentCueID = self.cueManager.getPlaybackPointer()
                         if targetCue == currentCueID:
                                 raise RuntimeError('Cannot delete a cue you are currently in')
-                        cueList.pop(targetCue)
+                        self.cueManager.deleteCue(targetCue)
                         #Updating UI
-                        cueList = self.cueManager.getCueList()
-                        cueNums = []
-                        for key in cueList.keys():
-                               cueNums.append(key)
-                        self.cueViewer.setRowCount(len(cueList))
-                        cueNums.sort()
-                        for row, cue in enumerate(cueNums):
-                                self.cueViewer.setItem(row, 0, QTableWidgetItem(str(cue)))
-                                self.cueViewer.setItem(row, 1, QTableWidgetItem('Click to edit Label'))
-                except (RuntimeError) as e:
+                        self.refreshCueViewer()
+                except (RuntimeError, KeyError, ValueError) as e:
                         self.handleError(e)
 
         #---------Functions to open windows---------
         def openSaveLoad(self):
-                self.fileWindow = SaveLoadWindow(self.cueManager, self.fixtureManager)
+                self.fileWindow = SaveLoadWindow(self.playbackEngine.cueManager, self.fixtureManager, self.journal) #Show files hold the main stack
                 self.fileWindow.show()
 
         def openPatchFix(self):
-                self.patchWindow = PatchWindow(self.fixtureManager)
+                if self.fixtureDB is None:
+                        self.fixtureDB = FixtureDB(profileDBPath())
+                self.patchWindow = PatchWindow(self.fixtureManager, self.fixtureDB)
                 self.patchWindow.show()
 
         def openViewFix(self):
@@ -420,20 +2812,24 @@ class MainWindow(PIghtingWidget):
                 self.fixtureViewer.show()
 
         def openColourFix(self):
-                self.colourPicker = ColourPicker(self.data, self.fixtureManager)
+                self.colourPicker = ColourPicker(self.mergeEngine.getLayer('Colour Picker'), self.fixtureManager)
                 self.colourPicker.show()
 
         def openPanTiltFix(self):
-                self.panTilt = PanTiltHandler(self.data, self.fixtureManager)
+                self.panTilt = PanTiltHandler(self.mergeEngine.getLayer('Pan/Tilt'), self.fixtureManager, self.data)
                 self.panTilt.show()
 
+        def openEffects(self):
+                self.effectsWindow = EffectsWindow(self.playbackEngine.effectsEngine, self.fixtureManager)
+                self.effectsWindow.show()
+
         def openDebug(self):
-                self.debug = DebugWindow(self.data, self.cueManager, self.fixtureManager)
+                self.debug = DebugWindow(self.manualLayer, self.cueManager, self.fixtureManager)
                 self.debug.show()
         #---------Functions to open windows end---------
 
 class SaveLoadWindow(PIghtingWidget):
-        def __init__(self, cueManager, fixtureManager):
+        def __init__(self, cueManager, fixtureManager, journal=None):
                 super().__init__()
                 self.setWindowTitle('Save or Load to a File')
                 ###Layout
@@ -443,11 +2839,12 @@ class SaveLoadWindow(PIghtingWidget):
                 ###Controllers
                 self.cueManager = cueManager
                 self.fixtureManager = fixtureManager
+                self.journal = journal #Loads go through the autosave journal if there is one, so they are recorded as one reset
 
                 #---------Setting up UI---------
                 self.nameLabel = QLabel('File Name: ')
                 layout.addWidget(self.nameLabel, 0, 0)
-                self.inputFileName = QLineEdit('example.pkl')
+                self.inputFileName = QLineEdit('example.show')
                 layout.addWidget(self.inputFileName, 0, 1)
 
                 saveButton = QPushButton('Save', clicked = self.saveToFile)
@@ -463,37 +2860,41 @@ class SaveLoadWindow(PIghtingWidget):
         def saveToFile(self):
                 cueList = self.cueManager.getCueList()
                 fixtureList = self.fixtureManager.getFixtureList()
-                saveDict = {
-                        'cueList' : cueList,
-                        'fixtureList' : fixtureList
-                }
-                with open(str(self.inputFileName.text()), 'ab') as file:
-                        pickle.dump(obj = saveDict, file = file, protocol=pickle.HIGHEST_PROTOCOL, fix_imports=True)
+                try:
+                        writeShowFile(str(self.inputFileName.text()), cueList, fixtureList)
                         self.feedback.setText(f"Show saved to {self.inputFileName.text()}")
+                except OSError as e:
+                        self.feedback.setText(f"Show could not be saved: {e}")
         
         def loadFromFile(self):
                 try:
-                       with open(str(self.inputFileName.text()), 'rb') as file:
-                                saveDict = pickle.load(file)
-                                self.feedback.setText(f"Show {self.inputFileName.text()} loaded")
-                                self.cueManager.cueList = saveDict['cueList']
-                                self.fixtureManager.fixtureList = saveDict['fixtureList']
+                        cueList, fixtureList = readShowFile(str(self.inputFileName.text()))
+                        self.feedback.setText(f"Show {self.inputFileName.text()} loaded")
+                        if self.journal is not None:
+                                conflicts = self.journal.loadShow(cueList, fixtureList)
+                        else:
+                                self.cueManager.setCueList(cueList)
+                                conflicts = self.fixtureManager.setFixtureList(fixtureList)
+                        if conflicts:
+                                self.feedback.setText(
+                                        f"Show {self.inputFileName.text()} loaded, overlapping patch on channels " +
+                                        ', '.join(str(fixture.channelNum) for fixture in conflicts)
+                                        )
                 except FileNotFoundError:
                         self.feedback.setText(f"File{self.inputFileName.text()} not found")
+                except (ValueError, KeyError, pickle.UnpicklingError) as e:
+                        self.feedback.setText(f"Show {self.inputFileName.text()} could not be loaded: {e}")
 
 class PatchWindow(PIghtingWidget):
-        def __init__(self, fixtureManager):
+        def __init__(self, fixtureManager, fixtureDB=None):
                 super().__init__()
                 self.setWindowTitle('Patch fixtures to channels')
-                home = Path.home()
-                if sys.platform == 'win32':
-                        self.path = home / "AppData/Roaming/pighting"
-                else:
-                        self.path = home / ".local/share/pighting"
-                pathStr = str(self.path)
-                if os.path.exists(pathStr) is False:
-                        os.mkdir(pathStr)
-                self.DBPathStr = str(self.path / 'FixtureProfiles.db')
+                #The main window shares one fixture DB between patch windows, so its connection and profile cache last between them
+                self.fixtureDB = fixtureDB if fixtureDB is not None else FixtureDB(profileDBPath())
+                self.importer = FixtureImporter(self.fixtureDB)
+                self.importer.progress.connect(self.importProgress)
+                self.importer.finished.connect(self.importFinished)
+                self.importer.failed.connect(self.handleError)
 
                 ###Layout
                 layout = QGridLayout()
@@ -504,16 +2905,22 @@ class PatchWindow(PIghtingWidget):
                 layout.addWidget(self.tableLabel, 0, 0, 1, 2)
 
                 self.fixtureManager = fixtureManager
-                self.fixTable = QTableWidget()
-                self.fixTable.setColumnCount(2)
-                self.columns = ['Manufacturer' , 'Fixture - Mode']
-                self.fixTable.setVerticalHeaderLabels(self.columns)
+                self.fixTable = QTableView()
+                #Creates the DB if it doesn't exist, then shows the first page of profiles
+                self.fixtureModel = FixtureBrowserModel(self.fixtureDB)
+                self.fixTable.setModel(self.fixtureModel)
+                self.fixTable.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
                 layout.addWidget(self.fixTable, 1, 0, 1, 3)
 
-                self.fetchData()
-
-                self.searchQuery = QLineEdit('Search for Fixture')
+                self.searchQuery = QLineEdit()
+                self.searchQuery.setPlaceholderText('Search for Fixture')
                 layout.addWidget(self.searchQuery, 2, 0)
+                #Search as you type, waiting for a pause in typing so every key press is not a query
+                self.searchTimer = QTimer(self)
+                self.searchTimer.setSingleShot(True)
+                self.searchTimer.setInterval(200)
+                self.searchTimer.timeout.connect(self.searchTable)
+                self.searchQuery.textChanged.connect(self.searchTimer.start)
 
                 searchButton = QPushButton('Search', clicked = self.searchTable)
                 layout.addWidget(searchButton, 2 , 1)
@@ -524,183 +2931,95 @@ class PatchWindow(PIghtingWidget):
                 patchButton =QPushButton('Patch Selected Fixture', clicked = self.patchFixture2)
                 layout.addWidget(patchButton, 4, 1)
 
-                self.fixTable.cellClicked.connect(self.patchFixture)
+                self.fixTable.clicked.connect(lambda index: self.patchFixture(index.row(), index.column()))
 
                 self.DMXAddress = QLineEdit('DMX Address')
                 layout.addWidget(self.DMXAddress, 3 , 0)
                 self.channel = QLineEdit('Channel')
                 layout.addWidget(self.channel, 3 , 1)
+                self.universe = QLineEdit('1')
+                self.universe.setToolTip('Universe')
+                layout.addWidget(self.universe, 3 , 2)
+
+                #Several units can be patched at once, on consecutive channels and spaced by the stride
+                self.quantity = QLineEdit('1')
+                self.quantity.setToolTip('Quantity')
+                layout.addWidget(self.quantity, 7, 0)
+                self.stride = QLineEdit()
+                self.stride.setPlaceholderText('Stride - leave blank to use the fixture footprint')
+                layout.addWidget(self.stride, 7, 1)
+
+                self.libraryPath = QLineEdit('Path to a local open-fixture-library clone or tarball')
+                layout.addWidget(self.libraryPath, 6, 0, 1, 2)
+                importButton = QPushButton('Import Local Library', clicked = self.importLibrary)
+                layout.addWidget(importButton, 6, 2)
 
                 layout.addWidget(self.errorMessage, 5, 0, 1, 3)
                 #---------Setting up UI end---------
                 
 
-        def fetchData(self):
-                conn = sqlite3.connect(self.DBPathStr)
-                cur = conn.cursor()     
-                #Create DB if it doesn't exist
-                cur.execute('''CREATE TABLE IF NOT EXISTS fixtures
-                            (fixName TEXT , channels TEXT)''')
-                cur.execute('''CREATE TABLE IF NOT EXISTS manufacturers
-                            (man TEXT , fixName TEXT)''')       
-                #Select all from the manufacturer db, then close the connection
-                cur.execute('SELECT * FROM manufacturers')
-                rows = cur.fetchall()
-                conn.close()    
-                #Insert data into table widget
-                for row in rows:
-                        index = rows.index(row)
-                        self.fixTable.insertRow(index)
-                        self.fixTable.setItem(index, 0, QTableWidgetItem(str(row[0])))
-                        self.fixTable.setItem(index, 1, QTableWidgetItem(str(row[1])))
-
-        def searchTable(self):
-                #Clear the table
-                self.fixTable.clearContents()
-
-                #Initialise db connection
-                conn = sqlite3.connect(self.DBPathStr)
-                cur = conn.cursor()
-                #Select fixture based on search field, using wildcard functionality of SQL to allow for spelling errors
-                cur.execute('''
-                            SELECT *
-                            FROM manufacturers
-                            WHERE man LIKE ?
-                            OR fixName LIKE ?''', 
-                            ('%' + str(self.searchQuery.text()) + '%' , '%' + str(self.searchQuery.text()) + '%')
-                            )
-                rows = cur.fetchall()
-                conn.close()
-                #Insert new data into table widget
-                for row in rows:
-                        index = rows.index(row)
-                        self.fixTable.insertRow(index)
-                        self.fixTable.setItem(index, 0, QTableWidgetItem(str(row[0])))
-                        self.fixTable.setItem(index, 1, QTableWidgetItem(str(row[1])))
-
-        def updateDB(self):
-                #Create database
-                conn = sqlite3.connect(self.DBPathStr)
-                #Create a cursor
-                cur = conn.cursor()
-                #Create Fixtures and manufacturers table
-                cur.execute('''CREATE TABLE IF NOT EXISTS fixtures
-                                (fixName TEXT , channels TEXT)''')
-                cur.execute('''CREATE TABLE IF NOT EXISTS manufacturers
-                                (man TEXT , fixName TEXT)''')
-                conn.commit()
-                #URL for the GitHub API
-                masterURL = "https://api.github.com/repos/OpenLightingProject/open-fixture-library/contents/fixtures"
-                #List of folder names taken from the manufacturers.json file
-                manURL = "https://raw.githubusercontent.com/OpenLightingProject/open-fixture-library/master/fixtures/manufacturers.json"
-                manDF = pd.read_json(manURL)
-                manDF = manDF.drop("$schema", axis='columns')
-                folders = manDF.columns
-                #Iterate through folders
-                successCode = 200
-                for folder in folders:
-                        folderURL = f"https://api.github.com/repos/OpenLightingProject/open-fixture-library/contents/fixtures/{folder}"
-                        #Fetch the contents of the folder using GitHub Requests API
-                        response = requests.get(folderURL)
-                        #Status code 200 = Request Succeeded
-                        if response.status_code == successCode:
-                                files = response.json()
-                                #Filter out JSON files using suffix
-                                jsonFiles = []
-                                for file in files:
-                                        if file['name'].endswith('.json'):
-                                                jsonFiles.append(file)
-                                for jsonFile in jsonFiles:
-                                        #Construct the download URL
-                                        downloadURL = jsonFile['download_url']
-                                        #Fetch the JSON file using requests API
-                                        response = requests.get(downloadURL)
-                                        if response.status_code == successCode:
-                                                #Converts into dictionary object for data processing
-                                                fixDict = response.json()
-                                                fixList = []
-                                                #This skips over .JSON files in the GitHub which are not fixtures
-                                                if 'redirectTo' in fixDict.keys():
-                                                        break
-                                                #Create a list of each mode
-                                                if 'modes' in fixDict.keys():
-                                                        for fixMode in fixDict['modes']:
-                                                                fixEntry = (
-                                                                    fixDict['name'] + ' - ' + fixMode['name'],
-                                                                    fixMode['channels']
-                                                                )
-                                                                fixList.append(fixEntry)
-                                                else:
-                                                    fixList.append(fixDict['name'],fixDict['channels'])
-                                                #Now insert into the fixture DB
-                                                #Check DB for entries where the count of the fixName is 0
-                                                for fixture , channels in fixList:
-                                                        cur.execute('''SELECT COUNT (*)
-                                                                FROM manufacturers
-                                                                WHERE fixName = ?''',
-                                                                (fixture,))
-                                                        count = cur.fetchone()[0]
-                                                        if count == 0:# Serialise the data into JSON so it can be stored in the table
-                                                                channelsJSON = json.dumps(channels)
-                                                                # Store it in the table
-                                                                cur.execute('''INSERT INTO manufacturers 
-                                                                    (man , fixName) 
-                                                                    VALUES (? , ?)''',
-                                                                    (folder , fixture)
-                                                                    )
-                                                        #Repeat process for fixture table
-                                                        cur.execute('''SELECT COUNT (*)
-                                                                FROM fixtures
-                                                                WHERE fixName = ?''',
-                                                                (fixture,))
-                                                        count = cur.fetchone()[0]
-                                                        if count == 0:
-                                                                channelsJSON = json.dumps(channels)
-                                                                cur.execute('''INSERT INTO fixtures 
-                                                                    (fixName , channels) 
-                                                                    VALUES (? , ?)''',
-                                                                    (fixture , channelsJSON)
-                                                                    )
-                                                        self.handleSuccess(f'Fixture profile for {fixture} retrieved')
-                                                conn.commit()
-                                                self.handleSuccess('Fixture profiles updated')
-                                        else:
-                                                self.handleError(f"Failed to download {jsonFile['name']}")
-                                        self.handleError('Fixtures Updated')
-                        else:
-                                self.handleError(f"Failed to fetch folder: {folder}")
-                #Close db objects
-                conn.close()
-                self.fetchData()
+        def searchTable(self):#Full-text search of maker, model and mode, matching the start of words so partial names work
+                try:
+                        self.fixtureModel.setSearch(self.searchQuery.text())
+                except sqlite3.Error as e:
+                        self.handleError(e)
+
+        def updateDB(self):#Syncs fixture profiles with the online library without blocking the UI. Only changed files are downloaded
+                try:
+                        self.importer.startSync()
+                        self.handleSuccess('Checking for updated fixture profiles...')
+                except RuntimeError as e:
+                        self.handleError(e)
+
+        def importLibrary(self):#Imports fixture profiles from a local copy of open-fixture-library without blocking the UI
+                try:
+                        source = self.libraryPath.text().strip()
+                        if not os.path.exists(source):
+                                raise FileNotFoundError(f'{source} does not exist')
+                        self.importer.startImport(source)
+                        self.handleSuccess('Importing fixture profiles...')
+                except (OSError, RuntimeError) as e:
+                        self.handleError(e)
+
+        def importProgress(self, parsed, total):
+                self.errorMessage.setText(f'Read {parsed} of {total} fixture files...')
+                self.errorMessage.setStyleSheet('color: yellow')
+
+        def importFinished(self, summary):
+                self.searchTable()
+                self.handleSuccess(f'Fixture profiles updated, {summary}')
 
         def patchFixture(self , row , column): #Creates a new Fixture object based on info in QTableWidgetItem
                 try:
                         DMXAddress = safeInt(self.DMXAddress.text(), 'DMX Address')
                         channel = safeInt(self.channel.text(), 'Channel')
-                        if DMXAddress > 512 or DMXAddress < 1: # Project currently only supports one DMX universe
-                               raise ValueError('DMX Address must be between 1 and 512')
+                        universe = safeInt(self.universe.text(), 'Universe')
+                        quantity = safeInt(self.quantity.text(), 'Quantity')
+                        stride = safeInt(self.stride.text(), 'Stride') if self.stride.text().strip() else None
+                        if DMXAddress > universeSize or DMXAddress < 1:
+                               raise ValueError(f'DMX Address must be between 1 and {universeSize}')
+                        if universe < 1:
+                               raise ValueError('Universe must be 1 or larger')
                         #This takes the name of the fixture from the table
-                        fixName = self.fixTable.item(row, 1).text()
-                        #This needs to be executed as an SQL query into the fixture table
-                        conn = sqlite3.connect(self.DBPathStr)
-                        cur = conn.cursor()
-                        cur.execute('''
-                                    SELECT *
-                                    FROM fixtures
-                                    WHERE fixName = ?''', 
-                                    (fixName,)
-                                    )
-                        SQLFix = cur.fetchone()
-                        #SQLFix[0] is the name of the fixture, that was serialised in updateDB. SQLFix[1] is the list of attributes serialised in updateDB.
-                        newFixture = Fixture(SQLFix[0], json.loads(SQLFix[1]), DMXAddress, channel)
-                        self.fixtureManager.addFixture(newFixture)
-                        self.handleSuccess(f'A {SQLFix[0]} fixture has been patched at channel {self.channel.text()}')
-                except (ValueError) as e:
+                        fixName = self.fixtureModel.fixtureName(row)
+                        #Every fixture of this type shares the one cached profile
+                        profile = self.fixtureDB.getProfile(fixName)
+                        if quantity == 1:
+                                if DMXAddress + len(profile.attributes) - 1 > universeSize:
+                                       raise ValueError(f'{profile.name} needs {len(profile.attributes)} slots and does not fit in the universe at address {DMXAddress}')
+                                newFixture = Fixture(profile.name, profile, DMXAddress, channel, universe)
+                                self.fixtureManager.addFixture(newFixture)
+                                self.handleSuccess(f'A {profile.name} fixture has been patched at channel {self.channel.text()}')
+                        else:
+                                newFixtures = self.fixtureManager.patchRange(profile.name, profile, quantity, DMXAddress, channel, universe, stride)
+                                last = newFixtures[-1]
+                                self.handleSuccess(f'{quantity} {profile.name} fixtures have been patched at channels {channel}-{last.channelNum}, ending at {last.universe}/{last.address}')
+                except (ValueError, KeyError, PatchError) as e:
                         self.handleError(e)
         
         def patchFixture2(self): #Users wanted a button to patch, functionality had to be added to acoomodate this
                 try:
-                        selectedCell = self.fixTable.selectedItems()
+                        selectedCell = self.fixTable.selectionModel().selectedRows()
                         if len(selectedCell) > 1:
                                 raise ValueError('Multiple fixtures selected')
                         if selectedCell:
@@ -715,6 +3034,10 @@ class PatchWindow(PIghtingWidget):
                         self.handleError(e)
 
 
+        def closeEvent(self, event):
+                self.fixtureModel.close()
+                super().closeEvent(event)
+
         def handleError(self, error):
                 self.errorMessage.setText(str(error))
                 self.errorMessage.setStyleSheet('color: red')
@@ -740,8 +3063,8 @@ class FixtureViewer(PIghtingWidget):
                 self.tableLabel = QLabel("Fixtures")
                 layout.addWidget(self.tableLabel, 0, 0)
                 self.fixTable = QTableWidget()
-                self.fixTable.setColumnCount(4)
-                self.columns = ['Channel #' , 'Address','Fixture', 'Attributes']
+                self.fixTable.setColumnCount(5)
+                self.columns = ['Channel #' , 'Address','Fixture', 'Attributes', 'Universe']
                 self.fixTable.setVerticalHeaderLabels(self.columns)
                 layout.addWidget(self.fixTable, 1, 0)
 
@@ -765,6 +3088,7 @@ class FixtureViewer(PIghtingWidget):
                         self.fixTable.setItem(chanList.index(channel), 1, QTableWidgetItem(str(newFixture.address)))
                         self.fixTable.setItem(chanList.index(channel), 2, QTableWidgetItem(str(newFixture.type)))
                         self.fixTable.setItem(chanList.index(channel), 3, QTableWidgetItem(str(newFixture.attributes)))
+                        self.fixTable.setItem(chanList.index(channel), 4, QTableWidgetItem(str(newFixture.universe)))
 
 class ColourPicker(PIghtingWidget):
         def __init__(self, data, fixtureManager):
@@ -800,9 +3124,9 @@ class ColourPicker(PIghtingWidget):
                         channel = safeInt(self.channelSelect.text(), 'Channel')
                         lantern = fixtureList[channel]
                         #Accounting for variance in attribute name
-                        if 'Red' in lantern.attributes:
+                        if lantern.hasAttribute('Red'):
                                 AttributeRGBStr = ('Red', 'Green', 'Blue')
-                        elif 'Red-All' in lantern.attributes:
+                        elif lantern.hasAttribute('Red-All'):
                                 AttributeRGBStr = ('Red-All', 'Green-All', 'Blue-All')
                         else:
                                 raise AttributeError(
@@ -813,17 +3137,18 @@ class ColourPicker(PIghtingWidget):
                         colourValues = zip(AttributeRGBStr,colourRGB)
                         for colour, value in colourValues:
                                 lantern.setAttribute(self.data, colour, value)
-                        sendOLA(self.data)
                         self.handleSuccess('Colour updated')
                 except (ValueError, AttributeError) as e:
                         self.handleError(e)
 
 class PanTiltHandler(PIghtingWidget):
-        def __init__(self, data, fixtureManager):
+        def __init__(self, data, fixtureManager, output=None):
                 super().__init__()
                 self.setWindowTitle('ML Controller')
 
                 self.data = data
+                #Movements start from the values currently on stage
+                self.output = output if output is not None else data
                 ###Controllers
                 self.fixtureManager = fixtureManager
 
@@ -899,10 +3224,10 @@ class PanTiltHandler(PIghtingWidget):
                         chanList.append(fixture)
                         chanList.sort()
                 for fixture in fixtureList.values():
-                        if 'Pan' in fixture.attributes or 'Tilt' in fixture.attributes:
+                        if fixture.hasAttribute('Pan') or fixture.hasAttribute('Tilt'):
                                 channel = safeInt(fixture.channelNum, 'Channel')
-                                panIndex = self.data[fixture.address - 1 + fixture.attributes.index('Pan')]
-                                tiltIndex = self.data[fixture.address - 1 + fixture.attributes.index('Tilt')]
+                                panIndex = fixture.getAttribute(self.output, 'Pan') if fixture.hasAttribute('Pan') else ''
+                                tiltIndex = fixture.getAttribute(self.output, 'Tilt') if fixture.hasAttribute('Tilt') else ''
                                 self.panTable.setItem(chanList.index(channel), 0, QTableWidgetItem(str(channel)))
                                 self.panTable.setItem(chanList.index(channel), 1, QTableWidgetItem(str(fixture.type)))
                                 self.panTable.setItem(chanList.index(channel), 2, QTableWidgetItem(str(panIndex)))
@@ -923,12 +3248,12 @@ class PanTiltHandler(PIghtingWidget):
                                         f'There is no fixutre patched to channel {channel}'
                                         )
                         fixture = fixtureList[channel]
-                        if 'Tilt' not in fixture.attributes:
+                        if not fixture.hasAttribute('Tilt'):
                                 raise IndexError(
                                         f'Channel {channel} has no attribute Tilt'
                                         )
-                        tiltSlotLoc = fixture.address+fixture.attributes.index('Tilt')-1
-                        tiltSlot = self.data[tiltSlotLoc]
+                        tiltSlotLoc = fixture.getSlot('Tilt')
+                        tiltSlot = self.output[fixture.universe][tiltSlotLoc]
                         #Manipulate tiltSlot
                         if self.invCheck.isChecked() is False:
                                 tiltSlot -= (1 * moveSpeed)
@@ -939,14 +3264,14 @@ class PanTiltHandler(PIghtingWidget):
                         if tiltSlot > 255:
                                 tiltSlot = 255
                         #Edit frame
-                        self.data[tiltSlotLoc] = tiltSlot
+                        self.data[fixture.universe][tiltSlotLoc] = tiltSlot
+                        self.data.markChanged(fixture.universe, [tiltSlotLoc])
                         #Update UI
                         self.panTable.setItem(
                                 chanList.index(channel), 
                                 3,#This is the column in the table that corresponds to tilt 
                                 QTableWidgetItem(str(tiltSlot))
                                 )
-                        sendOLA(self.data)
                         self.handleSuccess('Tilt Updated')
                 except (ValueError, KeyError, IndexError) as e:
                         self.handleError(e)
@@ -963,10 +3288,10 @@ class PanTiltHandler(PIghtingWidget):
                         if channel not in chanList:
                                 raise KeyError(f'There is no fixutre patched to channel {channel}')
                         fixture = fixtureList[channel]
-                        if 'Tilt' not in fixture.attributes:
+                        if not fixture.hasAttribute('Tilt'):
                                 raise IndexError(f'Channel {channel} has no attribute Tilt')
-                        tiltSlotLoc = fixture.address+fixture.attributes.index('Tilt')-1
-                        tiltSlot = self.data[tiltSlotLoc]
+                        tiltSlotLoc = fixture.getSlot('Tilt')
+                        tiltSlot = self.output[fixture.universe][tiltSlotLoc]
                         if self.invCheck.isChecked() is False:
                                 tiltSlot += (1 * moveSpeed)
                         if self.invCheck.isChecked() is True:
@@ -975,10 +3300,10 @@ class PanTiltHandler(PIghtingWidget):
                                 tiltSlot = 0
                         if tiltSlot > 255:
                                 tiltSlot = 255
-                        self.data[tiltSlotLoc] = tiltSlot
+                        self.data[fixture.universe][tiltSlotLoc] = tiltSlot
+                        self.data.markChanged(fixture.universe, [tiltSlotLoc])
                         self.panTable.setItem(chanList.index(channel), 3 #This is the column in the table that corresponds to tilt 
                                               , QTableWidgetItem(str(tiltSlot)))
-                        sendOLA(self.data)
                         self.handleSuccess('Tilt Updated')
                 except (ValueError, KeyError, IndexError) as e:
                         self.handleError(e)
@@ -995,19 +3320,19 @@ class PanTiltHandler(PIghtingWidget):
                         if channel not in chanList:
                                 raise KeyError(f'There is no fixutre patched to channel {channel}')
                         fixture = fixtureList[channel]
-                        if 'Pan' not in fixture.attributes:
+                        if not fixture.hasAttribute('Pan'):
                                 raise IndexError(f'Channel {channel} has no attribute Pan')
-                        panSlotLoc = fixture.address+fixture.attributes.index('Pan')-1
-                        panSlot = self.data[panSlotLoc]
+                        panSlotLoc = fixture.getSlot('Pan')
+                        panSlot = self.output[fixture.universe][panSlotLoc]
                         panSlot -= (1 * moveSpeed)
                         if panSlot < 0:
                                 panSlot = 0
                         if panSlot > 255:
                                 panSlot = 255
-                        self.data[panSlotLoc] = panSlot
+                        self.data[fixture.universe][panSlotLoc] = panSlot
+                        self.data.markChanged(fixture.universe, [panSlotLoc])
                         self.panTable.setItem(chanList.index(channel), 2 #Column 2 is the column in the table that corresponds to pan
                                               , QTableWidgetItem(str(panSlot)))
-                        sendOLA(self.data)
                         self.handleSuccess('Pan Updated')
                 except (ValueError, KeyError, IndexError) as e:
                         self.handleError(e)
@@ -1024,23 +3349,105 @@ class PanTiltHandler(PIghtingWidget):
                         if channel not in chanList:
                                 raise KeyError(f'There is no fixutre patched to channel {channel}')
                         fixture = fixtureList[channel]
-                        if 'Pan' not in fixture.attributes:
+                        if not fixture.hasAttribute('Pan'):
                                 raise IndexError(f'Channel {channel} has no attribute Pan')
-                        panSlotLoc = fixture.address+fixture.attributes.index('Pan')-1
-                        panSlot = self.data[panSlotLoc]
+                        panSlotLoc = fixture.getSlot('Pan')
+                        panSlot = self.output[fixture.universe][panSlotLoc]
                         panSlot += (1 * moveSpeed)
                         if panSlot < 0:
                                 panSlot = 0
                         if panSlot > 255:
                                 panSlot = 255
-                        self.data[panSlotLoc] = panSlot
+                        self.data[fixture.universe][panSlotLoc] = panSlot
+                        self.data.markChanged(fixture.universe, [panSlotLoc])
                         self.panTable.setItem(chanList.index(channel), 2 #Column 2 is the column in the table that corresponds to pan
                                               , QTableWidgetItem(str(panSlot)))
-                        sendOLA(self.data)
                         self.handleSuccess('Pan Updated')
                 except (ValueError, KeyError, IndexError) as e:
                         self.handleError(e)
 
+class EffectsWindow(PIghtingWidget):
+        def __init__(self, effectsEngine, fixtureManager):
+                super().__init__()
+                self.setWindowTitle('Effects')
+
+                ###Controllers
+                self.effectsEngine = effectsEngine
+                self.fixtureManager = fixtureManager
+
+                ###Layout
+                layout = QGridLayout()
+                self.setLayout(layout)
+
+                #---------Setting up UI---------
+                self.inputs = {}
+                fields = [
+                        ('Name', 'Chase 1'), ('Channels', 'i.e. 1-10 or 1,3,5'), ('Attribute', 'Dimmer'),
+                        ('Waveform', 'sine'), ('Rate (Hz)', '1'), ('Low', '0'), ('High', '255'),
+                        ('Phase Spread', '360'), ('Phase Offset', '0'), ('Fan', '0'),
+                        ]
+                for row, (label, default) in enumerate(fields):
+                        layout.addWidget(QLabel(label), row, 0)
+                        self.inputs[label] = QLineEdit(default)
+                        layout.addWidget(self.inputs[label], row, 1, 1, 2)
+
+                startButton = QPushButton('Start Effect', clicked = self.startEffect)
+                layout.addWidget(startButton, len(fields), 0)
+
+                stopButton = QPushButton('Stop Effect', clicked = self.stopEffect)
+                layout.addWidget(stopButton, len(fields), 1)
+
+                stopAllButton = QPushButton('Stop All Effects', clicked = self.stopAllEffects)
+                layout.addWidget(stopAllButton, len(fields), 2)
+
+                layout.addWidget(self.errorMessage, len(fields) + 1, 0, 1, 3)
+                #---------Setting up UI end---------
+
+        def parseChannels(self, text):#Reads a channel list such as 1-10 or 1,3,5
+                channels = []
+                for part in text.split(','):
+                        if '-' in part:
+                                first, last = part.split('-', 1)
+                                channels.extend(range(safeInt(first, 'Channel'), safeInt(last, 'Channel') + 1))
+                        else:
+                                channels.append(safeInt(part, 'Channel'))
+                return channels
+
+        def startEffect(self):
+                try:
+                        fixtureList = self.fixtureManager.getFixtureList()
+                        fixtures = []
+                        for channel in self.parseChannels(self.inputs['Channels'].text()):
+                                if channel not in fixtureList:
+                                        raise KeyError(f'There is no fixutre patched to channel {channel}')
+                                fixtures.append(fixtureList[channel])
+                        name = self.inputs['Name'].text().strip()
+                        if not name:
+                                raise ValueError('Effect name cannot be blank')
+                        effect = Effect(
+                                name, fixtures, self.inputs['Attribute'].text(), self.inputs['Waveform'].text().strip(),
+                                safeFloat(self.inputs['Rate (Hz)'].text(), 'Rate'),
+                                safeInt(self.inputs['Low'].text(), 'Low'), safeInt(self.inputs['High'].text(), 'High'),
+                                safeFloat(self.inputs['Phase Spread'].text(), 'Phase spread'), safeFloat(self.inputs['Phase Offset'].text(), 'Phase offset'),
+                                safeFloat(self.inputs['Fan'].text(), 'Fan'),
+                                )
+                        self.effectsEngine.addEffect(effect)
+                        self.handleSuccess(f'Started effect {name}')
+                except (KeyError, ValueError, IndexError) as e:
+                        self.handleError(e)
+
+        def stopEffect(self):
+                try:
+                        name = self.inputs['Name'].text().strip()
+                        self.effectsEngine.removeEffect(name)
+                        self.handleSuccess(f'Stopped effect {name}')
+                except KeyError as e:
+                        self.handleError(e)
+
+        def stopAllEffects(self):
+                self.effectsEngine.clearEffects()
+                self.handleSuccess('Stopped all effects')
+
 class DebugWindow(PIghtingWidget):#Some functions were created in developing the software which are not part of system requiremnets, but may be useful anyway
         def __init__(self, data, cueManager, fixtureManager):
                 super().__init__()
@@ -1064,6 +3471,11 @@ class DebugWindow(PIghtingWidget):#Some functions were created in developing the
                 self.slotInput = QLineEdit()
                 layout.addWidget(self.slotInput, 1, 1)
 
+                universeLabel = QLabel('Universe')
+                layout.addWidget(universeLabel, 3, 0)
+                self.universeInput = QLineEdit('1')
+                layout.addWidget(self.universeInput, 3, 1)
+
                 valueLabel = QLabel('Value')
                 layout.addWidget(valueLabel, 1, 2)
                 self.valueInput = QLineEdit()
@@ -1077,6 +3489,12 @@ class DebugWindow(PIghtingWidget):#Some functions were created in developing the
 
                 viewFixtures = QPushButton('View Fixtures', clicked = self.viewFixList)
                 layout.addWidget(viewFixtures, 2, 4)
+
+                viewOutput = QPushButton('View Output Stats', clicked = self.viewOutputStats)
+                layout.addWidget(viewOutput, 2, 2)
+
+                findFixture = QPushButton('Find Fixture at Slot', clicked = self.findFixture)
+                layout.addWidget(findFixture, 3, 2)
                 #---------Setting up UI end---------
 
         
@@ -1086,9 +3504,10 @@ class DebugWindow(PIghtingWidget):#Some functions were created in developing the
                         channel = safeInt(channel, 'Channel')
                         value = self.valueInput.text()
                         value = safeInt(value, 'Value')
-                        self.data[channel] = value
-                        sendOLA(self.data)
-                        dataOut = str(self.data)
+                        universe = safeInt(self.universeInput.text(), 'Universe')
+                        self.data[universe][channel] = value
+                        self.data.markChanged(universe, [channel])
+                        dataOut = str(self.data[universe])
                         self.output.setText(dataOut)
                 except (ValueError) as e:
                         self.output.setText(e)
@@ -1104,38 +3523,93 @@ class DebugWindow(PIghtingWidget):#Some functions were created in developing the
                 fixList = self.fixtureManager.getFixtureList()
                 displayList = []
                 for k,v in fixList.items():
-                        displayList.append((k, v.type, v.address, v.channelNum, v.attributes))
+                        displayList.append((k, v.type, v.universe, v.address, v.channelNum, v.attributes))
                 self.output.setText(str(displayList))
-                
-def DmxSent(status):#Adapted from code at https://github.com/OpenLightingProject/ola/blob/master/python/examples/ola_send_dmx.py
-        if status.Succeeded():
-                print('Success!')
-        else:
-                print('Error: %s' % status.message, file=sys.stderr)
-        global wrapper
-        if wrapper:
-                wrapper.Stop()
 
+        def findFixture(self):#Shows which fixture occupies the slot in the slot input
+                try:
+                        slot = safeInt(self.slotInput.text(), 'Slot')
+                        universe = safeInt(self.universeInput.text(), 'Universe')
+                        #Slots in this window are indexes, addresses start from 1
+                        fixture = self.fixtureManager.getFixtureAt(universe, slot + 1)
+                        if fixture is None:
+                                self.output.setText(f'No fixture at universe {universe} address {slot + 1}')
+                        else:
+                                self.output.setText(f'Channel {fixture.channelNum}: {fixture.type} at universe {fixture.universe} address {fixture.address}')
+                except (ValueError) as e:
+                        self.output.setText(str(e))
+
+        def viewOutputStats(self):
+                if transport is None:
+                        self.output.setText('No output transport running')
+                else:
+                        self.output.setText(str(transport.getStats()))
+                
 def safeInt(target, context):
        try:
               return int(target)
        except (ValueError):
               raise ValueError(f'{context} must be an interger')
        
-def sendOLA(frame): #Adapted from code at https://github.com/OpenLightingProject/ola/blob/master/python/examples/ola_send_dmx.py
-        if sys.platform == 'win32': #OLA does not support Windows. Use this to print the outputs of frames if on Windows.
-                print(frame)
+def safeFloat(target, context):
+       try:
+              return float(target)
+       except (ValueError):
+              raise ValueError(f'{context} must be a number')
+
+#Cue numbers can be whole or point cues such as 12.5. Whole numbers are kept as int, point cues as exact Decimals
+def normaliseCueID(cueID):
+        if isinstance(cueID, int):
+                return cueID
+        cueID = Decimal(str(cueID))
+        if not cueID.is_finite():
+                raise ValueError('Cue must be a number')
+        if cueID == cueID.to_integral_value():
+                return int(cueID)
+        return cueID.normalize()
+
+def safeCueID(target, context):
+       try:
+              return normaliseCueID(str(target).strip())
+       except (InvalidOperation, ValueError):
+              raise ValueError(f'{context} must be a number, such as 12 or 12.5')
+
+def sendOLA(frame, universes=None): #Hands the given universes of a frame (all of them by default) to the output transport, which sends them without waiting
+        if transport is not None:
+                if universes is None:
+                        universes = frame.getUniverses()
+                for universe in universes:
+                        transport.send(universe, frame.get(universe))
+
+#Where the fixture profile database is kept, creating the folder if needed
+def profileDBPath():
+        home = Path.home()
+        if sys.platform == 'win32':
+                path = home / "AppData/Roaming/pighting"
         else:
-                global client
-                global wrapper
-                client.SendDmx(1, frame, DmxSent)
-                wrapper.Run()
+                path = home / ".local/share/pighting"
+        os.makedirs(str(path), exist_ok=True) #~/.local/share may not exist yet on a new account
+        return str(path / 'FixtureProfiles.db')
+
+#Where the autosave journal and snapshots are kept, next to the fixture profile database
+def autosavePath():
+        path = Path(profileDBPath()).parent / 'autosave'
+        os.makedirs(str(path), exist_ok=True)
+        return str(path)
+
+#The output transport used by sendOLA, created when the application starts
+transport = None
+
 if __name__ == '__main__':
         #Functional code for instantiating the Application
         app = QApplication(sys.argv)
+        if sys.platform == 'win32': #OLA does not support Windows. Use this to print the outputs of frames if on Windows.
+                transport = PrintTransport()
+        else:
+                transport = OLATransport()
+        transport.start()
         window = MainWindow()
         window.showMaximized()
-        if sys.platform == 'linux':
-                wrapper = ClientWrapper() 
-                client = wrapper.Client() 
-        sys.exit(app.exec())
+        exitCode = app.exec()
+        transport.stop()
+        sys.exit(exitCode)
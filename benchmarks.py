@@ -0,0 +1,693 @@
+#Benchmark suite for the PIghting Controller. Run with: python benchmarks.py [names] [--output results.json] [--compare earlier.json]
+#Every benchmark runs headless in its own process, so the peak memory of each is measured on its own, and the results are saved as JSON.
+#The application file name contains spaces, so it is loaded by path rather than imported
+from array import array
+import argparse
+import datetime
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import pickle
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen') #Benchmarks that build widgets run without a display
+appPath = Path(__file__).with_name('PIghting v1.0.0.py')
+spec = importlib.util.spec_from_file_location('pighting', appPath)
+pighting = importlib.util.module_from_spec(spec)
+sys.modules['pighting'] = pighting #Lets worker processes find functions from the application
+spec.loader.exec_module(pighting)
+
+#The fixture profile database the fixture DB benchmarks copy, the one shipped with the application unless --db is given
+profileSnapshot = Path(__file__).with_name('FixtureProfiles.db')
+
+#The per-slot loop findIntermediates used before the fade kernel, kept as a reference for speed and output
+def legacyFindIntermediates(cueManager, currentFrame, nextFrame, rate, currentStep, fadeIn, fadeOut):
+        fadeArray = array('B', [])
+        factorIn, factorOut = cueManager.fadeFactors(rate, currentStep, fadeIn, fadeOut)
+        for slotNo in range(len(currentFrame)):
+                if currentFrame[slotNo] > nextFrame[slotNo]:
+                        intermediate = math.floor(cueManager.interpolate(currentFrame[slotNo], nextFrame[slotNo], factorOut))
+                if currentFrame[slotNo] < nextFrame[slotNo]:
+                        intermediate = math.floor(cueManager.interpolate(currentFrame[slotNo], nextFrame[slotNo], factorIn))
+                if currentFrame[slotNo] == nextFrame[slotNo]:
+                        intermediate = currentFrame[slotNo]
+                fadeArray.append(intermediate)
+        return fadeArray
+
+def randomFrame(rng):
+        return array('B', [rng.randrange(256) for slot in range(512)])
+
+#Prints a result line and returns the measurements, which the suite saves
+def report(line, **measurements):
+        print(line)
+        return measurements
+
+#Times a function and returns how many calls per second it manages
+def callsPerSecond(function, minTime=1.0):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0
+        while elapsed < minTime:
+                function()
+                calls += 1
+                elapsed = time.perf_counter() - start
+        return calls / elapsed
+
+def benchFades(rate=50, fadeIn=3, fadeOut=5):
+        rng = random.Random(512)
+        cueManager = pighting.CueManager()
+        startFrame = randomFrame(rng)
+        endFrame = randomFrame(rng)
+        maxSteps = max(fadeIn, fadeOut) * rate
+        #Check every step of a fade is byte-identical before timing anything
+        kernel = pighting.FadeKernel(startFrame, endFrame)
+        for step in range(maxSteps + 1):
+                expected = legacyFindIntermediates(cueManager, startFrame, endFrame, rate, step, fadeIn, fadeOut)
+                if cueManager.findIntermediates(startFrame, endFrame, rate, step, fadeIn, fadeOut, kernel) != expected:
+                        raise AssertionError(f'Fade kernel output differs from the per-slot loop at step {step}')
+        steps = iter(range(10**9))
+        before = callsPerSecond(lambda: legacyFindIntermediates(
+                cueManager, startFrame, endFrame, rate, next(steps) % maxSteps, fadeIn, fadeOut))
+        after = callsPerSecond(lambda: cueManager.findIntermediates(
+                startFrame, endFrame, rate, next(steps) % maxSteps, fadeIn, fadeOut, kernel))
+        backend = 'numpy' if pighting.np is not None else 'pure python'
+        return report(f'Crossfade frames/s  per-slot loop: {before:10.0f}   fade kernel ({backend}): {after:10.0f}   x{after / before:.1f}',
+                      loopFramesPerSecond=before, kernelFramesPerSecond=after, backend=backend)
+
+#The getNextCue used before the sorted cue index, which sorted every cue ID on each GO
+def legacyGetNextCue(cueManager):
+        cueIDS = list(cueManager.cueList.keys())
+        cueIDS.sort()
+        if cueManager.playbackPointer == 0:
+                cueManager.playbackPointer = min(cueIDS)
+                return cueManager.cueList[min(cueIDS)]
+        playbackPosition = cueIDS.index(cueManager.playbackPointer)
+        if playbackPosition == len(cueIDS) - 1:
+                raise IndexError('Final cue in cuelist')
+        cueManager.playbackPointer = cueIDS[playbackPosition + 1]
+        return cueManager.cueList[cueManager.playbackPointer]
+
+def benchCueIndex(cueCount=10000):
+        rng = random.Random(10000)
+        cueManager = pighting.CueManager()
+        #Whole cues in a shuffled order, with a point cue after every tenth cue
+        cueIDs = list(range(1, cueCount + 1))
+        rng.shuffle(cueIDs)
+        start = time.perf_counter()
+        for cueID in cueIDs:
+                cueManager.addCue(cueID)
+                if cueID % 10 == 0:
+                        cueManager.addCue(pighting.normaliseCueID(f'{cueID}.5'))
+        addTime = time.perf_counter() - start
+        totalCues = len(cueManager.getCueIDs())
+        print(f'Cue index           added {totalCues} cues in {addTime * 1000:.1f} ms')
+        steps = 500
+        cueManager.setPlaybackCue(0)
+        start = time.perf_counter()
+        for step in range(steps):
+                legacyGetNextCue(cueManager)
+        before = (time.perf_counter() - start) / steps
+        cueManager.setPlaybackCue(0)
+        start = time.perf_counter()
+        for step in range(totalCues - 1):
+                cueManager.getNextCue()
+        after = (time.perf_counter() - start) / (totalCues - 1)
+        print(f'Next cue ({totalCues} cues) sort and scan: {before * 1e6:10.1f} us   sorted index: {after * 1e6:10.2f} us   x{before / after:.0f}')
+        start = time.perf_counter()
+        for step in range(steps):
+                first = rng.randrange(1, cueCount - 100)
+                cueManager.getCueRange(first, first + 100)
+        rangeTime = (time.perf_counter() - start) / steps
+        return report(f'Cue range lookup (100 cues): {rangeTime * 1e6:10.1f} us', cues=totalCues, addMilliseconds=addTime * 1000,
+                      sortAndScanMicroseconds=before * 1e6, nextCueMicroseconds=after * 1e6, cueRangeMicroseconds=rangeTime * 1e6)
+
+def benchFixtureIndex(universes=32, channelsPerFixture=4):
+        rng = random.Random(32)
+        fixtureManager = pighting.FixtureManager()
+        attributes = ['Dimmer', 'Red', 'Green', 'Blue'][:channelsPerFixture]
+        perUniverse = 512 // channelsPerFixture
+        start = time.perf_counter()
+        for universe in range(1, universes + 1):
+                for unit in range(perUniverse):
+                        channelNum = (universe - 1) * perUniverse + unit + 1
+                        fixtureManager.addFixture(pighting.Fixture('Bench', attributes, unit * channelsPerFixture + 1, channelNum, universe))
+        patchTime = time.perf_counter() - start
+        fixtureCount = len(fixtureManager.getFixtureList())
+        print(f'Fixture index       patched {fixtureCount} fixtures over {universes} universes in {patchTime * 1000:.1f} ms')
+        lookups = [(rng.randrange(1, universes + 1), rng.randrange(1, 513)) for lookup in range(20000)]
+        start = time.perf_counter()
+        for universe, address in lookups[:200]:
+                for fixture in fixtureManager.getFixtureList().values():
+                        first, last = fixture.getFootprint()
+                        if fixture.universe == universe and first <= address <= last:
+                                break
+        before = (time.perf_counter() - start) / 200
+        start = time.perf_counter()
+        for universe, address in lookups:
+                fixtureManager.getFixtureAt(universe, address)
+        after = (time.perf_counter() - start) / len(lookups)
+        return report(f'Slot -> fixture     full scan: {before * 1e6:10.1f} us   address index: {after * 1e6:10.2f} us   x{before / after:.0f}',
+                      fixtures=fixtureCount, patchMilliseconds=patchTime * 1000, fullScanMicroseconds=before * 1e6, addressIndexMicroseconds=after * 1e6)
+
+#Playbacks fading at the same time, each changing a few slots of one universe
+def benchPlaybacks(playbackCount=16, changedSlots=32):
+        rng = random.Random(16)
+        engine = pighting.PlaybackEngine(pighting.CueManager())
+        for number in range(playbackCount):
+                playback = engine.addPlayback(f'Playback {number}')
+                startFrame = pighting.Frame()
+                endFrame = pighting.Frame()
+                for slotNo in rng.sample(range(512), changedSlots):
+                        startFrame[number % 4 + 1][slotNo] = rng.randrange(128)
+                        endFrame[number % 4 + 1][slotNo] = rng.randrange(128, 256)
+                engine.startFade(startFrame, endFrame, 3, 3, number, playback=playback.name)
+        playbacks = [engine.getPlayback(name) for name in engine.getPlaybacks() if engine.isFading(name)]
+        factors = [(0.5, 0.5)] * len(playbacks)
+        def separate():
+                for playback, (factorIn, factorOut) in zip(playbacks, factors):
+                        playback.fade.transition.apply(playback.layer, factorIn, factorOut)
+        batch = pighting.FadeBatch(playbacks)
+        before = callsPerSecond(separate)
+        after = callsPerSecond(lambda: batch.apply(factors))
+        return report(f'{len(playbacks)} playback fades/tick  one at a time: {before:10.0f}   batched: {after:10.0f}   x{after / before:.1f}',
+                      playbacks=len(playbacks), separateTicksPerSecond=before, batchedTicksPerSecond=after)
+
+#A pan/tilt circle on moving heads, against setting each fixture's attributes one at a time
+def benchEffects(fixtureCount=200):
+        fixtureManager = pighting.FixtureManager()
+        attributes = ['Pan', 'Pan fine', 'Tilt', 'Tilt fine', 'Dimmer', 'Red', 'Green', 'Blue']
+        for number in range(fixtureCount):
+                perUniverse = 512 // len(attributes)
+                universe = number // perUniverse + 1
+                address = (number % perUniverse) * len(attributes) + 1
+                fixtureManager.addFixture(pighting.Fixture('Bench', attributes, address, number + 1, universe))
+        fixtures = list(fixtureManager.getFixtureList().values())
+        layer = pighting.MergeEngine(fixtureManager).getLayer('Effects')
+        elapsed = iter(range(10**9))
+        def perFixture():
+                time = next(elapsed) / 50
+                for position, fixture in enumerate(fixtures):
+                        angle = 2 * math.pi * (time * 0.5 + position / len(fixtures))
+                        fixture.setAttribute16(layer, 'Pan', round(32767.5 + 32767.5 * math.sin(angle)))
+                        fixture.setAttribute16(layer, 'Tilt', round(32767.5 + 32767.5 * math.cos(angle)))
+        pan = pighting.Effect('Pan', fixtures, 'Pan')
+        tilt = pighting.Effect('Tilt', fixtures, 'Tilt', phaseOffset=90)
+        def vectorised():
+                time = next(elapsed) / 50
+                pan.apply(layer, time)
+                tilt.apply(layer, time)
+        before = callsPerSecond(perFixture)
+        after = callsPerSecond(vectorised)
+        return report(f'{fixtureCount} head circle frames/s  per fixture: {before:10.0f}   effect: {after:10.0f}   x{after / before:.1f}',
+                      fixtures=fixtureCount, perFixtureFramesPerSecond=before, effectFramesPerSecond=after)
+
+#Writes a checkout shaped like open-fixture-library, with a redirect file in every manufacturer folder
+def makeFixtureLibrary(root, manufacturers=100, fixturesPerManufacturer=40):
+        fixtures = Path(root) / 'fixtures'
+        fixtures.mkdir(parents=True)
+        (fixtures / 'manufacturers.json').write_text(json.dumps({'$schema': 'manufacturers.json'}))
+        attributes = ['Dimmer', 'Red', 'Green', 'Blue', 'White', 'Pan', 'Pan fine', 'Tilt', 'Tilt fine', 'Zoom']
+        for man in range(manufacturers):
+                folder = fixtures / f'manufacturer-{man}'
+                folder.mkdir()
+                (folder / 'redirect.json').write_text(json.dumps({'redirectTo': 'other/fixture', 'reason': 'SameAsDifferentBrand'}))
+                for number in range(fixturesPerManufacturer):
+                        modes = [{'name': f'{count}ch', 'channels': attributes[:count]} for count in (4, 6, 10)]
+                        (folder / f'fixture-{number}.json').write_text(json.dumps({'name': f'Fixture {man}-{number}', 'modes': modes}))
+        return fixtures
+
+#The row at a time insert updateDB used, checking each fixture with a query before inserting it
+def legacyInsert(dbPath, fixtures):
+        conn = sqlite3.connect(dbPath)
+        cur = conn.cursor()
+        cur.execute('CREATE TABLE IF NOT EXISTS fixtures (fixName TEXT , channels TEXT)')
+        cur.execute('CREATE TABLE IF NOT EXISTS manufacturers (man TEXT , fixName TEXT)')
+        for path in sorted(fixtures.glob('*/*.json')):
+                fixDict = json.loads(path.read_text())
+                if 'redirectTo' in fixDict:
+                        continue
+                for fixMode in fixDict['modes']:
+                        fixture = fixDict['name'] + ' - ' + fixMode['name']
+                        cur.execute('SELECT COUNT (*) FROM manufacturers WHERE fixName = ?', (fixture,))
+                        if cur.fetchone()[0] == 0:
+                                cur.execute('INSERT INTO manufacturers (man , fixName) VALUES (? , ?)', (path.parent.name, fixture))
+                        cur.execute('SELECT COUNT (*) FROM fixtures WHERE fixName = ?', (fixture,))
+                        if cur.fetchone()[0] == 0:
+                                cur.execute('INSERT INTO fixtures (fixName , channels) VALUES (? , ?)', (fixture, json.dumps(fixMode['channels'])))
+                conn.commit()
+        conn.close()
+
+def benchImport(manufacturers=100, fixturesPerManufacturer=40):
+        with tempfile.TemporaryDirectory() as root:
+                fixtures = makeFixtureLibrary(root, manufacturers, fixturesPerManufacturer)
+                start = time.perf_counter()
+                legacyInsert(str(Path(root) / 'legacy.db'), fixtures)
+                before = time.perf_counter() - start
+                start = time.perf_counter()
+                added = pighting.FixtureDB(str(Path(root) / 'bulk.db')).importLibrary(root)
+                after = time.perf_counter() - start
+        return report(f'Library import ({added} fixture modes)  row at a time: {before:6.2f} s   bulk: {after:6.2f} s   x{before / after:.1f}',
+                      profiles=added, rowAtATimeSeconds=before, bulkSeconds=after)
+
+#Looks fixtures up by name the way patchFixture does, in the shipped database before and after it is migrated to the indexed layout
+def benchProfileLookup(lookups=2000):
+        with tempfile.TemporaryDirectory() as root:
+                dbPath = str(Path(root) / 'FixtureProfiles.db')
+                shutil.copy(profileSnapshot, dbPath)
+                conn = sqlite3.connect(dbPath)
+                names = [row[0] for row in conn.execute('SELECT fixName FROM fixtures')]
+                rng = random.Random(2618)
+                targets = [rng.choice(names) for lookup in range(lookups)]
+                def lookupAll(conn):
+                        start = time.perf_counter()
+                        for fixName in targets:
+                                conn.execute('SELECT * FROM fixtures WHERE fixName = ?', (fixName,)).fetchone()
+                        return (time.perf_counter() - start) / lookups
+                before = lookupAll(conn)
+                conn.close()
+                start = time.perf_counter()
+                conn = pighting.FixtureDB(dbPath).connect()
+                migrateTime = time.perf_counter() - start
+                after = lookupAll(conn)
+                conn.close()
+        return report(f'Profile lookup ({len(names)} profiles)  unindexed: {before * 1e6:8.1f} us   indexed: {after * 1e6:8.1f} us   x{before / after:.0f}   (migration {migrateTime * 1000:.0f} ms)',
+                      profiles=len(names), unindexedMicroseconds=before * 1e6, indexedMicroseconds=after * 1e6, migrationMilliseconds=migrateTime * 1000)
+
+#Builds a database in the original layout, repeating the shipped profiles to reach the size of the whole of open-fixture-library
+def makeScaledDB(dbPath, copies=8):
+        shipped = sqlite3.connect(str(profileSnapshot))
+        fixtures = shipped.execute('SELECT fixName , channels FROM fixtures').fetchall()
+        makers = shipped.execute('SELECT man , fixName FROM manufacturers').fetchall()
+        shipped.close()
+        conn = sqlite3.connect(dbPath)
+        conn.execute('CREATE TABLE fixtures (fixName TEXT , channels TEXT)')
+        conn.execute('CREATE TABLE manufacturers (man TEXT , fixName TEXT)')
+        for copy in range(copies):
+                conn.executemany('INSERT INTO fixtures VALUES (? , ?)', [(f'{fixName} {copy}', channels) for fixName, channels in fixtures])
+                conn.executemany('INSERT INTO manufacturers VALUES (? , ?)', [(man, f'{fixName} {copy}') for man, fixName in makers])
+        conn.commit()
+        return conn, len(fixtures) * copies
+
+#Searches the scaled library with the old LIKE scan and the full-text index
+def benchSearch(copies=8, queries=('spi', 'chauvet par', 'robe spot 16', 'led')):
+        with tempfile.TemporaryDirectory() as root:
+                dbPath = str(Path(root) / 'FixtureProfiles.db')
+                conn, profileCount = makeScaledDB(dbPath, copies)
+                def timeQueries(search):
+                        times = []
+                        for query in queries:
+                                start = time.perf_counter()
+                                results = len(search(query))
+                                times.append((query, results, time.perf_counter() - start))
+                        return times
+                before = timeQueries(lambda query: conn.execute('SELECT * FROM manufacturers WHERE man LIKE ? OR fixName LIKE ?', ('%' + query + '%', '%' + query + '%')).fetchall())
+                conn.close()
+                fixtureDB = pighting.FixtureDB(dbPath)
+                fixtureDB.connect().close() #Migrates the database and builds the search index
+                after = timeQueries(fixtureDB.searchProfiles)
+        print(f'Fixture search ({profileCount} profiles)')
+        queryResults = {}
+        for (query, likeResults, likeTime), (query, textResults, textTime) in zip(before, after):
+                queryResults[query] = report(f'    {query!r:16} LIKE scan: {likeTime * 1000:6.2f} ms ({likeResults:5} rows)   full-text: {textTime * 1000:6.2f} ms ({textResults:5} rows)',
+                                             likeMilliseconds=likeTime * 1000, likeRows=likeResults, fullTextMilliseconds=textTime * 1000, fullTextRows=textResults)
+        return {'profiles': profileCount, 'queries': queryResults}
+
+#Filling the patch window's fixture table: every row into a QTableWidget as fetchData did, against the paged model
+def benchBrowser(copies=(1, 2, 8)):
+        from PyQt6.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+        app = QApplication.instance() or QApplication([])
+        sizes = {}
+        for count in copies:
+                with tempfile.TemporaryDirectory() as root:
+                        dbPath = str(Path(root) / 'FixtureProfiles.db')
+                        conn, profileCount = makeScaledDB(dbPath, count)
+                        if count <= 2: #The row at a time fill is quadratic, so it is only timed on smaller libraries
+                                start = time.perf_counter()
+                                table = QTableWidget()
+                                table.setColumnCount(2)
+                                rows = conn.execute('SELECT * FROM manufacturers').fetchall()
+                                for row in rows:
+                                        index = rows.index(row)
+                                        table.insertRow(index)
+                                        table.setItem(index, 0, QTableWidgetItem(str(row[0])))
+                                        table.setItem(index, 1, QTableWidgetItem(str(row[1])))
+                                before = time.perf_counter() - start
+                        else:
+                                before = None
+                        conn.close()
+                        fixtureDB = pighting.FixtureDB(dbPath)
+                        fixtureDB.connect().close()
+                        start = time.perf_counter()
+                        model = pighting.FixtureBrowserModel(fixtureDB)
+                        model.setSearch('par')
+                        after = time.perf_counter() - start
+                        model.close()
+                fillTable = f'{before * 1000:8.1f} ms' if before is not None else '     n/a   '
+                sizes[str(profileCount)] = report(f'Fixture browser ({profileCount:6} profiles)  fill table: {fillTable}   open and search paged model: {after * 1000:6.1f} ms',
+                                                  fillTableMilliseconds=before * 1000 if before is not None else None, pagedModelMilliseconds=after * 1000)
+        return {'profiles': sizes}
+
+#Patching many units of one moving head: a new connection, query and JSON parse per unit as patchFixture did, against the shared connection and profile cache
+def benchPatchProfiles(units=100, fixName='Spica 250M - 16bit'):
+        with tempfile.TemporaryDirectory() as root:
+                dbPath = str(Path(root) / 'FixtureProfiles.db')
+                shutil.copy(profileSnapshot, dbPath)
+                fixtureDB = pighting.FixtureDB(dbPath)
+                fixtureDB.connect().close() #Migrate before timing either approach
+                def patchAll(makeFixture):
+                        tracemalloc.start()
+                        start = time.perf_counter()
+                        fixtures = [makeFixture(unit) for unit in range(units)]
+                        elapsed = time.perf_counter() - start
+                        memory = tracemalloc.get_traced_memory()[0]
+                        tracemalloc.stop()
+                        return elapsed, memory, fixtures
+                def legacyPatch(unit):
+                        conn = sqlite3.connect(dbPath)
+                        row = conn.execute('SELECT * FROM fixtures WHERE fixName = ?', (fixName,)).fetchone()
+                        conn.close()
+                        return pighting.Fixture(row[0], json.loads(row[1]), 1, unit + 1)
+                def cachedPatch(unit):
+                        profile = fixtureDB.getProfile(fixName)
+                        return pighting.Fixture(profile.name, profile, 1, unit + 1)
+                beforeTime, beforeMemory, fixtures = patchAll(legacyPatch)
+                afterTime, afterMemory, fixtures = patchAll(cachedPatch)
+                fixtureDB.close()
+        return report(f'Patch {units} of one fixture  per unit query: {beforeTime * 1000:6.1f} ms {beforeMemory / 1024:6.0f} KiB   cached profile: {afterTime * 1000:6.1f} ms {afterMemory / 1024:6.0f} KiB',
+                      units=units, perUnitQueryMilliseconds=beforeTime * 1000, perUnitQueryBytes=beforeMemory, cachedProfileMilliseconds=afterTime * 1000, cachedProfileBytes=afterMemory)
+
+#Patching a rig unit by unit, working out each address by hand, against one bulk range
+def benchBulkPatch(units=4096, footprint=8):
+        profile = pighting.FixtureProfile('Bench Fixture', [f'slot{slot}' for slot in range(footprint)])
+        perUnit = pighting.FixtureManager()
+        start = time.perf_counter()
+        for unit in range(units):
+                universe, address = divmod(unit * footprint, pighting.universeSize)
+                perUnit.addFixture(pighting.Fixture(profile.name, profile, address + 1, unit + 1, universe + 1))
+        perUnitTime = time.perf_counter() - start
+        bulk = pighting.FixtureManager()
+        start = time.perf_counter()
+        bulk.patchRange(profile.name, profile, units, 1, 1)
+        bulkTime = time.perf_counter() - start
+        assert [(fixture.universe, fixture.address) for fixture in perUnit.getFixtureList().values()] == [(fixture.universe, fixture.address) for fixture in bulk.getFixtureList().values()]
+        return report(f'Patch {units} fixtures  one at a time: {perUnitTime * 1000:6.1f} ms   patchRange: {bulkTime * 1000:6.1f} ms',
+                      fixtures=units, oneAtATimeMilliseconds=perUnitTime * 1000, patchRangeMilliseconds=bulkTime * 1000)
+
+#Saving and loading a large show as the old append-mode pickle and as a show file
+def benchShowFile(cues=2000, universes=4, fixtures=512):
+        rng = random.Random(21)
+        cueManager = pighting.CueManager()
+        for cueID in range(1, cues + 1):
+                cueManager.addCue(cueID, pighting.Frame({universe: randomFrame(rng) for universe in range(1, universes + 1)}))
+        fixtureManager = pighting.FixtureManager()
+        fixtureManager.patchRange('Bench Fixture', [f'slot{slot}' for slot in range(4)], fixtures, 1, 1)
+        with tempfile.TemporaryDirectory() as root:
+                picklePath = str(Path(root) / 'show.pkl')
+                showPath = str(Path(root) / 'show.show')
+                start = time.perf_counter()
+                with open(picklePath, 'ab') as file:
+                        pickle.dump({'cueList': cueManager.getCueList(), 'fixtureList': fixtureManager.getFixtureList()}, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickleSave = time.perf_counter() - start
+                start = time.perf_counter()
+                with open(picklePath, 'rb') as file:
+                        pickle.load(file)
+                pickleLoad = time.perf_counter() - start
+                start = time.perf_counter()
+                pighting.writeShowFile(showPath, cueManager.getCueList(), fixtureManager.getFixtureList())
+                showSave = time.perf_counter() - start
+                start = time.perf_counter()
+                cueList, fixtureList = pighting.readShowFile(showPath)
+                showLoad = time.perf_counter() - start
+                assert all(cueList[cueID].frame.universes == cue.frame.universes for cueID, cue in cueManager.getCueList().items())
+                pickleSize, showSize = os.path.getsize(picklePath), os.path.getsize(showPath)
+        return report(f'Show of {cues} cues x {universes} universes  pickle: save {pickleSave * 1000:6.1f} ms load {pickleLoad * 1000:6.1f} ms {pickleSize / 1024:7.0f} KiB' +
+                      f'   show file: save {showSave * 1000:6.1f} ms load {showLoad * 1000:6.1f} ms {showSize / 1024:7.0f} KiB',
+                      cues=cues, pickleSaveMilliseconds=pickleSave * 1000, pickleLoadMilliseconds=pickleLoad * 1000, pickleBytes=pickleSize,
+                      showSaveMilliseconds=showSave * 1000, showLoadMilliseconds=showLoad * 1000, showBytes=showSize)
+
+#Recording changes to a large show: re-saving the whole show on each change against one journal record each, then recovering after a crash
+def benchJournal(cues=2000, universes=4, changes=200):
+        rng = random.Random(22)
+        cueManager = pighting.CueManager()
+        for cueID in range(1, cues + 1):
+                cueManager.addCue(cueID, pighting.Frame({universe: randomFrame(rng) for universe in range(1, universes + 1)}))
+        fixtureManager = pighting.FixtureManager()
+        with tempfile.TemporaryDirectory() as root:
+                showPath = str(Path(root) / 'show.show')
+                start = time.perf_counter()
+                for change in range(changes // 10): #Far slower, so fewer changes are timed
+                        cueManager.setFadeTimes(rng.randint(1, cues), rng.randint(0, 10))
+                        pighting.writeShowFile(showPath, cueManager.getCueList(), fixtureManager.getFixtureList())
+                fullSave = (time.perf_counter() - start) / (changes // 10)
+                journal = pighting.ShowJournal(Path(root) / 'autosave', cueManager, fixtureManager, compactAfter=changes * 2)
+                (Path(root) / 'autosave').mkdir()
+                journal.open()
+                journal.compact() #Snapshot the starting show, so only the timed changes are in the journal
+                frames = [pighting.Frame({universe: randomFrame(rng) for universe in range(1, universes + 1)}) for change in range(changes // 2)]
+                start = time.perf_counter()
+                for change in range(changes):
+                        if change % 2:
+                                cueManager.setFadeTimes(rng.randint(1, cues), rng.randint(0, 10))
+                        else:
+                                cueManager.addCue(rng.randint(1, cues), frames[change // 2])
+                journalled = (time.perf_counter() - start) / changes
+                journal.waitForSnapshots()
+                journal.file.flush() #The journal is left open, as it would be after a crash
+                recovered = pighting.ShowJournal(Path(root) / 'autosave', pighting.CueManager(), pighting.FixtureManager())
+                start = time.perf_counter()
+                replayed = recovered.open()
+                recovery = time.perf_counter() - start
+                assert all(recovered.cueManager.getCue(cueID).frame.universes == cue.frame.universes and recovered.cueManager.getCue(cueID).fadeUp == cue.fadeUp
+                           for cueID, cue in cueManager.getCueList().items())
+                recovered.close()
+                journal.close()
+        return report(f'Record a change to {cues} cues  full save: {fullSave * 1000:7.2f} ms   journal: {journalled * 1000:7.3f} ms   ' +
+                      f'recover snapshot + {replayed} records: {recovery * 1000:6.1f} ms',
+                      cues=cues, fullSaveMilliseconds=fullSave * 1000, journalMilliseconds=journalled * 1000, recoveryMilliseconds=recovery * 1000, replayed=replayed)
+
+#Memory per cue and bulk edit speed of the default cue storage against matrix storage
+def benchCueMatrix(cues=5000, universes=2, edits=20):
+        if pighting.np is None:
+                return report('Cue matrix  skipped, needs NumPy', skipped='needs NumPy')
+        rng = random.Random(23)
+        frames = [pighting.Frame({universe: randomFrame(rng) for universe in range(1, universes + 1)}) for cue in range(64)]
+        results = []
+        for matrix in (False, True):
+                tracemalloc.start()
+                cueManager = pighting.CueManager(matrix=matrix)
+                for cueID in range(1, cues + 1):
+                        cueManager.addCue(cueID, frames[cueID % len(frames)].copy())
+                memory = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                start = time.perf_counter()
+                for edit in range(edits):
+                        cueManager.adjustSlots(100, 400, 1, [39], 10) #Raise slot 40 by 10 in cues 100-400
+                        cueManager.copySlots(7, 1, cues, 2, range(48, 64)) #Copy a 16 slot fixture's state into every cue
+                        cueManager.compareSlots(7, 1, cues, 2, range(48, 64))
+                results.append((memory / cues, (time.perf_counter() - start) / edits))
+        (dictMemory, dictTime), (matrixMemory, matrixTime) = results
+        return report(f'{cues} cues x {universes} universes  dict: {dictMemory:6.0f} B/cue {dictTime * 1000:7.1f} ms per bulk edit' +
+                      f'   matrix: {matrixMemory:6.0f} B/cue {matrixTime * 1000:7.1f} ms per bulk edit',
+                      cues=cues, dictBytesPerCue=dictMemory, dictBulkEditMilliseconds=dictTime * 1000, matrixBytesPerCue=matrixMemory, matrixBulkEditMilliseconds=matrixTime * 1000)
+
+#A show written in tracking style, each cue changing a few slots of the one before, stored as full frames and as tracked deltas
+def benchTracking(cues=2000, universes=4, changesPerCue=12):
+        rng = random.Random(24)
+        cueList = {}
+        state = pighting.Frame({universe: array('B', [0] * 512) for universe in range(1, universes + 1)})
+        for cueID in range(1, cues + 1):
+                state = state.copy()
+                for change in range(changesPerCue):
+                        state[rng.randint(1, universes)][rng.randrange(512)] = rng.randrange(256)
+                cueList[cueID] = pighting.Cue(cueID, state, 3, 3)
+        results = []
+        with tempfile.TemporaryDirectory() as root:
+                for tracking in (False, True):
+                        tracemalloc.start()
+                        cueManager = pighting.CueManager(tracking=tracking)
+                        cueManager.setCueList({cueID: cue.copy() for cueID, cue in cueList.items()})
+                        memory = tracemalloc.get_traced_memory()[0]
+                        tracemalloc.stop()
+                        showPath = str(Path(root) / f'show{tracking}.show')
+                        pighting.writeShowFile(showPath, cueManager.getCueList(), {})
+                        start = time.perf_counter()
+                        for cueID in range(1, cues + 1, 7):
+                                cueManager.getCue(cueID).frame
+                        rebuild = (time.perf_counter() - start) / len(range(1, cues + 1, 7))
+                        frame = cueManager.getCue(cues // 2).frame
+                        frame[1][0] = 255 - frame[1][0]
+                        start = time.perf_counter()
+                        cueManager.addCue(cues // 2, frame, 3, 3) #Slot 1 tracks on until a later cue changes it
+                        edit = time.perf_counter() - start
+                        results.append((memory, os.path.getsize(showPath), rebuild, edit))
+        (fullMemory, fullSize, fullRead, fullEdit), (trackedMemory, trackedSize, trackedRead, trackedEdit) = results
+        return report(f'{cues} cues x {universes} universes, {changesPerCue} changes per cue  full: {fullMemory / 1024:7.0f} KiB {fullSize / 1024:6.0f} KiB file' +
+                      f'   tracking: {trackedMemory / 1024:6.0f} KiB {trackedSize / 1024:5.0f} KiB file, {trackedRead * 1e6:5.0f} us per cue read {trackedEdit * 1000:5.2f} ms per edit',
+                      cues=cues, fullBytes=fullMemory, fullFileBytes=fullSize, trackedBytes=trackedMemory, trackedFileBytes=trackedSize,
+                      trackedReadMicroseconds=trackedRead * 1e6, trackedEditMilliseconds=trackedEdit * 1000)
+
+#Writing attributes across a large rig through Fixture.setAttribute, as the manual and colour controls do, then merging the layers into the output
+def benchAttributes(fixtureCount=4096):
+        attributes = ['Dimmer', 'Red', 'Green', 'Blue', 'White', 'Pan', 'Pan fine', 'Tilt', 'Tilt fine']
+        fixtureManager = pighting.FixtureManager()
+        fixtures = fixtureManager.patchRange('Bench Head', attributes, fixtureCount, 1, 1)
+        mergeEngine = pighting.MergeEngine(fixtureManager)
+        layer = mergeEngine.getLayer('Manual')
+        output = pighting.Frame()
+        values = iter(range(10**9))
+        def setAll():
+                value = next(values) % 256
+                for fixture in fixtures:
+                        fixture.setAttribute(layer, 'Red', value)
+        def setAll16():
+                value = next(values) % 65536
+                for fixture in fixtures:
+                        fixture.setAttribute16(layer, 'Pan', value)
+        def setAndMerge():
+                setAll()
+                mergeEngine.merge(output)
+        writes = callsPerSecond(setAll) * fixtureCount
+        writes16 = callsPerSecond(setAll16) * fixtureCount
+        frames = callsPerSecond(setAndMerge)
+        universes = len(fixtureManager.getUniverses())
+        return report(f'{fixtureCount} fixtures over {universes} universes  setAttribute: {1e6 / writes:6.2f} us   setAttribute16: {1e6 / writes16:6.2f} us   ' +
+                      f'set every fixture and merge: {frames:6.1f} frames/s',
+                      fixtures=fixtureCount, universes=universes, setAttributeMicroseconds=1e6 / writes, setAttribute16Microseconds=1e6 / writes16, setAndMergeFramesPerSecond=frames)
+
+#Every benchmark by the name it is run with, in the order the suite runs them
+suite = {
+        'fades': benchFades,
+        'cueIndex': benchCueIndex,
+        'fixtureIndex': benchFixtureIndex,
+        'attributes': benchAttributes,
+        'playbacks': benchPlaybacks,
+        'effects': benchEffects,
+        'import': benchImport,
+        'profileLookup': benchProfileLookup,
+        'search': benchSearch,
+        'browser': benchBrowser,
+        'patchProfiles': benchPatchProfiles,
+        'bulkPatch': benchBulkPatch,
+        'showFile': benchShowFile,
+        'journal': benchJournal,
+        'cueMatrix': benchCueMatrix,
+        'tracking': benchTracking,
+}
+
+#Peak resident memory of this process in bytes, or None where the resource module does not exist (Windows)
+def peakMemory():
+        try:
+                import resource
+        except ImportError:
+                return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024 #macOS reports bytes, Linux KiB
+
+def fileHash(path):
+        with open(path, 'rb') as file:
+                return hashlib.sha256(file.read()).hexdigest()
+
+def gitCommit():
+        try:
+                return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).parent, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+                return None
+
+#Runs one benchmark in this process and writes its result to resultPath, called in a fresh process by runSuite
+def runBenchmark(name, resultPath):
+        baseline = peakMemory()
+        start = time.perf_counter()
+        measurements = suite[name]()
+        result = {'seconds': time.perf_counter() - start, 'peakMemory': peakMemory(), 'baselineMemory': baseline, 'measurements': measurements}
+        Path(resultPath).write_text(json.dumps(result))
+
+def runSuite(names, outputPath):
+        results = {}
+        for name in names:
+                print(f'--- {name}', flush=True)
+                resultFile, resultPath = tempfile.mkstemp(suffix='.json')
+                os.close(resultFile)
+                try:
+                        child = subprocess.run([sys.executable, __file__, '--child', name, '--result', resultPath, '--db', str(profileSnapshot)])
+                        if child.returncode == 0:
+                                results[name] = json.loads(Path(resultPath).read_text())
+                        else:
+                                results[name] = {'error': f'exited with code {child.returncode}'}
+                finally:
+                        os.remove(resultPath)
+                peak = results[name].get('peakMemory')
+                if peak is not None:
+                        print(f'    peak memory {peak / 2**20:.0f} MiB ({(peak - results[name]["baselineMemory"]) / 2**20:.0f} MiB above start)')
+        document = {
+                'formatVersion': 1,
+                'started': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'commit': gitCommit(),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'numpy': pighting.np.__version__ if pighting.np is not None else None,
+                'profileDB': {'path': str(profileSnapshot), 'sha256': fileHash(profileSnapshot)},
+                'results': results,
+        }
+        outputPath = Path(outputPath)
+        outputPath.parent.mkdir(parents=True, exist_ok=True)
+        outputPath.write_text(json.dumps(document, indent=1))
+        print(f'Results saved to {outputPath}')
+        return document
+
+#Flattens nested measurements to dotted names
+def flatten(measurements, prefix=''):
+        flat = {}
+        for key, value in measurements.items():
+                if isinstance(value, dict):
+                        flat.update(flatten(value, f'{prefix}{key}.'))
+                else:
+                        flat[f'{prefix}{key}'] = value
+        return flat
+
+#Prints how every numeric measurement changed since an earlier results file
+def compareResults(earlierPath, document):
+        earlier = json.loads(Path(earlierPath).read_text())
+        print(f'Compared with {earlierPath} (commit {earlier.get("commit")}, {earlier.get("started")})')
+        if earlier.get('profileDB', {}).get('sha256') != document['profileDB']['sha256']:
+                print('    Note: the fixture profile database snapshot differs between the runs')
+        for name, result in document['results'].items():
+                before = earlier['results'].get(name, {})
+                current = flatten(dict(result.get('measurements') or {}, peakMemory=result.get('peakMemory')))
+                previous = flatten(dict(before.get('measurements') or {}, peakMemory=before.get('peakMemory')))
+                for key, value in current.items():
+                        oldValue = previous.get(key)
+                        if isinstance(value, (int, float)) and isinstance(oldValue, (int, float)) and oldValue:
+                                print(f'    {name}.{key:40} {oldValue:12.4g} -> {value:12.4g}   {value / oldValue - 1:+7.1%}')
+
+if __name__ == '__main__':
+        parser = argparse.ArgumentParser(description='Benchmarks for the PIghting Controller. Each benchmark runs headless in its own process.')
+        parser.add_argument('names', nargs='*', help=f'benchmarks to run, all of them by default: {", ".join(suite)}')
+        parser.add_argument('--output', help='where to save the results as JSON, benchmark-results/<time>.json by default')
+        parser.add_argument('--compare', help='results file of an earlier run to compare against')
+        parser.add_argument('--db', default=str(profileSnapshot), help='FixtureProfiles.db snapshot for the fixture database benchmarks')
+        parser.add_argument('--child', help=argparse.SUPPRESS)
+        parser.add_argument('--result', help=argparse.SUPPRESS)
+        arguments = parser.parse_args()
+        profileSnapshot = Path(arguments.db)
+        if arguments.child:
+                runBenchmark(arguments.child, arguments.result)
+                sys.exit()
+        unknown = [name for name in arguments.names if name not in suite]
+        if unknown:
+                parser.error(f'unknown benchmark {", ".join(unknown)}, choose from {", ".join(suite)}')
+        print(f'Python {sys.version.split()[0]} on {sys.platform}')
+        outputPath = arguments.output or Path(__file__).with_name('benchmark-results') / f'{time.strftime("%Y%m%d-%H%M%S")}.json'
+        document = runSuite(arguments.names or list(suite), outputPath)
+        if arguments.compare:
+                compareResults(arguments.compare, document)
@@ -0,0 +1,18 @@
+#The application file name contains spaces, so it is loaded by path rather than imported, as in benchmarks.py
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+appPath = Path(__file__).resolve().parent.parent / 'PIghting v1.0.0.py'
+if 'pighting' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('pighting', appPath)
+        sys.modules['pighting'] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules['pighting'])
+
+@pytest.fixture
+def pighting():
+        return sys.modules['pighting']
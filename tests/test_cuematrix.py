@@ -0,0 +1,50 @@
+import random
+from array import array
+
+import pytest
+
+pytest.importorskip('numpy') #Matrix cue storage needs NumPy
+
+#The same cue list in matrix and dict storage
+def cueManagers(pighting):
+        rng = random.Random(23)
+        managers = [pighting.CueManager(matrix=True), pighting.CueManager()]
+        for cueID in range(1, 9):
+                frame = pighting.Frame()
+                for universe in (1, 2):
+                        frame.universes[universe] = array('B', [rng.choice((0, 40, 250)) for slot in range(pighting.universeSize)])
+                for manager in managers:
+                        manager.addCue(cueID, frame.copy(), 1, 1)
+        return managers
+
+def fullFrames(manager):
+        return {cueID: {universe: cue.frame.get(universe) for universe in cue.frame.getUniverses()} for cueID, cue in manager.cueList.items()}
+
+def testBulkEditsMatchDictStorage(pighting):
+        matrix, full = cueManagers(pighting)
+        edits = [('adjustSlots', (2, 6, 1, [0, 5, 511], 30)), ('adjustSlots', (1, 8, 2, [7, 8], -60)),
+                ('copySlots', (4, 1, 8, 1, [0, 1, 2])), ('compareSlots', (1, 1, 8)), ('compareSlots', (4, 1, 8, 1, [0, 1, 2])),
+                ('compareSlots', (1, 1, 8, 3, [0]))]
+        for name, args in edits:
+                assert getattr(matrix, name)(*args) == getattr(full, name)(*args)
+                assert fullFrames(matrix) == fullFrames(full)
+
+@pytest.mark.parametrize('slot', [-1, 512])
+def testSlotsOutsideUniverseAreRejected(pighting, slot):
+        for manager in cueManagers(pighting):
+                before = fullFrames(manager)
+                with pytest.raises(IndexError):
+                        manager.adjustSlots(1, 8, 1, [0, slot], 50)
+                with pytest.raises(IndexError):
+                        manager.copySlots(1, 2, 8, 1, [slot])
+                with pytest.raises(IndexError):
+                        manager.compareSlots(1, 1, 8, 1, [slot])
+                assert fullFrames(manager) == before
+
+#Comparing a universe no cue uses reads it as all 0, without giving every cue that universe
+def testCompareDoesNotAddUniverses(pighting):
+        matrix, full = cueManagers(pighting)
+        columns = matrix.store.matrix.shape[1]
+        assert matrix.compareSlots(1, 1, 8, 7, [0]) == [] == full.compareSlots(1, 1, 8, 7, [0])
+        assert matrix.store.matrix.shape[1] == columns
+        assert matrix.getCue(1).frame.getUniverses() == [1, 2]
@@ -0,0 +1,42 @@
+import random
+from array import array
+
+import pytest
+
+#Builds the same cue list in a tracking and a full-frame cue manager
+def cueManagers(pighting, frames, checkpointInterval):
+        managers = [pighting.CueManager(tracking=True, checkpointInterval=checkpointInterval), pighting.CueManager()]
+        for manager in managers:
+                for cueID, frame in enumerate(frames, 1):
+                        manager.addCue(cueID, frame.copy(), 1, 1)
+        return managers
+
+def fullFrames(manager):
+        return {cueID: {universe: cue.frame.get(universe) for universe in (1, 2)} for cueID, cue in manager.cueList.items()}
+
+def testTrackedAdjustDoesNotStack(pighting):
+        tracked = pighting.CueManager(tracking=True)
+        for cueID in range(1, 6):
+                frame = pighting.Frame()
+                frame[1][0] = 50
+                tracked.addCue(cueID, frame)
+        tracked.adjustSlots(1, 5, 1, [0], 10)
+        assert [tracked.getCue(cueID).frame[1][0] for cueID in range(1, 6)] == [60] * 5
+
+@pytest.mark.parametrize('checkpointInterval', [1, 3, 32])
+def testTrackedBulkEditsMatchFullFrames(pighting, checkpointInterval):
+        rng = random.Random(checkpointInterval)
+        frames = []
+        for cueNo in range(12):
+                frame = pighting.Frame()
+                for universe in (1, 2):
+                        frame.universes[universe] = array('B', [rng.choice((0, 50, 250)) for slot in range(pighting.universeSize)])
+                frames.append(frame)
+        tracked, full = cueManagers(pighting, frames, checkpointInterval)
+        #Edits run to the last cue, so the cues after the range cannot differ by tracking the edit
+        edits = [('adjustSlots', (3, 12, 1, [0, 5, 511], 10)), ('adjustSlots', (1, 12, 2, [7, 8], -60)),
+                ('copySlots', (4, 6, 12, 1, [0, 1, 2])), ('copySlots', (12, 1, 12, 2, [7]))]
+        for name, args in edits:
+                assert getattr(tracked, name)(*args) == getattr(full, name)(*args)
+                assert fullFrames(tracked) == fullFrames(full)
+        assert tracked.compareSlots(1, 1, 12) == full.compareSlots(1, 1, 12)
@@ -0,0 +1,10 @@
+import pytest
+
+#The first and last fixtures are fanned by the full fan value either side of the centre
+@pytest.mark.parametrize('count', [2, 5])
+def testFanReachesFullValueAtEnds(pighting, count):
+        fixtures = [pighting.Fixture('Dimmer', ['Dimmer'], address, address) for address in range(1, count + 1)]
+        effect = pighting.Effect('Fan', fixtures, 'Dimmer', waveform='square', low=100, high=100, fan=40)
+        values = [float(value) for value in effect.values(0)]
+        assert values[0] == 60 and values[-1] == 140
+        assert values == sorted(values) and sum(values) / count == 100
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+def blobSHA(data):
+        return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+def fixtureFile(name, channels):
+        return json.dumps({'name': name, 'modes': [{'name': f'{len(channels)}ch', 'channels': channels}]}).encode()
+
+#Stands in for the GitHub tree listing and raw file hosts, serving files from a dict of repository path -> contents.
+#The listing has an ETag and answers 304 to a matching If-None-Match, and every request path is recorded
+class FixtureLibraryServer(ThreadingHTTPServer):
+        def __init__(self, files):
+                super().__init__(('127.0.0.1', 0), FixtureLibraryHandler)
+                self.files = files
+                self.requested = []
+                threading.Thread(target=self.serve_forever, daemon=True).start()
+
+        def url(self, path):
+                return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+        def listing(self):
+                tree = [{'path': path, 'type': 'blob', 'sha': blobSHA(data)} for path, data in sorted(self.files.items())]
+                tree.append({'path': 'fixtures/acme', 'type': 'tree', 'sha': '0' * 40})
+                body = json.dumps({'tree': tree, 'truncated': False}).encode()
+                return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+class FixtureLibraryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+                self.server.requested.append(self.path)
+                if self.path == '/tree':
+                        body, etag = self.server.listing()
+                        if self.headers.get('If-None-Match') == etag:
+                                self.send_response(304)
+                                self.end_headers()
+                                return
+                        self.send_response(200)
+                        self.send_header('ETag', etag)
+                elif self.path.startswith('/raw/') and self.path[5:] in self.server.files:
+                        body = self.server.files[self.path[5:]]
+                        self.send_response(200)
+                else:
+                        self.send_error(404)
+                        return
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+                pass
+
+@pytest.fixture
+def library():
+        server = FixtureLibraryServer({
+                'fixtures/acme/spot.json': fixtureFile('Spot', ['Dimmer', 'Pan', 'Tilt']),
+                'fixtures/acme/wash.json': fixtureFile('Wash', ['Dimmer', 'Red', 'Green', 'Blue']),
+                'fixtures/manufacturers.json': b'{}'
+        })
+        yield server
+        server.shutdown()
+        server.server_close()
+
+def profileNames(fixtureDB):
+        conn = fixtureDB.connect()
+        try:
+                return sorted(row[0] for row in conn.execute('SELECT fixName FROM profiles'))
+        finally:
+                conn.close()
+
+#A sync downloads only changed files, skips everything on a 304 and removes the profiles of deleted files
+def testSyncDownloadsOnlyChanges(pighting, library, tmp_path):
+        fixtureDB = pighting.FixtureDB(str(tmp_path / 'profiles.db'), library.url('/tree'), library.url('/raw/{path}'))
+        assert fixtureDB.sync(workers=2) == (2, 0)
+        assert profileNames(fixtureDB) == ['Spot - 3ch', 'Wash - 4ch']
+        assert sorted(library.requested) == ['/raw/fixtures/acme/spot.json', '/raw/fixtures/acme/wash.json', '/tree']
+
+        library.requested.clear()
+        assert fixtureDB.sync(workers=2) == (0, 0)
+        assert library.requested == ['/tree']
+
+        library.requested.clear()
+        del library.files['fixtures/acme/spot.json']
+        library.files['fixtures/acme/wash.json'] = fixtureFile('Wash', ['Dimmer', 'Red', 'Green', 'Blue', 'White'])
+        library.files['fixtures/other/beam.json'] = fixtureFile('Beam', ['Dimmer'])
+        assert fixtureDB.sync(workers=2) == (2, 1)
+        assert sorted(library.requested) == ['/raw/fixtures/acme/wash.json', '/raw/fixtures/other/beam.json', '/tree']
+        assert profileNames(fixtureDB) == ['Beam - 1ch', 'Wash - 5ch']
+        assert sorted(fixtureDB.getSources()) == ['fixtures/acme/wash.json', 'fixtures/other/beam.json']
+        fixtureDB.close()
+
+#Profiles are only uncached once a write has committed, so a lookup between writing the profiles and committing does not cache the old row
+def testProfileCacheClearedAfterCommit(pighting, tmp_path, monkeypatch):
+        fixtureDB = pighting.FixtureDB(str(tmp_path / 'profiles.db'))
+        fixtureDB.insertProfiles([pighting.parseFixtureProfile(('fixtures/acme/spot.json', fixtureFile('Spot', ['Dimmer'])))])
+        assert fixtureDB.getProfile('Spot - 1ch').attributes == ('Dimmer',)
+        connect = fixtureDB.connect
+        lookups = []
+        def lookupBeforeCommit(statement): #A UI lookup runs once the profiles are written, before the write commits
+                if 'INSERT INTO sources' in statement and not lookups:
+                        lookups.append(fixtureDB.getProfile('Spot - 1ch').attributes)
+        def tracedConnect():
+                conn = connect()
+                conn.set_trace_callback(lookupBeforeCommit)
+                return conn
+        monkeypatch.setattr(fixtureDB, 'connect', tracedConnect)
+        fixtureDB.insertProfiles([pighting.parseFixtureProfile(('fixtures/acme/spot.json', fixtureFile('Spot', ['Red'])))])
+        assert lookups == [('Dimmer',)]
+        assert fixtureDB.getProfile('Spot - 1ch').attributes == ('Red',)
+        fixtureDB.close()
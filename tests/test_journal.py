@@ -0,0 +1,160 @@
+from pathlib import Path
+
+import pytest
+
+def openJournal(pighting, directory, compactAfter=1000):
+        journal = pighting.ShowJournal(directory, pighting.CueManager(), pighting.FixtureManager(), compactAfter)
+        journal.open()
+        return journal
+
+def cueFrame(pighting, value):
+        frame = pighting.Frame()
+        frame[1][0] = value
+        return frame
+
+#A snapshot that cannot be read, or a record that cannot be applied, is moved aside and the journal opened again with an empty show
+@pytest.mark.parametrize('damage', ['snapshot', 'record'])
+def testDiscardUnrestorableAutosave(pighting, tmp_path, damage):
+        journal = openJournal(pighting, tmp_path)
+        journal.cueManager.addCue(1, cueFrame(pighting, 10))
+        journal.compact()
+        if damage == 'record':
+                journal.record('deleteCue', 5) #Cue 5 does not exist, so the record fails when it is replayed
+        journal.close()
+        if damage == 'snapshot':
+                snapshot = journal.snapshotPath(journal.generation)
+                snapshot.write_bytes(snapshot.read_bytes()[:40])
+        restored = pighting.ShowJournal(tmp_path, pighting.CueManager(), pighting.FixtureManager())
+        with pytest.raises(ValueError if damage == 'snapshot' else KeyError):
+                restored.open()
+        folder = restored.discard()
+        assert sorted(path.name for path in tmp_path.iterdir()) == [folder.name]
+        assert restored.open() == 0
+        assert restored.cueManager.getCueIDs() == [] and restored.fixtureManager.getFixtureList() == {}
+        restored.cueManager.addCue(2, cueFrame(pighting, 20))
+        restored.close()
+        assert openJournal(pighting, tmp_path).cueManager.getCueIDs() == [2]
+
+#The main window starts with an empty show and reports the error rather than failing to start
+def testMainWindowStartsWithDamagedAutosave(pighting, tmp_path, monkeypatch):
+        monkeypatch.setattr(Path, 'home', lambda: tmp_path)
+        autosave = Path(pighting.autosavePath())
+        (autosave / 'snapshot.1.show').write_bytes(pighting.showMagic + b'\0' * 4)
+        application = pighting.QApplication.instance() or pighting.QApplication([])
+        window = pighting.MainWindow()
+        try:
+                assert window.cueManager.getCueIDs() == []
+                assert 'could not be restored' in window.errorMessage.text()
+        finally:
+                window.close()
+        assert not (autosave / 'snapshot.1.show').exists()
+
+#Loading a tracking show through the load window switches the main stack to tracking, and the checkbox follows it
+def testTrackingBoxFollowsLoadedShow(pighting, tmp_path, monkeypatch):
+        monkeypatch.setattr(Path, 'home', lambda: tmp_path)
+        cueManager = pighting.CueManager()
+        cueManager.setTracking(True)
+        cueManager.addCue(1, cueFrame(pighting, 10))
+        path = tmp_path / 'tracking.show'
+        pighting.writeShowFile(str(path), cueManager.getCueList(), {})
+        application = pighting.QApplication.instance() or pighting.QApplication([])
+        window = pighting.MainWindow()
+        try:
+                assert not window.trackingBox.isChecked()
+                window.openSaveLoad()
+                window.fileWindow.inputFileName.setText(str(path))
+                window.fileWindow.loadFromFile()
+                assert window.cueManager.tracking
+                assert window.trackingBox.isChecked()
+                window.fileWindow.close()
+        finally:
+                window.close()
+
+def showState(journal):
+        cues = {cueID: (cue.frame.get(1).tobytes(), cue.fadeUp, cue.fadeDown) for cueID, cue in journal.cueManager.getCueList().items()}
+        fixtures = {channel: (fixture.type, fixture.address) for channel, fixture in journal.fixtureManager.getFixtureList().items()}
+        return cues, fixtures
+
+#Every kind of change is replayed on top of the newest snapshot, including journals whose snapshot was never written
+@pytest.mark.parametrize('snapshotLands', [True, False])
+def testReplayRestoresEveryChange(pighting, tmp_path, monkeypatch, snapshotLands):
+        journal = openJournal(pighting, tmp_path)
+        journal.cueManager.addCue(1, cueFrame(pighting, 10))
+        journal.cueManager.addCue(2, cueFrame(pighting, 20))
+        journal.fixtureManager.addFixture(pighting.Fixture('Dimmer', ['Dimmer'], 1, 1))
+        if not snapshotLands: #The application crashes while the snapshot is written
+                monkeypatch.setattr(journal, 'writeSnapshot', lambda generation, cueList, fixtureList: None)
+        journal.compact()
+        journal.waitForSnapshots()
+        journal.cueManager.addCue(3, cueFrame(pighting, 30), 1, 2)
+        journal.cueManager.setFadeTimes(1, 5, 6)
+        journal.cueManager.deleteCue(2)
+        journal.fixtureManager.addFixture(pighting.Fixture('Spot', ['Dimmer', 'Pan'], 10, 2))
+        journal.fixtureManager.removeFixture(1)
+        expected = showState(journal)
+        restored = openJournal(pighting, tmp_path) #The first journal is never closed, as after a crash
+        assert showState(restored) == expected
+        assert restored.unrestored is None
+
+#A record cut short by a crash is cut off, and later records are appended after the last complete one
+def testTornTailIsCutOff(pighting, tmp_path):
+        journal = openJournal(pighting, tmp_path)
+        journal.cueManager.addCue(1, cueFrame(pighting, 10))
+        journal.cueManager.addCue(2, cueFrame(pighting, 20))
+        path = journal.journalPath(journal.generation)
+        complete = path.stat().st_size
+        journal.cueManager.addCue(3, cueFrame(pighting, 30))
+        journal.file.close()
+        with open(path, 'r+b') as file:
+                file.truncate(complete + 100) #Part of the record for cue 3
+        restored = openJournal(pighting, tmp_path)
+        assert restored.cueManager.getCueIDs() == [1, 2]
+        assert path.stat().st_size == complete
+        restored.cueManager.addCue(4, cueFrame(pighting, 40))
+        restored.close()
+        assert openJournal(pighting, tmp_path).cueManager.getCueIDs() == [1, 2, 4]
+
+#A show load is one reset with one snapshot, and changes after it are restored on top of the loaded show
+def testLoadShowRestoresLoadedShow(pighting, tmp_path, monkeypatch):
+        journal = openJournal(pighting, tmp_path)
+        journal.cueManager.addCue(1, cueFrame(pighting, 10))
+        snapshots = []
+        writeSnapshot = journal.writeSnapshot
+        def countSnapshots(generation, cueList, fixtureList):
+                snapshots.append(generation)
+                writeSnapshot(generation, cueList, fixtureList)
+        monkeypatch.setattr(journal, 'writeSnapshot', countSnapshots)
+        journal.loadShow({5: pighting.Cue(5, cueFrame(pighting, 50), 1, 1), 6: pighting.Cue(6, cueFrame(pighting, 60), 1, 1)},
+                         {3: pighting.Fixture('Dimmer', ['Dimmer'], 1, 3)})
+        journal.waitForSnapshots()
+        assert len(snapshots) == 1
+        journal.cueManager.deleteCue(5)
+        expected = showState(journal)
+        assert showState(openJournal(pighting, tmp_path)) == expected
+
+#If the application crashes before the snapshot of a load is written, the changes after the load cannot be replayed on the show before it.
+#They are set aside and the show is restored as it was before the load
+def testCrashBeforeLoadSnapshot(pighting, tmp_path, monkeypatch):
+        journal = openJournal(pighting, tmp_path)
+        journal.cueManager.addCue(1, cueFrame(pighting, 10))
+        before = showState(journal)
+        monkeypatch.setattr(journal, 'writeSnapshot', lambda generation, cueList, fixtureList: None)
+        journal.cueManager.setCueList({5: pighting.Cue(5, cueFrame(pighting, 50), 1, 1)})
+        journal.cueManager.deleteCue(5)
+        restored = openJournal(pighting, tmp_path)
+        assert showState(restored) == before
+        assert [path.name for path in restored.unrestored.iterdir()] == [journal.journalPath(journal.generation).name]
+        restored.cueManager.addCue(2, cueFrame(pighting, 20))
+        restored.close()
+        assert openJournal(pighting, tmp_path).cueManager.getCueIDs() == [1, 2]
+
+#Switching tracking resets the cue list, which is restored in its new mode
+def testTrackingSwitchIsRestored(pighting, tmp_path):
+        journal = openJournal(pighting, tmp_path)
+        journal.cueManager.addCue(1, cueFrame(pighting, 10))
+        journal.cueManager.setTracking(True)
+        journal.cueManager.addCue(2, cueFrame(pighting, 20))
+        journal.close()
+        restored = openJournal(pighting, tmp_path)
+        assert restored.cueManager.tracking
+        assert [restored.cueManager.getCue(cueID).frame[1][0] for cueID in (1, 2)] == [10, 20]
@@ -0,0 +1,8 @@
+from pathlib import Path
+
+#The autosave folder is created on every launch, including on accounts with no ~/.local/share yet
+def testAutosavePathCreatesMissingFolders(pighting, tmp_path, monkeypatch):
+        monkeypatch.setattr(Path, 'home', lambda: tmp_path / 'home')
+        path = Path(pighting.autosavePath())
+        assert path.is_dir()
+        assert path.parent == Path(pighting.profileDBPath()).parent
@@ -0,0 +1,55 @@
+import sys
+import threading
+import time
+
+#A tick that raises is reported and the output thread carries on ticking
+def testTickErrorsDoNotStopOutput(pighting, monkeypatch):
+        application = pighting.QApplication.instance() or pighting.QApplication([]) #Signals from the output thread are delivered by the event loop
+        engine = pighting.PlaybackEngine(pighting.CueManager(), rate=200)
+        ticks = []
+        failures = []
+        def tick():
+                ticks.append(time.monotonic())
+                if len(ticks) <= 3:
+                        raise RuntimeError('merge failed')
+        monkeypatch.setattr(engine, 'tick', tick)
+        engine.tickFailed.connect(failures.append)
+        engine.start()
+        try:
+                deadline = time.monotonic() + 2
+                while len(ticks) < 10 and time.monotonic() < deadline:
+                        application.processEvents()
+                        time.sleep(0.01)
+        finally:
+                engine.stop()
+        application.processEvents()
+        assert len(ticks) >= 10
+        assert failures == ["Output error: RuntimeError('merge failed')"] #Reported once while the same error repeats
+
+#Releasing a layer on one thread while another merges it must not break the merge
+def testReleaseDuringMerge(pighting):
+        mergeEngine = pighting.MergeEngine()
+        layer = mergeEngine.getLayer('Manual')
+        frame = pighting.Frame()
+        frame[1][0] = 255
+        errors = []
+        stop = threading.Event()
+        def merge():
+                try:
+                        while not stop.is_set():
+                                assert mergeEngine.mergeUniverse(1)[0] in (0, 255)
+                except Exception as error:
+                        errors.append(error)
+        merger = threading.Thread(target=merge)
+        switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) #Switch threads as often as possible, so the release lands inside a merge
+        merger.start()
+        try:
+                for attempt in range(5000):
+                        layer.load(frame)
+                        layer.release()
+        finally:
+                stop.set()
+                merger.join()
+                sys.setswitchinterval(switchInterval)
+        assert errors == []
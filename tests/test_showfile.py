@@ -0,0 +1,51 @@
+import random
+import struct
+
+import pytest
+
+def writeShow(pighting, path, tracking):
+        cueManager = pighting.CueManager(tracking=tracking)
+        rng = random.Random(21)
+        for cueID in range(1, 5):
+                frame = pighting.Frame()
+                for slot in rng.sample(range(pighting.universeSize), 20):
+                        frame[1 + slot % 2][slot] = rng.randrange(1, 256)
+                cueManager.addCue(cueID, frame, 2, 3)
+        fixtures = {1: pighting.Fixture('Dimmer', ['Dimmer'], 1, 1)}
+        pighting.writeShowFile(str(path), cueManager.getCueList(), fixtures)
+        return path.read_bytes()
+
+#Every truncation of a show file is reported as a ValueError
+@pytest.mark.parametrize('tracking', [False, True])
+def testTruncatedShowsRaiseValueError(pighting, tmp_path, tracking):
+        data = writeShow(pighting, tmp_path / 'full.show', tracking)
+        path = tmp_path / 'cut.show'
+        for length in range(len(pighting.showMagic), len(data)):
+                path.write_bytes(data[:length])
+                with pytest.raises(ValueError):
+                        pighting.readShowFile(str(path))
+
+#Index entries pointing outside the cue list, the universe range or a universe's slots are reported as ValueErrors.
+#Fields are the cue position, universe and slot count
+@pytest.mark.parametrize('tracking, field, value', [
+        (False, 0, 99), (False, 1, 0), (False, 2, 513), (False, 2, 0),
+        (True, 0, 99), (True, 1, 0), (True, 1, 1 << 20), (True, 2, 513), (True, 2, 1 << 16)])
+def testDamagedIndexRaisesValueError(pighting, tmp_path, tracking, field, value):
+        data = bytearray(writeShow(pighting, tmp_path / 'show.show', tracking))
+        magic, version, metadataLength, entryCount = pighting.showHeader.unpack_from(data, 0)
+        indexStart = pighting.showHeader.size + metadataLength
+        entry = list(pighting.showIndexEntry.unpack_from(data, indexStart))
+        entry[field] = value
+        pighting.showIndexEntry.pack_into(data, indexStart, *entry)
+        path = tmp_path / 'damaged.show'
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError):
+                pighting.readShowFile(str(path))
+
+@pytest.mark.parametrize('metadata', [b'[]', b'{"cues": 5}', b'{"cues": [{"ID": "one"}], "profiles": [], "fixtures": []}',
+        b'{"cues": [], "profiles": [], "fixtures": [{"profile": 3}]}', b'{"cues": [{"ID": 1}], "profiles": [], "fixtures": []}'])
+def testDamagedMetadataRaisesValueError(pighting, tmp_path, metadata):
+        path = tmp_path / 'damaged.show'
+        path.write_bytes(pighting.showHeader.pack(pighting.showMagic, pighting.showFormatVersion, len(metadata), 0) + metadata)
+        with pytest.raises(ValueError):
+                pighting.readShowFile(str(path))
@@ -0,0 +1,139 @@
+import socket
+import struct
+import threading
+import time
+from array import array
+
+import pytest
+
+pytest.importorskip('ola.ClientWrapper') #The transport tests talk to the real OLA client
+from ola import Ola_pb2
+from ola.rpc import Rpc_pb2
+
+#Stands in for olad. Replies to UpdateDmxData can be held back, to keep a frame in flight
+class FakeOlad:
+        def __init__(self, port=0):
+                self.server = socket.create_server(('127.0.0.1', port))
+                self.port = self.server.getsockname()[1]
+                self.frames = [] #(universe, data) of every frame received
+                self.hold = False
+                self.held = []
+                self.lock = threading.Lock()
+                self.connections = []
+                threading.Thread(target=self.accept, daemon=True).start()
+
+        def accept(self):
+                while True:
+                        try:
+                                connection, address = self.server.accept()
+                        except OSError:
+                                return
+                        self.connections.append(connection)
+                        threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+        def read(self, connection, size):
+                data = b''
+                while len(data) < size:
+                        chunk = connection.recv(size - len(data))
+                        if not chunk:
+                                raise EOFError
+                        data += chunk
+                return data
+
+        def serve(self, connection):
+                try:
+                        while True:
+                                header = struct.unpack('=L', self.read(connection, 4))[0]
+                                message = Rpc_pb2.RpcMessage()
+                                message.ParseFromString(self.read(connection, header & 0x0fffffff))
+                                assert message.name == 'UpdateDmxData'
+                                request = Ola_pb2.DmxData()
+                                request.ParseFromString(message.buffer)
+                                with self.lock:
+                                        self.frames.append((request.universe, request.data))
+                                        if self.hold:
+                                                self.held.append((connection, message.id))
+                                                continue
+                                self.reply(connection, message.id)
+                except (EOFError, OSError):
+                        return
+
+        def reply(self, connection, messageID):
+                message = Rpc_pb2.RpcMessage()
+                message.type = Rpc_pb2.RESPONSE
+                message.id = messageID
+                message.buffer = Ola_pb2.Ack().SerializeToString()
+                data = message.SerializeToString()
+                connection.sendall(struct.pack('=L', (1 << 28) | len(data)) + data)
+
+        def release(self): #Sends the held replies and stops holding them
+                with self.lock:
+                        self.hold = False
+                        held, self.held = self.held, []
+                for connection, messageID in held:
+                        self.reply(connection, messageID)
+
+        def close(self):
+                self.server.close()
+                for connection in self.connections:
+                        connection.close()
+
+def waitFor(condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition():
+                assert time.monotonic() < deadline, 'Timed out'
+                time.sleep(0.005)
+
+def frame(value):
+        return array('B', [value]*512)
+
+@pytest.fixture
+def olad():
+        server = FakeOlad()
+        yield server
+        server.close()
+
+#Frames queued while one is in flight are coalesced, only the newest is sent when the reply arrives
+def testCoalescesFramesInFlight(pighting, olad):
+        transport = pighting.OLATransport('127.0.0.1', olad.port, keepAliveInterval=100)
+        transport.start()
+        try:
+                olad.hold = True
+                transport.send(1, frame(1))
+                waitFor(lambda: len(olad.frames) == 1)
+                for value in (2, 3, 4):
+                        transport.send(1, frame(value))
+                transport.send(2, frame(9)) #Other universes do not wait on universe 1
+                waitFor(lambda: len(olad.frames) == 2)
+                olad.release()
+                waitFor(lambda: transport.getStats()['sent'] == 3)
+        finally:
+                transport.stop()
+        assert olad.frames == [(1, frame(1).tobytes()), (2, frame(9).tobytes()), (1, frame(4).tobytes())]
+        stats = transport.getStats()
+        assert (stats['queued'], stats['sent'], stats['dropped'], stats['failed']) == (5, 3, 2, 0)
+
+#Frames fail while olad is down, and the transport connects once it is up
+def testReconnectsWhenOladStarts(pighting):
+        with socket.create_server(('127.0.0.1', 0)) as unused:
+                port = unused.getsockname()[1]
+        transport = pighting.OLATransport('127.0.0.1', port, keepAliveInterval=100, reconnectInterval=0.05)
+        transport.start()
+        olad = None
+        try:
+                transport.send(1, frame(1))
+                assert transport.getStats()['failed'] == 1
+                assert 'Could not connect' in transport.getStats()['lastError']
+                olad = FakeOlad(port)
+                time.sleep(0.1)
+                transport.send(1, frame(2)) #Fails, and starts connecting in the background
+                waitFor(lambda: transport.loop is not None)
+                transport.send(1, frame(3))
+                waitFor(lambda: transport.getStats()['sent'] == 1)
+        finally:
+                transport.stop()
+                if olad is not None:
+                        olad.close()
+        assert olad.frames == [(1, frame(3).tobytes())]
+        stats = transport.getStats()
+        assert (stats['failed'], stats['sent'], stats['lastError']) == (2, 1, None)